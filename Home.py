@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from pathlib import Path
+from core.warmup import start_from_env
+from core.usage import track_page
 
 # Set page config
 st.set_page_config(
@@ -9,6 +11,10 @@ st.set_page_config(
     page_icon="📊",
     layout="wide"
 )
+track_page(__file__)
+
+# Pre-load datasets and charts in the background when DASHBOARD_WARMUP is set
+start_from_env()
 
 # Custom CSS for cards
 st.markdown("""
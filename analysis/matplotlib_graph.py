@@ -1,47 +1,354 @@
-import csv
+#!/usr/bin/env python3
+"""
+Static Chart Rendering
+
+Renders the processed_data outputs of the analysis scripts (hatchability,
+egg break ratio, layer mortality, yield, YoY growth) as PNG/SVG images for
+weekly reports and e-mail digests.
+
+Charts are declared as ChartSpec entries in CHART_SPECS. Every spec is
+rendered for each window (full history, last 5 years) and format, in
+parallel worker processes. Each worker reads only the columns its chart
+needs and draws with matplotlib's Agg backend.
+
+Each image is cached by the hash of its input file, its spec and this
+renderer's code (kept in charts.json next to the images), so a run only
+redraws charts whose data changed.
+
+Usage:
+    python analysis/matplotlib_graph.py [--output-dir DIR] [--formats png svg]
+        [--workers N] [--force] [--only NAME ...]
+"""
+
+import hashlib
+import json
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core import metrics
+from core.agcalendar import week_to_date
 
 # Settings
-INPUT_DATA_PATH = 'processed_data/HATCHABILITY_ANALYSIS.csv'
-
-def load_hatchability_data():
-    """
-    Load hatchability data from CSV
-    """
-    print("Loading hatchability data...")
-    
-    data = []
-    years = []
-    weeks = []
-    hatchability = []
-    ltm = []
-    
-    with open(INPUT_DATA_PATH, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            years.append(int(row['Year']))
-            weeks.append(int(row['Week']))
-            hatchability.append(float(row['Hatchability (%)']))
-            ltm.append(float(row['Hatchability LTM (%)']))
-    
-    print(f"Loaded {len(years)} hatchability records")
-    
-    return {
-        'years': years,
-        'weeks': weeks,
-        'hatchability': hatchability,
-        'ltm': ltm
-    }
+PROCESSED_DATA_DIR = 'processed_data'
+OUTPUT_DIR = 'processed_data/charts'
+MANIFEST = 'charts.json'
+DEFAULT_FORMATS = ('png', 'svg')
+DEFAULT_DPI = 120
+# Window name and years of history shown, None for the full history
+WINDOWS = {'full': None, '5y': 5}
+
+COLORS = ('#1f77b4', '#ff7f0e', '#2ca02c', '#d62728')
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    """
+    One static chart of a processed_data output
+
+    Attributes:
+        name (str): File name stem of the rendered images
+        source (str): CSV file in processed_data
+        date (str or tuple): Date column, or (year, week) columns for
+            weekly outputs without one
+        series (tuple): (column, label) pairs drawn as lines
+        title (str): Chart title
+        y_label (str): Y axis label
+        reference (float, optional): Value of a dashed horizontal line,
+            e.g. 0 for growth rates
+        size (tuple): Figure size in inches
+    """
+    name: str
+    source: str
+    date: object
+    series: tuple
+    title: str
+    y_label: str
+    reference: float = None
+    size: tuple = (10, 4.5)
+
+    def columns(self):
+        """Columns of the source file the chart reads."""
+        dates = list(self.date) if isinstance(self.date, tuple) else [self.date]
+        return dates + [column for column, _ in self.series]
+
+
+CHART_SPECS = (
+    ChartSpec('hatchability_ltm', 'HATCHABILITY_ANALYSIS.csv', ('Year', 'Week'),
+              (('Hatchability (%)', 'Weekly'), ('Hatchability LTM (%)', 'LTM')),
+              'Broiler Hatchability', 'Hatchability (%)'),
+    ChartSpec('egg_break_ratio', 'EGG_BREAK_ANALYSIS.csv', 'Date',
+              (('Break_Ratio', 'Monthly'), ('Rolling_15M_Break_Ratio', 'Rolling 15 months')),
+              'Broiler Hatching Egg Break Ratio', 'Break ratio (%)'),
+    ChartSpec('layer_mortality', 'LAYER_MORTALITY_RATES.csv', 'Projected_Date',
+              (('Mortality_Rate', 'Monthly'), ('Mortality_Rate_LTM', 'LTM')),
+              'Broiler Breeder Layer Mortality', 'Mortality (%)'),
+    ChartSpec('layer_flock_comparison', 'LAYER_FLOCK_COMPARISON_DATA.csv', 'Date',
+              (('Cumulative_Potential_Placements', 'Potential placements'), ('Layer_Herd', 'Layer herd')),
+              'Potential vs Actual Layer Flock', 'Birds (thousands)'),
+    ChartSpec('layer_yield', 'US_LAYER_YIELD_ANALYSIS.csv', 'Date',
+              (('Yield', 'Monthly'), ('Yield_LTM', 'LTM')),
+              'Hatching Eggs per Breeder Layer', 'Eggs per thousand layers'),
+    ChartSpec('layer_yield_yoy', 'US_LAYER_YIELD_ANALYSIS.csv', 'Date',
+              (('Yield_YoY', 'YoY'),),
+              'Breeder Layer Yield YoY Growth', 'Growth (%)', reference=0),
+    ChartSpec('breeder_herd_ltm', 'US_BREEDER_HERD_LTM_AVERAGE.csv', 'Date',
+              (('Layer_Herd', 'Monthly'), ('Layer_Herd_LTM', 'LTM')),
+              'Broiler Breeder Layer Herd', 'Birds (thousands)'),
+    ChartSpec('breeder_herd_yoy', 'US_BREEDER_HERD_LTM_AVERAGE.csv', 'Date',
+              (('YoY_Growth_1y', '1 year'), ('YoY_Growth_2y', '2 years'), ('YoY_Growth_3y', '3 years')),
+              'Broiler Breeder Layer Herd Growth', 'Growth (%)', reference=0),
+    ChartSpec('egg_set_yoy', 'US_EGG_SET_YOY_GROWTH_ANALYSIS.csv', 'Date',
+              (('YoY_Growth', 'Weekly'), ('YoY_Growth_Rolling_Avg', 'Rolling average')),
+              'Broiler Eggs Set YoY Growth', 'Growth (%)', reference=0),
+    ChartSpec('placements_yoy', 'US_PLACEMENTS_YOY_GROWTH_ANALYSIS.csv', 'Date',
+              (('YoY_Growth', 'Weekly'), ('YoY_Growth_Rolling_Avg', 'Rolling average')),
+              'Broiler Chicks Placed YoY Growth', 'Growth (%)', reference=0),
+    ChartSpec('slaughter_heads_yoy', 'US_CHICKEN_SLAUGHTER_PROCESSED.csv', 'Date',
+              (('Heads_YoY_Growth', 'Heads'),),
+              'Chicken Slaughter Heads YoY Growth', 'Growth (%)', reference=0),
+    ChartSpec('slaughter_volume_yoy', 'US_CHICKEN_SLAUGHTER_PROCESSED.csv', 'Date',
+              (('Volume_YoY_Growth', 'Volume'),),
+              'Chicken Slaughter Volume YoY Growth', 'Growth (%)', reference=0),
+    ChartSpec('slaughter_weight_ltm', 'US_CHICKEN_SLAUGHTER_PROCESSED.csv', 'Date',
+              (('Avg_Weight', 'Monthly'), ('Weight_LTM_Avg', 'LTM')),
+              'Chicken Average Live Weight', 'Pounds per head'),
+    ChartSpec('pullet_placements_yoy', 'US_PULLET_PLACEMENT_MONTHLY_YOY_GROWTH.csv', 'Date',
+              (('YoY_Growth', 'Monthly'), ('YoY_Growth_LTM', 'LTM')),
+              'Broiler Pullet Placements YoY Growth', 'Growth (%)', reference=0),
+    ChartSpec('pullet_cumulative_yoy', 'US_PULLET_PLACEMENT_CUMULATIVE_YOY_GROWTH.csv', 'Projected_Date',
+              (('YoY_Growth', 'Monthly'), ('YoY_Growth_LTM', 'LTM')),
+              'Cumulative Potential Placements YoY Growth', 'Growth (%)', reference=0),
+)
+
+
+def load_columns(spec, input_dir=PROCESSED_DATA_DIR):
+    """
+    Read the columns of a chart as arrays
+
+    Args:
+        spec (ChartSpec): Chart to load
+        input_dir (str): Directory of the processed_data outputs
+
+    Returns:
+        tuple: (dates as datetime64 array, {column: float array})
+    """
+    df = pd.read_csv(os.path.join(input_dir, spec.source), usecols=spec.columns())
+    if isinstance(spec.date, tuple):
+        dates = week_to_date(df[spec.date[0]], df[spec.date[1]])
+    else:
+        dates = pd.to_datetime(df[spec.date], errors='coerce')
+    values = {column: pd.to_numeric(df[column], errors='coerce').to_numpy(dtype=float)
+              for column, _ in spec.series}
+    return dates.to_numpy(dtype='datetime64[ns]'), values
+
+
+def image_name(spec, window, image_format):
+    """File name of one rendered image, e.g. 'egg_break_ratio_5y.png'."""
+    return f"{spec.name}_{window}.{image_format}"
+
+
+def renderer_hash():
+    """Hash of this module's code and the matplotlib version."""
+    import matplotlib
+
+    with open(os.path.abspath(__file__), 'rb') as f:
+        source = f.read()
+    return hashlib.md5(source + matplotlib.__version__.encode()).hexdigest()
+
+
+def input_hash(spec, source_hash, window, image_format, dpi, renderer):
+    """
+    Cache key of one image
+
+    Args:
+        spec (ChartSpec): Chart definition
+        source_hash (str): Hash of the source file contents
+        window (str): Window name from WINDOWS
+        image_format (str): 'png' or 'svg'
+        dpi (int): Resolution of raster images
+        renderer (str): renderer_hash() of the current code
+
+    Returns:
+        str: Hex digest
+    """
+    key = json.dumps([asdict(spec), source_hash, window, image_format, dpi, renderer], default=str)
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def _file_hash(path):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def render_chart(spec, jobs, input_dir, output_dir, dpi=DEFAULT_DPI):
+    """
+    Draw one chart in every requested window and format
+
+    Runs in a worker process. The source is read once and each image is
+    written to a temporary file and renamed, so readers never see a
+    partial image.
+
+    Args:
+        spec (ChartSpec): Chart to render
+        jobs (list): (window, format) pairs to write
+        input_dir (str): Directory of the processed_data outputs
+        output_dir (str): Directory of the images
+        dpi (int): Resolution of raster images
+
+    Returns:
+        list: File names written
+    """
+    import matplotlib
+    import matplotlib.dates
+    from matplotlib.figure import Figure
+
+    # Text stays text in SVGs instead of one path per glyph: smaller and faster
+    matplotlib.rcParams['svg.fonttype'] = 'none'
+    dates, values = load_columns(spec, input_dir)
+    last_date = dates[~np.isnat(dates)].max() if (~np.isnat(dates)).any() else None
+
+    written = []
+    for window, image_format in jobs:
+        years = WINDOWS[window]
+        if years is not None and last_date is not None:
+            visible = dates >= last_date - np.timedelta64(int(years * 365.25), 'D')
+        else:
+            visible = np.ones(len(dates), dtype=bool)
+
+        # Figure without pyplot: no global state shared between charts
+        fig = Figure(figsize=spec.size, dpi=dpi)
+        ax = fig.subplots()
+        for position, (column, label) in enumerate(spec.series):
+            ax.plot(dates[visible], values[column][visible], label=label,
+                    color=COLORS[position % len(COLORS)], linewidth=1.5 if position else 1.2)
+        if spec.reference is not None:
+            ax.axhline(spec.reference, color='grey', linestyle='--', linewidth=0.8)
+        ax.set_title(spec.title)
+        ax.set_ylabel(spec.y_label)
+        ax.grid(True, alpha=0.3)
+        if len(spec.series) > 1:
+            ax.legend(loc='best', frameon=False)
+        locator = matplotlib.dates.AutoDateLocator()
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(matplotlib.dates.ConciseDateFormatter(locator))
+        # Fixed margins: tight_layout would draw every figure an extra time
+        fig.subplots_adjust(left=0.08, right=0.98, top=0.9, bottom=0.1)
+
+        name = image_name(spec, window, image_format)
+        target = os.path.join(output_dir, name)
+        temporary = os.path.join(output_dir, f".{name}.{os.getpid()}.tmp")
+        fig.savefig(temporary, format=image_format)
+        os.replace(temporary, target)
+        written.append(name)
+    return written
+
+
+def render_all(specs=CHART_SPECS, input_dir=PROCESSED_DATA_DIR, output_dir=OUTPUT_DIR,
+               formats=DEFAULT_FORMATS, windows=tuple(WINDOWS), dpi=DEFAULT_DPI,
+               workers=None, force=False):
+    """
+    Render every image whose inputs changed since the last run
+
+    Args:
+        specs (iterable): ChartSpec entries to render
+        input_dir (str): Directory of the processed_data outputs
+        output_dir (str): Directory of the images and their manifest
+        formats (iterable): Image formats, 'png' and/or 'svg'
+        windows (iterable): Window names from WINDOWS
+        dpi (int): Resolution of raster images
+        workers (int, optional): Worker processes, defaults to the CPU count
+        force (bool): Render every image regardless of the manifest
+
+    Returns:
+        dict: Image file names under 'rendered', 'skipped' and 'failed'
+            (failed lists chart names, missing sources included)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    renderer = renderer_hash()
+    source_hashes = {}
+    result = {'rendered': [], 'skipped': [], 'failed': []}
+    pending = {}
+    for spec in specs:
+        path = os.path.join(input_dir, spec.source)
+        if not os.path.exists(path):
+            print(f"Skipping {spec.name}: {path} not found")
+            result['failed'].append(spec.name)
+            continue
+        if spec.source not in source_hashes:
+            source_hashes[spec.source] = _file_hash(path)
+        for window in windows:
+            for image_format in formats:
+                name = image_name(spec, window, image_format)
+                key = input_hash(spec, source_hashes[spec.source], window, image_format, dpi, renderer)
+                if not force and manifest.get(name) == key and os.path.exists(os.path.join(output_dir, name)):
+                    result['skipped'].append(name)
+                else:
+                    pending.setdefault(spec, []).append((window, image_format, name, key))
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(pending))) as pool:
+            futures = {pool.submit(render_chart, spec, [(window, image_format) for window, image_format, _, _ in jobs],
+                                   input_dir, output_dir, dpi): (spec, jobs, time.perf_counter())
+                       for spec, jobs in pending.items()}
+            for future in as_completed(futures):
+                spec, jobs, start = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"Error rendering {spec.name}: {e}")
+                    result['failed'].append(spec.name)
+                    continue
+                metrics.record('chart_image', spec.name, time.perf_counter() - start, images=len(jobs))
+                for _, _, name, key in jobs:
+                    manifest[name] = key
+                    result['rendered'].append(name)
+
+    temporary = f"{manifest_path}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temporary, manifest_path)
+    return result
+
 
 def main():
-    print("Starting hatchability data processing...")
-    
-    try:
-        # Load data
-        data = load_hatchability_data()
-        print("Data processing complete!")
-    except Exception as e:
-        print(f"Error processing data: {e}")
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render processed_data charts as static images")
+    parser.add_argument('--input-dir', default=PROCESSED_DATA_DIR, help="Directory of the analysis outputs")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="Directory to write the images to")
+    parser.add_argument('--formats', nargs='+', default=list(DEFAULT_FORMATS), choices=['png', 'svg'])
+    parser.add_argument('--windows', nargs='+', default=list(WINDOWS), choices=list(WINDOWS))
+    parser.add_argument('--dpi', type=int, default=DEFAULT_DPI)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="Render images even if nothing changed")
+    parser.add_argument('--only', nargs='*', help="Chart names, e.g. hatchability_ltm egg_break_ratio")
+    args = parser.parse_args()
+
+    specs = [spec for spec in CHART_SPECS if not args.only or spec.name in args.only]
+    print(f"Rendering {len(specs)} charts...")
+    start = time.perf_counter()
+    result = render_all(specs, args.input_dir, args.output_dir, args.formats, args.windows,
+                        args.dpi, args.workers, args.force)
+    print(f"Rendered {len(result['rendered'])} images, skipped {len(result['skipped'])} unchanged, "
+          f"{len(result['failed'])} charts failed in {time.perf_counter() - start:.1f}s")
+    return 1 if result['failed'] else 0
+
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+NASS Quick Stats Ingestion
+
+Extracts the series declared in core.nass.SERIES from a Quick Stats bulk
+file (e.g. qs.animals_products_YYYYMMDD.txt.gz from
+https://www.nass.usda.gov/datasets/) in bounded memory, and writes them
+as Parquet files partitioned by series. With --publish, each series is
+also written to the dataset storage under its name (e.g.
+US_BROILER_EGG_SET_WEEKLY), where the analysis scripts read it with
+typed columns.
+
+Usage:
+    python analysis/nass_ingest.py BULK_FILE [--output-dir DIR] [--series NAME ...]
+        [--block-mb MB] [--publish]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.nass import DEFAULT_BLOCK_MB, SERIES, read_series, write_partitions
+from core.storage import get_backend
+
+# Settings
+OUTPUT_DIR = 'processed_data/nass'
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract series from a NASS Quick Stats bulk file")
+    parser.add_argument('path', help="Bulk file, .txt/.csv, optionally .gz")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="Partitioned Parquet output directory")
+    parser.add_argument('--series', nargs='*', choices=[entry.name for entry in SERIES], help="Series names")
+    parser.add_argument('--block-mb', type=int, default=DEFAULT_BLOCK_MB, help="MB parsed at a time")
+    parser.add_argument('--publish', action='store_true', help="Also write each series to the dataset storage")
+    args = parser.parse_args()
+
+    series = [entry for entry in SERIES if not args.series or entry.name in args.series]
+    print(f"Reading {args.path} for {len(series)} series...")
+    start = time.perf_counter()
+    frames = read_series(args.path, series, block_size=args.block_mb << 20)
+    print(f"Scanned in {time.perf_counter() - start:.1f}s")
+
+    for entry in series:
+        frame = frames.get(entry.name)
+        if frame is None:
+            print(f"  {entry.name}: not found in file")
+        else:
+            print(f"  {entry.name}: {len(frame)} rows, {frame['Date'].min():%Y-%m-%d} to {frame['Date'].max():%Y-%m-%d}")
+
+    write_partitions(frames, args.output_dir)
+    print(f"Saved {len(frames)} series to {args.output_dir}")
+
+    if args.publish:
+        backend = get_backend()
+        for name, frame in frames.items():
+            backend.write_frame(name, frame)
+        print(f"Published {len(frames)} series to {backend!r}")
+    return 0 if frames else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
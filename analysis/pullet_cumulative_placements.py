@@ -20,6 +20,10 @@ import numpy as np
 from datetime import datetime, timedelta
 import calendar
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.schema import read_normalized
+from core.storage import dataset_exists
+
 def load_pullet_data():
     """
     Load pullet placement data from CSV file
@@ -27,19 +31,14 @@ def load_pullet_data():
     Returns:
         pandas.DataFrame: The pullet placement data
     """
-    file_path = 'datasets/US_PULLET_PLACEMENTS_MONTHLY.csv'
-    if not os.path.exists(file_path):
-        print(f"Error: {file_path} not found")
+    dataset_name = 'US_PULLET_PLACEMENTS_MONTHLY'
+    if not dataset_exists(dataset_name):
+        print(f"Error: {dataset_name} not found")
         return None
         
-    print(f"Loading pullet placement data from {file_path}")
-    df = pd.read_csv(file_path)
-    
-    # Convert Year and Month to date
-    df['Date'] = pd.to_datetime(df['Year'].astype(str) + '-' + df['Month'], format='%Y-%b')
-    
-    # Sort by date
-    df = df.sort_values('Date')
+    print(f"Loading pullet placement data from {dataset_name}")
+    # Typed and sorted by date
+    df = read_normalized(dataset_name)
     
     print(f"Loaded {len(df)} records of pullet placement data")
     return df
@@ -16,6 +16,10 @@ import numpy as np
 from datetime import datetime, timedelta
 import calendar
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.schema import read_normalized
+from core.storage import dataset_exists
+
 def load_data():
     """
     Load both the regular pullet placements and cumulative potential placements data
@@ -23,24 +27,18 @@ def load_data():
     Returns:
         tuple: (regular_df, cumulative_df)
     """
-    regular_file = 'datasets/US_PULLET_PLACEMENTS_MONTHLY.csv'
-    cumulative_file = 'datasets/US_PULLET_CUMULATIVE_POTENTIAL_PLACEMENTS.csv'
+    regular_dataset = 'US_PULLET_PLACEMENTS_MONTHLY'
+    cumulative_dataset = 'US_PULLET_CUMULATIVE_POTENTIAL_PLACEMENTS'
     
-    if not os.path.exists(regular_file) or not os.path.exists(cumulative_file):
+    if not dataset_exists(regular_dataset) or not dataset_exists(cumulative_dataset):
         print(f"Error: Required files not found")
         return None, None
         
-    print(f"Loading regular pullet placements from {regular_file}")
-    regular_df = pd.read_csv(regular_file)
-    
-    print(f"Loading cumulative potential placements from {cumulative_file}")
-    cumulative_df = pd.read_csv(cumulative_file)
-    
-    # Convert Year and Month to date in the regular DataFrame
-    regular_df['Date'] = pd.to_datetime(regular_df['Year'].astype(str) + '-' + regular_df['Month'], format='%Y-%b')
+    print(f"Loading regular pullet placements from {regular_dataset}")
+    regular_df = read_normalized(regular_dataset)
     
-    # Convert Projected_Date to datetime in the cumulative DataFrame
-    cumulative_df['Projected_Date'] = pd.to_datetime(cumulative_df['Projected_Date'])
+    print(f"Loading cumulative potential placements from {cumulative_dataset}")
+    cumulative_df = read_normalized(cumulative_dataset)
     
     print(f"Loaded {len(regular_df)} records of regular placements and {len(cumulative_df)} records of cumulative placements")
     return regular_df, cumulative_df
@@ -57,7 +55,6 @@ def calculate_regular_yoy_growth(df):
     """
     
     print("Calculating YoY growth for regular monthly pullet placements")
-    print(f"Available columns: {df.columns.tolist()}")
     
     # Make a copy to avoid modifying the original
     result_df = df.copy()
@@ -65,35 +62,9 @@ def calculate_regular_yoy_growth(df):
     # Ensure the data is sorted by date
     result_df = result_df.sort_values('Date')
     
-    # Find the column with pullet placements data
-    placement_col = None
-    for col in result_df.columns:
-        if 'pullet' in col.lower() and 'placement' in col.lower():
-            placement_col = col
-            print(f"Found pullet placements column: {placement_col}")
-            break
-    
-    # Check specific column names
-    if placement_col is None:
-        if 'Pullet_Placements' in result_df.columns:
-            placement_col = 'Pullet_Placements'
-        elif 'Placements' in result_df.columns:
-            placement_col = 'Placements'
-        elif 'Value' in result_df.columns:
-            placement_col = 'Value'
-    
-    if placement_col is None:
-        print("ERROR: Could not find pullet placements column")
-        print(f"Available columns: {result_df.columns.tolist()}")
-        # Create dummy column to allow processing to continue
-        result_df['Pullet_Placements'] = 100
-        placement_col = 'Pullet_Placements'
-    else:
-        print(f"Using column '{placement_col}' for pullet placements data")
-    
     # Calculate year-over-year growth rate
     # This compares each month to the same month last year (12 months ago)
-    result_df['YoY_Growth'] = result_df[placement_col].pct_change(periods=12) * 100
+    result_df['YoY_Growth'] = result_df['Pullet Placements'].pct_change(periods=12) * 100
     
     # Calculate 12-month moving average
     result_df['YoY_Growth_LTM'] = result_df['YoY_Growth'].rolling(window=12).mean()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Run All Analyses
+
+Runs every analysis script in dependency order, skipping the ones whose
+code, parameters and input datasets are unchanged since their last run
+(see core/lineage.py). The lineage manifest is kept in
+processed_data/lineage.json. The static chart images are brought up to
+date at the end (they have their own cache).
+
+Usage:
+    python analysis/run_all.py [--force] [--only STAGE ...] [--no-charts]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.lineage import Stage, run_stages
+
+PROCESSED_DATA_DIR = 'processed_data'
+
+STAGES = (
+    Stage('hatchability', 'analysis/simple_hatchability_analysis.py', ('HATCHABILITY_ANALYSIS.csv',)),
+    Stage('egg_break', 'analysis/egg_break_analysis.py', ('EGG_BREAK_ANALYSIS.csv',)),
+    Stage('yield', 'analysis/yield_analysis.py', ('US_LAYER_YIELD_ANALYSIS.csv',)),
+    Stage('pullet_cumulative', 'analysis/pullet_cumulative_placements.py',
+          ('US_PULLET_CUMULATIVE_POTENTIAL_PLACEMENTS.csv',)),
+    Stage('layer_mortality', 'analysis/layer_mortality_analysis.py',
+          ('LAYER_MORTALITY_RATES.csv', 'LAYER_FLOCK_COMPARISON_DATA.csv')),
+    Stage('pullet_yoy', 'analysis/pullet_placement_yoy_analysis.py',
+          ('US_PULLET_PLACEMENT_MONTHLY_YOY_GROWTH.csv', 'US_PULLET_PLACEMENT_CUMULATIVE_YOY_GROWTH.csv')),
+    Stage('yoy_growth', 'analysis/yoy_growth_graphs.py',
+          ('US_EGG_SET_YOY_GROWTH.csv', 'US_PLACEMENTS_YOY_GROWTH.csv')),
+    Stage('us_chicken', 'analysis/us_chicken_analysis.py', (
+        'US_EGG_SET_YOY_GROWTH_ANALYSIS.csv',
+        'US_PLACEMENTS_YOY_GROWTH_ANALYSIS.csv',
+        'US_CHICKEN_SLAUGHTER_PROCESSED.csv',
+        'US_CHICKEN_SLAUGHTER_HEADS_YOY_GROWTH.csv',
+        'US_CHICKEN_SLAUGHTER_LTM_AVG_WEIGHTS.csv',
+        'US_CHICKEN_SLAUGHTER_VOLUME_YOY_GROWTH.csv',
+        'US_CHICKEN_SLAUGHTER_SEASONAL_PRODUCTION.csv',
+        'US_BREEDER_HERD_LTM_AVERAGE.csv',
+        'US_BREEDER_HERD_YOY_GROWTH.csv'
+    )),
+)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the analyses whose inputs changed")
+    parser.add_argument('--force', action='store_true', help="Run every stage even if nothing changed")
+    parser.add_argument('--only', nargs='*', choices=[stage.name for stage in STAGES], help="Stage names")
+    parser.add_argument('--no-charts', action='store_true', help="Do not update the chart images")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = run_stages(STAGES, PROCESSED_DATA_DIR, args.force, args.only)
+    print(f"\nRan {len(result['ran'])} stages, skipped {len(result['skipped'])} unchanged, "
+          f"{len(result['failed'])} failed in {time.perf_counter() - start:.1f}s")
+    for name in result['skipped']:
+        print(f"  skipped {name}")
+    for name in result['failed']:
+        print(f"  FAILED {name}")
+
+    if not args.no_charts:
+        import matplotlib_graph
+
+        matplotlib_graph.render_all()
+    return 1 if result['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+"""
+Shared building blocks for the dashboard pages and the analysis scripts.
+"""
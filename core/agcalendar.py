@@ -0,0 +1,425 @@
+"""
+Agricultural Calendar
+
+Vectorized date conversions shared by the pages and the analysis scripts:
+marketing/harvest years for any start month, NASS "WEEK #XX" periods,
+ISO weeks, quarters, month abbreviations and the B3 trading calendar.
+
+Everything here works on whole columns at once. Dates are built with
+datetime64 arithmetic and repeated labels are resolved through small lookup
+tables, so there is no string concatenation, strftime or row-wise apply.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+MONTH_ABBR = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+              'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Index 0 is unused so that month numbers index the table directly
+_MONTH_ABBR_TABLE = np.array([''] + MONTH_ABBR, dtype=object)
+_MONTH_NUMBER = {name.upper(): number for number, name in enumerate(MONTH_ABBR, start=1)}
+
+
+def _as_datetime(dates):
+    """Return dates as a datetime Series, keeping the caller's index."""
+    if isinstance(dates, pd.Series):
+        return pd.to_datetime(dates)
+    return pd.Series(pd.to_datetime(dates))
+
+
+def _wrap(values, like, dtype=None):
+    """Wrap a NumPy result in a Series aligned with the input."""
+    index = like.index if isinstance(like, pd.Series) else None
+    return pd.Series(values, index=index, dtype=dtype)
+
+
+@lru_cache(maxsize=256)
+def _lookup_labels(labels, parser):
+    """Parse each distinct label once and cache the resulting table."""
+    return np.array([parser(label) for label in labels], dtype=float)
+
+
+def _parse_unique(values, parser):
+    """
+    Apply a scalar parser to a column through its distinct values
+
+    Args:
+        values (array-like): Labels to parse, typically highly repetitive
+        parser (callable): Function mapping one label to a number (or NaN)
+
+    Returns:
+        numpy.ndarray: Parsed values, float because of missing labels
+    """
+    codes, uniques = pd.factorize(pd.Series(values), sort=False)
+    table = _lookup_labels(tuple(str(label) for label in uniques), parser)
+    result = np.full(len(codes), np.nan)
+    valid = codes >= 0
+    result[valid] = table[codes[valid]]
+    return result
+
+
+def _parse_month(label):
+    """Parse a month label ('JAN', 'Jan', '1', '01') into its number."""
+    label = label.strip().upper()
+    if label in _MONTH_NUMBER:
+        return _MONTH_NUMBER[label]
+    if label[:3] in _MONTH_NUMBER:
+        return _MONTH_NUMBER[label[:3]]
+    try:
+        number = int(float(label))
+    except ValueError:
+        return np.nan
+    return number if 1 <= number <= 12 else np.nan
+
+
+def _parse_week(label):
+    """Parse a NASS period label such as 'WEEK #12' into its week number."""
+    label = label.strip().upper()
+    if label.startswith('WEEK #'):
+        label = label[6:]
+    try:
+        return int(float(label))
+    except ValueError:
+        return np.nan
+
+
+def month_number(months):
+    """
+    Convert month labels or numbers into month numbers (1-12)
+
+    Args:
+        months (array-like): Abbreviations in any case ('JAN', 'Jan'), full
+            names or numbers
+
+    Returns:
+        pandas.Series: Month numbers, missing where a label is not recognised
+    """
+    return _wrap(_month_values(months), months, dtype='Int64')
+
+
+def _month_values(months):
+    """Month numbers as a float array, NaN where a label is not recognised."""
+    if pd.api.types.is_numeric_dtype(pd.Series(months)):
+        return pd.Series(months).to_numpy(dtype=float, na_value=np.nan)
+    return _parse_unique(months, _parse_month)
+
+
+def nass_week_number(periods):
+    """
+    Extract the week number from NASS reference periods ('WEEK #XX')
+
+    Args:
+        periods (array-like): NASS reference_period_desc values
+
+    Returns:
+        pandas.Series: Week numbers, missing for non-weekly periods
+    """
+    return _wrap(_parse_unique(periods, _parse_week), periods, dtype='Int64')
+
+
+def month_abbr(dates):
+    """
+    Three-letter month abbreviations for a column of dates
+
+    Args:
+        dates (array-like): Dates
+
+    Returns:
+        pandas.Series: Abbreviations such as 'Jan', same as strftime('%b')
+    """
+    months = _as_datetime(dates).dt.month.to_numpy()
+    return _wrap(_MONTH_ABBR_TABLE[months], dates)
+
+
+def month_to_date(years, months, day=1):
+    """
+    Build dates from year and month columns
+
+    Args:
+        years (array-like): Calendar years
+        months (array-like): Month labels or numbers, see month_number
+        day (int): Day of the month to use
+
+    Returns:
+        pandas.Series: Dates, NaT where the month could not be parsed
+    """
+    year_values = pd.Series(years).to_numpy(dtype=float, na_value=np.nan)
+    month_values = _month_values(months)
+    valid = ~(np.isnan(year_values) | np.isnan(month_values))
+
+    month_codes = np.zeros(len(year_values), dtype=np.int64)
+    month_codes[valid] = (year_values[valid] - 1970) * 12 + month_values[valid] - 1
+    dates = month_codes.astype('datetime64[M]').astype('datetime64[D]') + (day - 1)
+    dates = dates.astype('datetime64[ns]')
+    dates[~valid] = np.datetime64('NaT')
+
+    like = years if isinstance(years, pd.Series) else months
+    return _wrap(dates, like)
+
+
+def season_year(dates, start_month=1):
+    """
+    Marketing or harvest year for each date
+
+    A season starting in April labels April 2024 - March 2025 as 2024.
+
+    Args:
+        dates (array-like): Dates
+        start_month (int): First month of the season (1-12)
+
+    Returns:
+        pandas.Series: Season years
+    """
+    dates = _as_datetime(dates)
+    shift = (dates.dt.month < start_month).astype(int)
+    return dates.dt.year - shift
+
+
+def season_month(dates, start_month=1):
+    """
+    Position of each date's month within its season (1 = start month)
+
+    Args:
+        dates (array-like): Dates
+        start_month (int): First month of the season (1-12)
+
+    Returns:
+        pandas.Series: Month positions from 1 to 12
+    """
+    dates = _as_datetime(dates)
+    return (dates.dt.month - start_month) % 12 + 1
+
+
+def season_month_labels(start_month=1):
+    """
+    Month abbreviations in season order, for chart category orders
+
+    Args:
+        start_month (int): First month of the season (1-12)
+
+    Returns:
+        list: Twelve abbreviations starting at start_month
+    """
+    return MONTH_ABBR[start_month - 1:] + MONTH_ABBR[:start_month - 1]
+
+
+def current_season_year(start_month=1, today=None):
+    """
+    Season year that contains today (or the given date)
+
+    Args:
+        start_month (int): First month of the season (1-12)
+        today (datetime, optional): Reference date, defaults to now
+
+    Returns:
+        int: The season year
+    """
+    today = pd.Timestamp.now() if today is None else pd.Timestamp(today)
+    return today.year if today.month >= start_month else today.year - 1
+
+
+@lru_cache(maxsize=32)
+def _first_mondays(first_year, last_year):
+    """Lookup tables of the first Monday of every year in a range."""
+    years = np.arange(first_year, last_year + 1)
+    jan1 = (years - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+    # 1970-01-01 was a Thursday, so this gives Monday = 0
+    weekday = (jan1.astype(np.int64) + 3) % 7
+    return jan1 + (7 - weekday) % 7, weekday == 0
+
+
+def week_to_date(years, weeks):
+    """
+    Date of the Sunday closing a Monday-based week of the year
+
+    Matches pd.to_datetime(year + week + '0', format='%Y%W%w'), which is how
+    NASS weekly series were previously dated.
+
+    Args:
+        years (array-like): Calendar years
+        weeks (array-like): Week numbers (Monday-based, as in %W)
+
+    Returns:
+        pandas.Series: Week-ending dates, NaT where year or week is missing
+    """
+    year_values = pd.to_numeric(pd.Series(years), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    week_values = pd.to_numeric(pd.Series(weeks), errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    valid = ~(np.isnan(year_values) | np.isnan(week_values))
+
+    dates = np.full(len(year_values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    if valid.any():
+        year_ints = year_values[valid].astype(np.int64)
+        first_year = int(year_ints.min())
+        first_mondays, starts_on_monday = _first_mondays(first_year, int(year_ints.max()))
+        position = year_ints - first_year
+        week_ints = week_values[valid].astype(np.int64)
+        # strptime has no week 0 when the year starts on a Monday and rolls it into week 1
+        week_ints[(week_ints == 0) & starts_on_monday[position]] = 1
+        offsets = week_ints * 7 - 1
+        first_monday = first_mondays[position]
+        dates[valid] = (first_monday + offsets).astype('datetime64[ns]')
+
+    like = years if isinstance(years, pd.Series) else weeks
+    return _wrap(dates, like)
+
+
+def nass_week_to_date(years, periods):
+    """
+    Week-ending dates for NASS weekly series
+
+    Args:
+        years (array-like): NASS year values
+        periods (array-like): NASS reference_period_desc values ('WEEK #XX')
+
+    Returns:
+        pandas.Series: Week-ending dates
+    """
+    return week_to_date(years, nass_week_number(periods))
+
+
+def iso_week(dates):
+    """
+    ISO year and week number for each date
+
+    Args:
+        dates (array-like): Dates
+
+    Returns:
+        pandas.DataFrame: Columns 'ISO_Year' and 'ISO_Week'
+    """
+    dates = _as_datetime(dates)
+    calendar = dates.dt.isocalendar()
+    return pd.DataFrame({
+        'ISO_Year': calendar['year'].astype(int),
+        'ISO_Week': calendar['week'].astype(int)
+    }, index=dates.index)
+
+
+def quarter_to_date(years, quarters, month_in_quarter=1):
+    """
+    Build dates from year and quarter columns
+
+    Args:
+        years (array-like): Calendar years
+        quarters (array-like): Quarters (1-4)
+        month_in_quarter (int): Which month of the quarter to date it by,
+            1 for the first month, 3 for the last
+
+    Returns:
+        pandas.Series: First day of the chosen month of each quarter
+    """
+    months = (pd.Series(quarters).to_numpy(dtype=float, na_value=np.nan) - 1) * 3 + month_in_quarter
+    return month_to_date(years, months)
+
+
+def quarter_label(years, quarters):
+    """
+    Labels such as '2024Q3' for year and quarter columns
+
+    Args:
+        years (array-like): Calendar years
+        quarters (array-like): Quarters (1-4)
+
+    Returns:
+        pandas.Series: Quarter labels
+    """
+    codes = np.asarray(years, dtype=np.int64) * 4 + np.asarray(quarters, dtype=np.int64) - 1
+    codes_index, uniques = pd.factorize(codes)
+    table = np.array([f"{code // 4}Q{code % 4 + 1}" for code in uniques], dtype=object)
+    return _wrap(table[codes_index], years)
+
+
+#######################
+# B3 trading calendar
+#######################
+
+# Fixed-date B3 holidays as (month, day, first year, last year)
+B3_FIXED_HOLIDAYS = [
+    (1, 1, None, None),     # New Year
+    (1, 25, None, 2021),    # São Paulo city anniversary, B3 trades since 2022
+    (4, 21, None, None),    # Tiradentes
+    (5, 1, None, None),     # Labour Day
+    (7, 9, None, 2021),     # São Paulo state holiday, B3 trades since 2022
+    (9, 7, None, None),     # Independence Day
+    (10, 12, None, None),   # Our Lady of Aparecida
+    (11, 2, None, None),    # All Souls
+    (11, 15, None, None),   # Republic Day
+    (11, 20, None, 2021),   # Black Consciousness, São Paulo city holiday until 2021
+    (11, 20, 2024, None),   # Black Consciousness, national holiday since 2024
+    (12, 24, None, None),   # Christmas Eve
+    (12, 25, None, None),   # Christmas
+    (12, 31, None, None),   # Last business day of the year
+]
+
+# Movable B3 holidays, in days from Easter Sunday
+B3_EASTER_HOLIDAYS = [-48, -47, -2, 60]  # Carnival Monday and Tuesday, Good Friday, Corpus Christi
+
+
+def easter(years):
+    """
+    Easter Sunday of each year (Gregorian calendar)
+
+    Args:
+        years (array-like): Years
+
+    Returns:
+        numpy.ndarray: datetime64[D] dates
+    """
+    y = np.asarray(years, dtype=np.int64)
+    # Anonymous Gregorian algorithm, on whole arrays
+    a, b, c = y % 19, y // 100, y % 100
+    d, e = b // 4, b % 4
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 19 * l) // 433
+    month = (h + l - 7 * m + 90) // 25
+    day = (h + l - 7 * m + 33 * month + 19) % 32
+    return ((y - 1970) * 12 + month - 1).astype('datetime64[M]').astype('datetime64[D]') + day - 1
+
+
+@lru_cache(maxsize=32)
+def b3_holidays(first_year, last_year):
+    """
+    Weekdays on which B3 does not trade, in a range of years
+
+    Covers the national and São Paulo holidays B3 closes for; one-off
+    closures (e.g. the 2018 World Cup half days) are not included.
+
+    Args:
+        first_year (int): First year
+        last_year (int): Last year, included
+
+    Returns:
+        pandas.DatetimeIndex: Sorted holidays falling on weekdays
+    """
+    years = np.arange(first_year, last_year + 1)
+    months = (years - 1970) * 12
+    dates = []
+    for month, day, since, until in B3_FIXED_HOLIDAYS:
+        selected = (years >= (since or first_year)) & (years <= (until or last_year))
+        dates.append((months[selected] + month - 1).astype('datetime64[M]').astype('datetime64[D]') + day - 1)
+    easter_sundays = easter(years)
+    dates.extend(easter_sundays + offset for offset in B3_EASTER_HOLIDAYS)
+    holidays = np.unique(np.concatenate(dates))
+    return pd.DatetimeIndex(holidays[np.is_busday(holidays)])
+
+
+def b3_trading_days(start, end):
+    """
+    B3 trading days between two dates
+
+    Args:
+        start (str or datetime): First date
+        end (str or datetime): Last date, included
+
+    Returns:
+        pandas.DatetimeIndex: Weekdays that are not B3 holidays
+    """
+    start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+    days = pd.bdate_range(start, end)
+    return days[~days.isin(b3_holidays(start.year, end.year))]
@@ -0,0 +1,398 @@
+"""
+Poultry Analytics
+
+The calculations behind the scripts in analysis/, as plain functions:
+DataFrames in, DataFrames out, no file access and no printing. Pages call
+them through core.cache.cached and get the results in memory; the scripts
+are thin wrappers that load the datasets, call these and write the CSVs in
+processed_data/.
+
+Inputs are datasets in their canonical form (core.schema.read_normalized):
+typed Year, Week or Month, Date and value columns. Functions never modify
+the frames they are given.
+"""
+
+import datetime
+
+import pandas as pd
+
+from core.agcalendar import MONTH_ABBR, month_abbr, month_number
+from core.panel import weekly_to_monthly
+
+INCUBATION_PERIOD_WEEKS = 3  # Standard incubation period (21 days ≈ 3 weeks)
+HATCHABILITY_LTM_WEEKS = 52
+
+EGG_BREAK_COLUMNS = ['Date', 'Year', 'Month', 'Hatching Eggs', 'Eggs Set',
+                     'Eggs_Break', 'Break_Ratio', 'Rolling_15M_Break_Ratio']
+
+
+#######################
+# Hatchability
+#######################
+
+def _weekly_counts(frame, value_column):
+    """(year, week, value) of each week with a value."""
+    valid = frame.dropna(subset=[value_column])
+    return zip(valid['Year'], valid['Week'], valid[value_column].astype('int64'))
+
+
+def week_offset(year, week, offset_weeks):
+    """
+    Year and week a number of weeks earlier
+
+    Args:
+        year (int): Year
+        week (int): Week number, counted from the first Monday of the year
+        offset_weeks (int): Weeks to go back
+
+    Returns:
+        tuple: (year, week)
+    """
+    # Calculate approximate date
+    jan1 = datetime.date(year, 1, 1)
+    days_to_monday = (7 - jan1.weekday()) % 7
+    first_monday = jan1 + datetime.timedelta(days=days_to_monday)
+    week_date = first_monday + datetime.timedelta(weeks=week - 1)
+
+    # Apply offset
+    new_date = week_date - datetime.timedelta(weeks=offset_weeks)
+
+    # Calculate new year and week
+    new_year = new_date.year
+    # Very approximate week calculation
+    new_week = int((new_date - datetime.date(new_year, 1, 1)).days / 7) + 1
+
+    # Edge case handling for week numbers
+    if new_week < 1:
+        new_year -= 1
+        new_week = 52 + new_week
+    elif new_week > 52:
+        new_year += 1
+        new_week = new_week - 52
+
+    return new_year, new_week
+
+
+def hatchability(eggs_set, placements, incubation_weeks=INCUBATION_PERIOD_WEEKS,
+                 window=HATCHABILITY_LTM_WEEKS):
+    """
+    Weekly hatchability: chicks placed over the eggs set incubation_weeks earlier
+
+    Args:
+        eggs_set (pandas.DataFrame): US_BROILER_EGG_SET_WEEKLY
+        placements (pandas.DataFrame): US_CHICKEN_PLACEMENTS_WEEKLY
+        incubation_weeks (int): Weeks between setting and placement
+        window (int): Weeks in the long-term mean
+
+    Returns:
+        pandas.DataFrame: One row per placement week with a matching egg set,
+            sorted by Year and Week, with 'Hatchability (%)' and its
+            'Hatchability LTM (%)'; empty when nothing matches
+    """
+    eggs_lookup = {(year, week): value for year, week, value in _weekly_counts(eggs_set, 'Eggs Set')}
+
+    rows = []
+    for year, week, placed in _weekly_counts(placements, 'Placements'):
+        set_year, set_week = week_offset(year, week, incubation_weeks)
+        eggs = eggs_lookup.get((set_year, set_week))
+        if eggs is not None:
+            rows.append({
+                'Year': year,
+                'Week': week,
+                'Eggs Set Year': set_year,
+                'Eggs Set Week': set_week,
+                'Eggs Set': eggs,
+                'Placements': placed,
+                'Hatchability (%)': placed / eggs * 100
+            })
+    rows.sort(key=lambda row: (row['Year'], row['Week']))
+
+    # Mean of the last `window` weeks, over fewer weeks at the start
+    values = [row['Hatchability (%)'] for row in rows]
+    for i, row in enumerate(rows):
+        window_values = values[max(0, i - window + 1):i + 1]
+        row['Hatchability LTM (%)'] = sum(window_values) / len(window_values)
+
+    return pd.DataFrame(rows)
+
+
+#######################
+# Egg break
+#######################
+
+def monthly_eggs_set(eggs_set):
+    """
+    Weekly eggs set allocated to calendar months
+
+    Each week is split between the months it spans by its days in each of
+    them (core.panel.weekly_to_monthly), so month-end totals are not
+    shifted by whole weeks.
+
+    Args:
+        eggs_set (pandas.DataFrame): US_BROILER_EGG_SET_WEEKLY
+
+    Returns:
+        pandas.DataFrame: Eggs Set, Date (first of the month), Year and
+            Month (upper-case abbreviation, as in the NASS monthly datasets);
+            months only partly covered by the weekly series are left out
+    """
+    totals = weekly_to_monthly(eggs_set['Date'], eggs_set['Eggs Set'])
+    monthly = pd.DataFrame({'Eggs Set': totals.to_numpy(), 'Date': totals.index})
+    monthly['Year'] = monthly['Date'].dt.year
+    monthly['Month'] = month_abbr(monthly['Date']).str.upper()
+    return monthly
+
+
+def egg_break(hatching_eggs, eggs_set):
+    """
+    Monthly egg break: hatching eggs produced but not set
+
+    Args:
+        hatching_eggs (pandas.DataFrame): US_BROILER_HATCHING_EGGS_MONTHLY
+        eggs_set (pandas.DataFrame): US_BROILER_EGG_SET_WEEKLY
+
+    Returns:
+        pandas.DataFrame: EGG_BREAK_COLUMNS first (Break_Ratio in percent
+            of the eggs produced, with its 15-month rolling mean), then the
+            remaining merge columns; no rows when the months do not overlap
+    """
+    produced = hatching_eggs.copy()
+    monthly = monthly_eggs_set(eggs_set)
+
+    produced['Month_Num'] = month_number(produced['Month']).astype(int)
+    monthly['Month_Num'] = month_number(monthly['Month']).astype(int)
+
+    merged = pd.merge(produced, monthly, on=['Year', 'Month_Num'], how='inner',
+                      suffixes=('_produced', '_set'))
+    if merged.empty:
+        return pd.DataFrame(columns=EGG_BREAK_COLUMNS)
+
+    merged['Eggs_Break'] = merged['Hatching Eggs'] - merged['Eggs Set']
+    merged['Break_Ratio'] = (merged['Eggs_Break'] / merged['Hatching Eggs']) * 100
+
+    merged = merged.sort_values('Date_set')
+    merged['Rolling_15M_Break_Ratio'] = merged['Break_Ratio'].rolling(window=15).mean()
+
+    # The set month is the main date
+    merged['Date'] = merged['Date_set']
+    merged['Month'] = merged['Month_set']
+
+    columns = EGG_BREAK_COLUMNS + [column for column in merged.columns if column not in EGG_BREAK_COLUMNS]
+    return merged[[column for column in columns if column in merged.columns]]
+
+
+#######################
+# Layer yield
+#######################
+
+def layer_yield(hatching_eggs, breeder_herd):
+    """
+    Monthly hatching eggs per 1000 breeder layers
+
+    Args:
+        hatching_eggs (pandas.DataFrame): US_BROILER_HATCHING_EGGS_MONTHLY
+        breeder_herd (pandas.DataFrame): US_BROILER_BREEDER_HERD_MONTHLY
+
+    Returns:
+        pandas.DataFrame: Both datasets merged on Date, sorted by it, with
+            Yield, its year-over-year change Yield_YoY (%) and its
+            12-month mean Yield_LTM
+    """
+    merged = pd.merge(hatching_eggs, breeder_herd, on='Date', how='inner', suffixes=('_eggs', '_herd'))
+    merged['Yield'] = merged['Hatching Eggs'] / merged['Layer_Herd'] * 1000
+
+    merged = merged.sort_values('Date')
+    merged['Yield_YoY'] = merged['Yield'].pct_change(12) * 100
+    merged['Yield_LTM'] = merged['Yield'].rolling(window=12).mean()
+    return merged
+
+
+#######################
+# Layer mortality
+#######################
+
+def layer_mortality(potential_placements, breeder_herd):
+    """
+    Monthly mortality of the breeder flock
+
+    The cumulative potential placements are what the flock would be with no
+    mortality, so the mortality rate is 1 - actual herd / potential flock.
+
+    Args:
+        potential_placements (pandas.DataFrame):
+            US_PULLET_CUMULATIVE_POTENTIAL_PLACEMENTS
+        breeder_herd (pandas.DataFrame): US_BROILER_BREEDER_HERD_MONTHLY
+
+    Returns:
+        pandas.DataFrame: Projected_Date, Cumulative_Potential_Placements,
+            Layer_Herd, Mortality_Rate (%) and its 12-month mean
+            Mortality_Rate_LTM
+    """
+    potential = potential_placements[['Projected_Date', 'Cumulative_Potential_Placements']]
+    result = pd.merge(potential, breeder_herd[['Date', 'Layer_Herd']], left_on='Projected_Date', right_on='Date',
+                      how='inner')
+    result['Mortality_Rate'] = (1 - result['Layer_Herd'] / result['Cumulative_Potential_Placements']) * 100
+
+    result = result.sort_values('Projected_Date')
+    result['Mortality_Rate_LTM'] = result['Mortality_Rate'].rolling(window=12).mean()
+    return result.drop(columns=['Date'])
+
+
+def flock_comparison(mortality):
+    """
+    Potential flock against the actual herd, for charting
+
+    Args:
+        mortality (pandas.DataFrame): Result of layer_mortality()
+
+    Returns:
+        pandas.DataFrame: The mortality frame with Projected_Date renamed to
+            Date, the difference between potential and actual flock (in
+            birds and percent) and 12-month means of both
+    """
+    comparison = mortality.rename(columns={'Projected_Date': 'Date'})
+
+    comparison['Potential_vs_Actual_Diff'] = (comparison['Cumulative_Potential_Placements']
+                                              - comparison['Layer_Herd'])
+    comparison['Potential_vs_Actual_Diff_Percent'] = (comparison['Potential_vs_Actual_Diff']
+                                                      / comparison['Cumulative_Potential_Placements'] * 100)
+
+    comparison['Layer_Herd_LTM'] = comparison['Layer_Herd'].rolling(window=12).mean()
+    comparison['Potential_Placements_LTM'] = comparison['Cumulative_Potential_Placements'].rolling(window=12).mean()
+    return comparison.sort_values('Date')
+
+
+#######################
+# YoY growth
+#######################
+
+def weekly_yoy_growth(weekly, value_column):
+    """
+    Year-over-year growth of a weekly series
+
+    Args:
+        weekly (pandas.DataFrame): US_BROILER_EGG_SET_WEEKLY or
+            US_CHICKEN_PLACEMENTS_WEEKLY
+        value_column (str): 'Eggs Set' or 'Placements'
+
+    Returns:
+        pandas.DataFrame: The weekly rows sorted by Date, with YoY_Growth
+            (% against 52 weeks earlier), its 12-week mean
+            YoY_Growth_12_Period_Avg, and the calendar Year and Month
+    """
+    df = weekly.sort_values('Date')
+    df['YoY_Growth'] = df[value_column].pct_change(52) * 100
+    df['YoY_Growth_12_Period_Avg'] = df['YoY_Growth'].rolling(window=12).mean()
+
+    df['Year'] = df['Date'].dt.year
+    df['Month'] = df['Date'].dt.month
+    return df
+
+
+def yoy_growth(data, value_column, periods=52):
+    """
+    Year-over-year growth of a series
+
+    Args:
+        data (pandas.DataFrame): Rows with a Date column
+        value_column (str): Column to compare
+        periods (int): Periods in a year, 52 for weekly and 12 for monthly
+            series
+
+    Returns:
+        pandas.DataFrame: The rows sorted by Date with YoY_Growth (%) and
+            its 12-period mean YoY_Growth_Rolling_Avg
+    """
+    df = data.sort_values('Date')
+    df['YoY_Growth'] = df[value_column].pct_change(periods=periods) * 100
+    df['YoY_Growth_Rolling_Avg'] = df['YoY_Growth'].rolling(window=12).mean()
+    return df
+
+
+#######################
+# Slaughter
+#######################
+
+def slaughter(monthly):
+    """
+    Monthly chicken slaughter with average weight, volume and their trends
+
+    Args:
+        monthly (pandas.DataFrame): US_CHICKEN_SLAUGHTER_MONTHLY
+
+    Returns:
+        pandas.DataFrame: Rows sorted by Date with Avg_Weight, Volume,
+            Year, Month_Num, Heads_YoY_Growth and Volume_YoY_Growth (% against
+            12 months earlier) and the 12-month mean weight Weight_LTM_Avg
+    """
+    df = monthly.copy()
+    df['Avg_Weight'] = df['Weight'] / df['Heads']
+    df['Volume'] = df['Heads'] * df['Avg_Weight']
+
+    df['Year'] = df['Date'].dt.year
+    df['Month_Num'] = df['Date'].dt.month
+
+    df = df.sort_values('Date')
+    df['Heads_YoY_Growth'] = df['Heads'].pct_change(12) * 100
+    df['Volume_YoY_Growth'] = df['Volume'].pct_change(12) * 100
+    df['Weight_LTM_Avg'] = df['Avg_Weight'].rolling(window=12).mean()
+    return df
+
+
+def seasonal_production(slaughter_frame):
+    """
+    Average slaughter volume by calendar month
+
+    Args:
+        slaughter_frame (pandas.DataFrame): Result of slaughter()
+
+    Returns:
+        pandas.DataFrame: Month_Num, Avg_Volume and Month_Name, January first
+    """
+    monthly = slaughter_frame.groupby('Month_Num')['Volume'].mean().reset_index()
+    monthly.columns = ['Month_Num', 'Avg_Volume']
+    monthly['Month_Name'] = monthly['Month_Num'].map(dict(enumerate(MONTH_ABBR, start=1)))
+    return monthly.sort_values('Month_Num')
+
+
+#######################
+# Breeder herd
+#######################
+
+def breeder_herd(herd):
+    """
+    Broiler breeder layer herd with its trend and growth
+
+    Args:
+        herd (pandas.DataFrame): US_BROILER_BREEDER_HERD_MONTHLY
+
+    Returns:
+        pandas.DataFrame: Rows sorted by Date with the 12-month mean
+            Layer_Herd_LTM and YoY_Growth_1y/2y/3y (% against 1, 2 and 3
+            years earlier)
+    """
+    df = herd.sort_values('Date')
+    df['Layer_Herd_LTM'] = df['Layer_Herd'].rolling(window=12).mean()
+    for year_lag in [1, 2, 3]:
+        df[f'YoY_Growth_{year_lag}y'] = df['Layer_Herd'].pct_change(12 * year_lag) * 100
+    return df
+
+
+def breeder_herd_yoy(herd_frame, recent_years=5):
+    """
+    Breeder herd growth by month and year, over the last years
+
+    Args:
+        herd_frame (pandas.DataFrame): Result of breeder_herd()
+        recent_years (int): Years before the latest one to keep
+
+    Returns:
+        pandas.DataFrame: One row per month, with (growth column, year)
+            columns
+    """
+    recent = herd_frame[herd_frame['Year'] >= herd_frame['Year'].max() - recent_years]
+    return recent.pivot_table(
+        index='Month',
+        columns='Year',
+        values=['YoY_Growth_1y', 'YoY_Growth_2y', 'YoY_Growth_3y']
+    ).reset_index()
@@ -0,0 +1,546 @@
+"""
+Artifact Cache
+
+Process-wide cache for the page loaders (load_data and friends), used in
+place of st.cache_data:
+
+- every entry remembers the version of each dataset it read, so it is
+  recomputed as soon as one of them changes, without a manual clear()
+- when memory runs short, entries of the least used pages are evicted
+  first (see core.usage), then the least recently used ones; loaders
+  declared for one tab (@cached(tab='Prices')) also count the clicks on
+  that tab, so the tabs people open outlive the others of their page
+- after a data refresh, stale entries are recomputed in the background,
+  most used pages first, so popular pages never see a cold load
+- concurrent requests for an entry that is being built wait for that
+  build instead of starting their own, so two sessions opening the same
+  cold page compute it once
+- results are also written to a disk tier (DiskCache), so after a restart
+  or deploy an entry whose datasets did not change is read back from disk
+  instead of being recomputed
+
+Callers get copies of the cached frames, as with st.cache_data, because
+pages add derived columns to what they load.
+
+Configuration:
+- DASHBOARD_ARTIFACT_CACHE_MB: memory for cached artifacts (default 512)
+- DASHBOARD_REFRESH_SECONDS: how often the refresh watcher looks for
+  changed datasets (default 300)
+- DASHBOARD_DISK_CACHE_DIR: directory of the disk tier (default
+  ~/.cache/industry-dashboard/artifacts)
+- DASHBOARD_DISK_CACHE_MB: size of the disk tier (default 2048, 0
+  disables it)
+"""
+
+import copy
+import functools
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+
+from core import metrics, usage
+from core.lineage import CORE_DIR, code_version
+from core.storage import DEFAULT_CACHE_DIR, DatasetNotFoundError, dataset_version, record_reads, recording_reads
+
+logger = logging.getLogger('dashboard.cache')
+
+CACHE_MB_ENV = 'DASHBOARD_ARTIFACT_CACHE_MB'
+DEFAULT_CACHE_MB = 512
+REFRESH_ENV = 'DASHBOARD_REFRESH_SECONDS'
+DEFAULT_REFRESH_SECONDS = 300
+SCORE_TTL_SECONDS = 60
+# Dataset versions are re-checked at most this often per entry, since a
+# check is a stat() locally but a request on remote backends
+VERSION_TTL_SECONDS = 10
+DISK_DIR_ENV = 'DASHBOARD_DISK_CACHE_DIR'
+DISK_MB_ENV = 'DASHBOARD_DISK_CACHE_MB'
+DEFAULT_DISK_MB = 2048
+DEFAULT_DISK_DIR = DEFAULT_CACHE_DIR / 'artifacts'
+
+
+def _nbytes(value):
+    """Approximate memory held by a cached value."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(pd.Series(value.memory_usage(index=True, deep=True)).sum())
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(item) for item in value)
+    if isinstance(value, dict):
+        return sum(_nbytes(item) for item in value.values())
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    """Copy of a cached value that callers may modify freely."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, tuple):
+        return tuple(_copy(item) for item in value)
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return value
+    return copy.deepcopy(value)
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_code_version(path, stamp):
+    return code_version(path)
+
+
+def _code_version(func):
+    """Hash of the file defining func and of the core modules it imports."""
+    try:
+        path = Path(inspect.getsourcefile(func))
+        # Re-hashed only when the file or a core module was saved since
+        stamp = tuple(p.stat().st_mtime_ns for p in [path, *sorted(CORE_DIR.glob('*.py'))])
+    except (OSError, TypeError):
+        return ''
+    return _cached_code_version(path, stamp)
+
+
+def _function_key(func, page):
+    """
+    Stable key of a loader
+
+    Changes when the loader's source changes, and when the code it calls
+    does: the script defining it or any core module that script imports
+    (see core.lineage.code_version), so disk results of an older deploy
+    are not reused.
+    """
+    try:
+        source = inspect.getsource(func).encode('utf-8')
+    except (OSError, TypeError):
+        source = func.__code__.co_code
+    return f"{page}:{func.__qualname__}:{hashlib.md5(source).hexdigest()}:{_code_version(func)}"
+
+
+def _arguments_key(args, kwargs):
+    try:
+        payload = pickle.dumps((args, sorted(kwargs.items())))
+    except Exception:
+        payload = repr((args, sorted(kwargs.items()))).encode('utf-8')
+    return hashlib.md5(payload).hexdigest()
+
+
+def versions_current(versions):
+    """Whether every dataset in a {name: version} mapping is unchanged."""
+    for name, version in versions.items():
+        try:
+            current = dataset_version(name)
+        except DatasetNotFoundError:
+            # Version None records a dataset that was missing
+            current = None
+        if current != version:
+            return False
+    return True
+
+
+class DiskCache:
+    """
+    Loader results pickled to a local directory, least recently used first out
+
+    Each result is one file in a directory per page, named after its
+    function and arguments key, holding the dataset versions it was built from, so a result is only
+    used while those datasets are unchanged. Files are written to a
+    temporary name and renamed into place, so processes sharing the
+    directory never read a partial file; a hit touches the file, and
+    eviction removes the files used least recently once the directory
+    outgrows max_bytes.
+
+    Args:
+        directory (str or Path): Cache directory, created when missing
+        max_bytes (int): Size limit of the directory
+    """
+
+    suffix = '.pkl'
+
+    def __init__(self, directory, max_bytes):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def __repr__(self):
+        return f"DiskCache({str(self.directory)!r})"
+
+    def path(self, key):
+        """File holding the result of a (function key, arguments key) pair."""
+        page = key[0].split(':', 1)[0]
+        return self.directory / page / f"{hashlib.md5(repr(key).encode('utf-8')).hexdigest()}{self.suffix}"
+
+    def get(self, key):
+        """
+        Stored result of key if its datasets are unchanged
+
+        Args:
+            key (tuple): Function key and arguments key
+
+        Returns:
+            tuple: (value, versions), or None when missing or stale
+        """
+        path = self.path(key)
+        start = time.perf_counter()
+        try:
+            with open(path, 'rb') as f:
+                stored_key, versions, value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            # Truncated by a crash or written by incompatible library versions
+            logger.warning("Dropping unreadable cache file %s: %r", path, error)
+            path.unlink(missing_ok=True)
+            return None
+        if stored_key != key or not versions_current(versions):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        # The datasets are reported as inputs, since none is read on a hit (see core.snapshot)
+        metrics.record('artifact_disk_load', key[0], time.perf_counter() - start,
+                       nbytes=path.stat().st_size, datasets=sorted(versions))
+        return value, versions
+
+    def put(self, key, value, versions):
+        """Store a result and the dataset versions it was built from."""
+        try:
+            payload = pickle.dumps((key, versions, value), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as error:
+            logger.debug("Not caching %s on disk: %r", key[0], error)
+            return
+        if len(payload) > self.max_bytes:
+            return
+        target = self.path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        temporary = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        temporary.write_bytes(payload)
+        os.replace(temporary, target)
+        self._evict()
+
+    def _evict(self):
+        """Remove the least recently used files until the directory fits."""
+        files = []
+        for path in self.directory.glob(f"*/*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        size = sum(nbytes for _, nbytes, _ in files)
+        for _, nbytes, path in sorted(files, key=lambda item: item[0]):
+            if size <= self.max_bytes:
+                break
+            # Another process may have removed it already
+            path.unlink(missing_ok=True)
+            size -= nbytes
+
+    def clear(self, page=None):
+        """Remove every stored result, or those of one page."""
+        for path in self.directory.glob(f"{page or '*'}/*{self.suffix}"):
+            path.unlink(missing_ok=True)
+
+
+@dataclass
+class Entry:
+    """One cached loader result and how to recompute it."""
+
+    page: str
+    label: str
+    func: object
+    args: tuple
+    kwargs: dict
+    tab: str = None
+    value: object = None
+    nbytes: int = 0
+    versions: dict = field(default_factory=dict)
+    last_used: float = 0.0
+    checked: float = 0.0
+    hits: int = 0
+
+
+class ArtifactCache:
+    """
+    Usage-weighted, dataset-version-aware memory cache
+
+    Args:
+        max_bytes (int): Memory for cached artifacts
+        disk (DiskCache, optional): Disk tier behind the memory
+    """
+
+    def __init__(self, max_bytes, disk=None):
+        self.max_bytes = max_bytes
+        self.disk = disk
+        self.size = 0
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.RLock()
+        self._scores = {}
+        self._tab_scores = {}
+        self._scores_time = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def page_scores(self):
+        """Usage score per page, refreshed at most once a minute."""
+        if time.monotonic() - self._scores_time > SCORE_TTL_SECONDS:
+            try:
+                self._scores, self._tab_scores = usage.page_scores(), usage.tab_scores()
+            except Exception as error:
+                logger.warning("Could not read usage scores: %r", error)
+            self._scores_time = time.monotonic()
+        return self._scores
+
+    def score(self, entry):
+        """Usage score of an entry: its page's, plus its tab's when it serves one tab."""
+        score = self.page_scores().get(entry.page, 0.0)
+        if entry.tab is not None:
+            score += self._tab_scores.get((entry.page, entry.tab), 0.0)
+        return score
+
+    @staticmethod
+    def is_current(entry):
+        """Whether every dataset an entry was built from is unchanged."""
+        return versions_current(entry.versions)
+
+    def _compute(self, key, entry):
+        start = time.perf_counter()
+        with recording_reads() as reads:
+            value = entry.func(*entry.args, **entry.kwargs)
+        metrics.record('artifact_build', entry.label, time.perf_counter() - start, page=entry.page)
+        if self.disk is not None:
+            self.disk.put(key, value, dict(reads))
+        return self._store(key, entry, value, dict(reads))
+
+    def _load(self, key, entry):
+        """Entry filled from the disk tier, None when it has no current result."""
+        stored = self.disk.get(key) if self.disk is not None else None
+        return None if stored is None else self._store(key, entry, *stored)
+
+    def _store(self, key, entry, value, versions):
+        entry.value, entry.versions = value, versions
+        entry.nbytes = _nbytes(value)
+        entry.checked = entry.last_used = time.monotonic()
+        # Refresh usage scores before taking the lock that eviction ranks under
+        self.page_scores()
+        with self._lock:
+            previous = self._entries.get(key)
+            self.size += entry.nbytes - (previous.nbytes if previous is not None else 0)
+            self._entries[key] = entry
+            self._evict()
+        return entry
+
+    def get_or_compute(self, func, page, args=(), kwargs=None, function_key=None, tab=None):
+        """
+        Cached result of func(*args, **kwargs), computed if missing or stale
+
+        Args:
+            func (callable): Loader
+            page (str): Page the loader belongs to
+            args (tuple): Positional arguments
+            kwargs (dict, optional): Keyword arguments
+            function_key (str, optional): Precomputed key of func
+            tab (str, optional): Tab the loader serves, when only one
+
+        Returns:
+            object: A copy of the result
+        """
+        kwargs = kwargs or {}
+        key = (function_key or _function_key(func, page), _arguments_key(args, kwargs))
+        with self._lock:
+            entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked > VERSION_TTL_SECONDS:
+            if self.is_current(entry):
+                entry.checked = now
+            else:
+                entry = None
+        if entry is None:
+            entry = self._build(key, func, page, args, kwargs, tab)
+        entry.hits += 1
+        entry.last_used = now
+        # A loader cached inside another one passes its datasets on to the outer entry
+        record_reads(entry.versions)
+        return _copy(entry.value)
+
+    def _build(self, key, func, page, args, kwargs, tab=None):
+        """Load or compute a missing entry once, however many requests wait for it."""
+        with self._lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = self._inflight[key] = Future()
+        if not owner:
+            start = time.perf_counter()
+            try:
+                return pending.result()
+            finally:
+                metrics.record('artifact_wait', func.__qualname__, time.perf_counter() - start, page=page)
+
+        label = f"{func.__qualname__}{args if args else '()'}"
+        try:
+            entry = (self._load(key, Entry(page, label, func, args, kwargs, tab))
+                     or self._compute(key, Entry(page, label, func, args, kwargs, tab)))
+        except BaseException as error:
+            pending.set_exception(error)
+            raise
+        else:
+            pending.set_result(entry)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return entry
+
+    def _evict(self):
+        """Drop the least valuable entries until the cache fits."""
+        if self.size <= self.max_bytes:
+            return
+        ranked = sorted(self._entries.items(), key=lambda item: (self.score(item[1]), item[1].last_used))
+        for key, entry in ranked:
+            if self.size <= self.max_bytes:
+                break
+            del self._entries[key]
+            self.size -= entry.nbytes
+            metrics.record('artifact_evict', entry.label, 0.0, page=entry.page, nbytes=entry.nbytes)
+
+    def prewarm(self, min_score=0.0):
+        """
+        Recompute entries whose datasets changed, most used pages first
+
+        Entries of pages scoring min_score or less are dropped instead and
+        rebuilt on their next request. Without usage data every stale
+        entry is recomputed.
+
+        Args:
+            min_score (float): Usage score a page needs to be recomputed
+
+        Returns:
+            list: Labels of the recomputed entries
+        """
+        scores = self.page_scores()
+        # Version checks stat dataset files, so they run outside the lock
+        with self._lock:
+            entries = list(self._entries.items())
+        stale = [(key, entry) for key, entry in entries if not self.is_current(entry)]
+        stale.sort(key=lambda item: -self.score(item[1]))
+
+        rebuilt = []
+        for key, entry in stale:
+            if scores and self.score(entry) <= min_score:
+                with self._lock:
+                    # Unless a request rebuilt it meanwhile
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+                        self.size -= entry.nbytes
+                continue
+            try:
+                self._compute(key, Entry(entry.page, entry.label, entry.func, entry.args, entry.kwargs, entry.tab,
+                                         last_used=entry.last_used, hits=entry.hits))
+                rebuilt.append(entry.label)
+            except Exception as error:
+                logger.warning("Prewarming %s failed: %r", entry.label, error)
+        return rebuilt
+
+    def clear(self, page=None):
+        """Drop all entries, or those of one page, from memory and disk."""
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if page is None or entry.page == page]:
+                self.size -= self._entries.pop(key).nbytes
+        if self.disk is not None:
+            self.disk.clear(page)
+
+    def info(self):
+        """Entries as a list of dicts, most used page first."""
+        with self._lock:
+            entries = list(self._entries.values())
+        return sorted(({'page': entry.page, 'tab': entry.tab, 'label': entry.label, 'nbytes': entry.nbytes,
+                        'hits': entry.hits, 'score': self.score(entry)} for entry in entries),
+                      key=lambda item: -item['score'])
+
+
+def _disk_cache_from_env():
+    megabytes = float(os.environ.get(DISK_MB_ENV, DEFAULT_DISK_MB))
+    directory = os.environ.get(DISK_DIR_ENV) or DEFAULT_DISK_DIR
+    return DiskCache(directory, int(megabytes * 1024 * 1024)) if megabytes > 0 else None
+
+
+_cache = ArtifactCache(int(float(os.environ.get(CACHE_MB_ENV, DEFAULT_CACHE_MB)) * 1024 * 1024),
+                       _disk_cache_from_env())
+_watcher = None
+
+
+def get_cache():
+    """The process-wide artifact cache."""
+    return _cache
+
+
+def cached(func=None, *, page=None, tab=None):
+    """
+    Cache a page loader in the process-wide artifact cache
+
+    Use as @cached instead of @st.cache_data, or as @cached(tab='Prices')
+    for a loader only one tab of its page uses.
+
+    Args:
+        func (callable): Loader to cache
+        page (str, optional): Page name used for usage weighting, defaults
+            to the name of the script defining func
+        tab (str, optional): Label of the tab the loader serves, whose
+            clicks then add to its usage weight
+
+    Returns:
+        callable: The cached loader, with a clear() method
+    """
+    def decorate(func):
+        page_key = page or usage.page_name(func.__code__.co_filename)
+        function_key = _function_key(func, page_key)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return _cache.get_or_compute(func, page_key, args, kwargs, function_key, tab)
+
+        wrapper.clear = lambda: _cache.clear(page_key)
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
+
+
+def start_refresh_watcher(interval=None):
+    """
+    Recompute stale entries in a daemon thread every interval seconds
+
+    Args:
+        interval (float, optional): Seconds between checks, defaults to
+            DASHBOARD_REFRESH_SECONDS
+
+    Returns:
+        threading.Thread: The watcher thread, started once per process
+    """
+    global _watcher
+    interval = float(interval or os.environ.get(REFRESH_ENV, DEFAULT_REFRESH_SECONDS))
+
+    def watch():
+        while True:
+            time.sleep(interval)
+            try:
+                rebuilt = _cache.prewarm()
+                if rebuilt:
+                    logger.info("Prewarmed %d artifacts after a data refresh", len(rebuilt))
+            except Exception:
+                logger.exception("Artifact prewarming failed")
+
+    with _cache._lock:
+        if _watcher is None:
+            _watcher = threading.Thread(target=watch, name='dashboard-refresh', daemon=True)
+            _watcher.start()
+    return _watcher
@@ -0,0 +1,161 @@
+"""
+Chart Controls
+
+Per-chart controls (date window, smoothing, units) for charts rendered
+inside Streamlit fragments. A widget inside a fragment reruns only that
+fragment, so changing one chart's window redraws that chart from the
+page's cached data instead of re-executing every tab of the page:
+
+    @fragment
+    def cattle_price_chart(cattle_df):
+        controls = chart_controls('br_cattle_price', window='3Y', units=CATTLE_UNITS)
+        data = since(cattle_df, 'DATE', controls.years)
+        ...
+
+    cattle_price_chart(cattle_df)
+
+Fragments need Streamlit 1.37 (st.fragment) or 1.33 to 1.36
+(st.experimental_fragment). With older versions fragment() returns the
+function unchanged and the controls still work, through full reruns.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import pandas as pd
+
+# Years of each window option, None for the whole history
+WINDOWS = {'1Y': 1, '3Y': 3, '5Y': 5, '10Y': 10, 'All': None}
+
+# Rolling average options, in periods of the series
+DAILY_SMOOTHING = {'Daily': 1, '1W': 5, '1M': 21}
+MONTHLY_SMOOTHING = {'Monthly': 1, '3M': 3, '12M': 12}
+
+
+@dataclass(frozen=True)
+class Controls:
+    """
+    Values selected in a chart's controls
+
+    Attributes:
+        years (int): Years of history to show, None for all of it
+        periods (int): Periods of the rolling average, 1 for none
+        unit (str): Selected unit label, empty without a units control
+        factor (float): Multiplier converting the stored values to the unit
+    """
+    years: int = None
+    periods: int = 1
+    unit: str = ''
+    factor: float = 1.0
+
+
+def fragment(func=None, *, run_every=None):
+    """
+    Run a chart function as a Streamlit fragment when available
+
+    Used as @fragment, or as @fragment(run_every=5) for a fragment that
+    reruns on its own every 5 seconds (e.g. a live chart).
+
+    Args:
+        func (callable): Function drawing one chart and its controls
+        run_every (float, optional): Seconds between automatic reruns;
+            without fragments the function is only drawn with the page
+
+    Returns:
+        callable: The fragment, or func itself on Streamlit versions
+            without fragments
+    """
+    if func is None:
+        return lambda func: fragment(func, run_every=run_every)
+
+    import streamlit as st
+
+    decorator = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+    if decorator is None:
+        return func
+    return decorator(func, run_every=run_every) if run_every else decorator(func)
+
+
+def chart_controls(key, window=None, windows=('1Y', '3Y', '5Y', '10Y', 'All'), smoothing=None, units=None):
+    """
+    Draw a row of controls above a chart
+
+    Args:
+        key (str): Unique prefix of the widget keys on the page
+        window (str, optional): Default window (a WINDOWS label); no window
+            control when None
+        windows (tuple): Window options offered
+        smoothing (dict, optional): Rolling average options, labels to
+            periods (e.g. MONTHLY_SMOOTHING), the first one being the default
+        units (dict, optional): Unit options, labels to multipliers of the
+            stored values, the first one being the default
+
+    Returns:
+        Controls: The selected values
+    """
+    import streamlit as st
+
+    selected = {}
+    widgets = [name for name, options in (('window', window), ('smoothing', smoothing), ('units', units))
+               if options]
+    for name, column in zip(widgets, st.columns(len(widgets)) if widgets else []):
+        with column:
+            if name == 'window':
+                label = st.radio("Window", windows, index=windows.index(window), horizontal=True,
+                                 key=f"{key}_window", label_visibility='collapsed')
+                selected['years'] = WINDOWS[label]
+            elif name == 'smoothing':
+                label = st.radio("Average", list(smoothing), horizontal=True,
+                                 key=f"{key}_smoothing", label_visibility='collapsed')
+                selected['periods'] = smoothing[label]
+            else:
+                label = st.radio("Unit", list(units), horizontal=True,
+                                 key=f"{key}_units", label_visibility='collapsed')
+                selected['unit'], selected['factor'] = label, units[label]
+    return Controls(**selected)
+
+
+def since(df, column, years):
+    """
+    Rows dated within the last years, by a date column
+
+    Args:
+        df (pandas.DataFrame): Data
+        column (str): Date column
+        years (int): Years to keep, None for all rows
+
+    Returns:
+        pandas.DataFrame: The selected rows
+    """
+    if years is None:
+        return df
+    return df[df[column] >= datetime.now() - pd.DateOffset(years=years)]
+
+
+def recent_years(df, years, column='Year'):
+    """
+    Rows of the current calendar year and the years - 1 before it
+
+    Args:
+        df (pandas.DataFrame): Data
+        years (int): Calendar years to keep, None for all rows
+        column (str): Year column
+
+    Returns:
+        pandas.DataFrame: The selected rows
+    """
+    if years is None:
+        return df
+    return df[df[column] > datetime.now().year - years]
+
+
+def window_title(years):
+    """Chart title suffix of a window, e.g. 'Last 3 Years'."""
+    if years is None:
+        return 'Full History'
+    return 'Last 12 Months' if years == 1 else f'Last {years} Years'
+
+
+def smooth(values, periods):
+    """Rolling average of values over periods, values themselves for 1."""
+    return values if periods <= 1 else values.rolling(window=periods).mean()
@@ -0,0 +1,154 @@
+"""
+Background Jobs
+
+Runs heavy computations (merges, rolling statistics over many series,
+correlation matrices) on a worker pool shared by every session, instead of
+in the Streamlit script thread:
+
+- submit() hands a computation to the pool and returns a Future right
+  away, so a page can start several of them and keep rendering
+- identical requests (same function, same arguments) that are already in
+  flight share one Future, so two sessions opening the same cold chart
+  compute it once
+- result() shows a placeholder where the output will go until the Future
+  is done
+
+A page starts its jobs before rendering and collects them where they are
+displayed:
+
+    us_job = jobs.submit(load_us_data)
+    ...
+    with tab2:
+        hatchability_df, ... = jobs.result(us_job, "Computing the U.S. analyses...")
+
+Jobs run in threads by default, which suits pandas and NumPy work that
+releases the GIL and @cached loaders, whose results stay in this
+process's cache. With process=True they run in a process pool instead;
+the function must then be importable (e.g. from core.analytics) and its
+arguments and result picklable.
+
+Configuration:
+- DASHBOARD_JOB_WORKERS: size of each pool (default 4)
+"""
+
+import contextvars
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from core import metrics, usage
+from core.cache import _arguments_key, _function_key
+
+WORKERS_ENV = 'DASHBOARD_JOB_WORKERS'
+DEFAULT_WORKERS = 4
+
+_pools = {}
+_inflight = {}
+_lock = threading.RLock()
+
+
+def _pool(process):
+    """The shared thread or process pool, created on first use."""
+    with _lock:
+        if process not in _pools:
+            workers = int(os.environ.get(WORKERS_ENV, DEFAULT_WORKERS))
+            executor = ProcessPoolExecutor if process else ThreadPoolExecutor
+            options = {} if process else {'thread_name_prefix': 'dashboard-job'}
+            _pools[process] = executor(max_workers=workers, **options)
+        return _pools[process]
+
+
+def job_key(func, args=(), kwargs=None):
+    """
+    Key identifying a computation across sessions and script reruns
+
+    Streamlit re-executes page scripts, so the same loader is a new function
+    object on every run; the key is built from its page, name and source.
+
+    Args:
+        func (callable): Function, possibly decorated with @cached
+        args (tuple): Positional arguments
+        kwargs (dict, optional): Keyword arguments
+
+    Returns:
+        tuple: Function key and arguments key
+    """
+    original = inspect.unwrap(func)
+    page = usage.page_name(original.__code__.co_filename)
+    return _function_key(original, page), _arguments_key(args, kwargs or {})
+
+
+def _timed(func, label, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        metrics.record('job', label, time.perf_counter() - start)
+
+
+def submit(func, *args, process=False, **kwargs):
+    """
+    Run func(*args, **kwargs) on the shared worker pool
+
+    Thread jobs run in a copy of the caller's context, so the datasets they
+    read are recorded like reads made by the page itself.
+
+    Args:
+        func (callable): Computation to run
+        *args: Positional arguments
+        process (bool): Run in the process pool instead of a thread
+        **kwargs: Keyword arguments
+
+    Returns:
+        concurrent.futures.Future: The result, shared with identical
+            requests already in flight
+    """
+    key = (job_key(func, args, kwargs), process)
+    with _lock:
+        future = _inflight.get(key)
+        if future is not None:
+            metrics.record('job_shared', func.__qualname__, 0.0)
+            return future
+        if process:
+            future = _pool(True).submit(func, *args, **kwargs)
+        else:
+            future = _pool(False).submit(contextvars.copy_context().run, _timed, func, func.__qualname__,
+                                         *args, **kwargs)
+        _inflight[key] = future
+    future.add_done_callback(lambda done: _forget(key, done))
+    return future
+
+
+def _forget(key, future):
+    with _lock:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+
+
+def result(future, message="Loading..."):
+    """
+    Result of a job, with a placeholder shown until it is ready
+
+    Must be called from the Streamlit script, where the output of the job
+    will be displayed. The placeholder is a spinner, removed once the job
+    is done.
+
+    Args:
+        future (concurrent.futures.Future): Job from submit()
+        message (str): Text of the placeholder
+
+    Returns:
+        object: The job's result
+
+    Raises:
+        Exception: Whatever the job raised
+    """
+    if future.done():
+        return future.result()
+
+    import streamlit as st
+
+    with st.spinner(message):
+        return future.result()
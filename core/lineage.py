@@ -0,0 +1,250 @@
+"""
+Analysis Lineage
+
+Make-style memoization of the analysis stages in analysis/. Each stage is
+a script with declared outputs in processed_data/. When a stage runs, the
+datasets it reads are recorded (core.storage.recording_reads) and a
+manifest, processed_data/lineage.json, keeps its key:
+
+- a hash of the script and of the core modules it imports
+- its parameters (command-line arguments)
+- a content hash of every dataset it read
+- the size and modification time of each output it wrote
+
+A stage whose key is unchanged and whose outputs are untouched is skipped
+without running. Dataset contents are only hashed again when a dataset's
+version changed, so checking a fresh stage costs a few stat calls.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import runpy
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from core import metrics
+from core.storage import (REPO_ROOT, DatasetNotFoundError, dataset_content_hash, dataset_version,
+                          recording_reads)
+
+MANIFEST = 'lineage.json'
+CORE_DIR = REPO_ROOT / 'core'
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One analysis step
+
+    Attributes:
+        name (str): Stage name used in the manifest and on the command line
+        script (str): Script path, relative to the repository root
+        outputs (tuple): Files the stage writes, relative to the output
+            directory
+        args (tuple): Command-line arguments passed to the script
+    """
+    name: str
+    script: str
+    outputs: tuple
+    args: tuple = ()
+
+
+def _core_imports(path):
+    """Names of the core modules a source file imports."""
+    tree = ast.parse(Path(path).read_text(encoding='utf-8'))
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ImportFrom) and node.module:
+            if node.module == 'core':
+                modules.update(alias.name for alias in node.names)
+            elif node.module.startswith('core.'):
+                modules.add(node.module.split('.')[1])
+        elif isinstance(node, ast.Import):
+            modules.update(alias.name.split('.')[1] for alias in node.names
+                           if alias.name.startswith('core.'))
+    return modules
+
+
+def code_version(script):
+    """
+    Hash of a script and every core module it depends on
+
+    Args:
+        script (str or Path): Script path
+
+    Returns:
+        str: Hex digest; edits to unrelated core modules leave it unchanged
+    """
+    digest = hashlib.md5(Path(script).read_bytes())
+    seen, pending = set(), sorted(_core_imports(script))
+    while pending:
+        module = pending.pop()
+        path = CORE_DIR / f"{module}.py"
+        if module in seen or not path.exists():
+            continue
+        seen.add(module)
+        pending.extend(_core_imports(path))
+    for module in sorted(seen):
+        digest.update((CORE_DIR / f"{module}.py").read_bytes())
+    return digest.hexdigest()
+
+
+def _output_state(output_dir, outputs):
+    """Size and modification time of each output, None when missing."""
+    state = {}
+    for name in outputs:
+        path = Path(output_dir) / name
+        if path.exists():
+            stat = path.stat()
+            state[name] = f"{stat.st_mtime_ns}-{stat.st_size}"
+        else:
+            state[name] = None
+    return state
+
+
+def _inputs_unchanged(inputs):
+    """
+    Whether recorded inputs still have the same contents
+
+    Updates the recorded versions in place when a dataset changed version
+    but not contents.
+    """
+    for name, record in inputs.items():
+        try:
+            version = dataset_version(name)
+        except DatasetNotFoundError:
+            if record is not None:
+                return False
+            continue
+        if record is None:
+            return False
+        if version != record['version']:
+            if dataset_content_hash(name) != record['hash']:
+                return False
+            record['version'] = version
+    return True
+
+
+def is_fresh(stage, record, output_dir, code=None):
+    """
+    Whether a stage can be skipped
+
+    Args:
+        stage (Stage): Stage to check
+        record (dict): Its manifest entry, or None
+        output_dir (str or Path): Directory the outputs are written to
+        code (str, optional): code_version() of the script, if known
+
+    Returns:
+        bool: True when code, parameters, inputs and outputs are unchanged
+    """
+    if not record or record.get('error'):
+        return False
+    if record.get('code') != (code or code_version(REPO_ROOT / stage.script)):
+        return False
+    if record.get('args') != list(stage.args):
+        return False
+    if record.get('outputs') != _output_state(output_dir, stage.outputs) or None in record['outputs'].values():
+        return False
+    return _inputs_unchanged(record.get('inputs', {}))
+
+
+def run_stage(stage):
+    """
+    Run a stage's script in this process, recording the datasets it reads
+
+    The script runs as __main__ with stage.args as its arguments, from the
+    current directory.
+
+    Args:
+        stage (Stage): Stage to run
+
+    Returns:
+        dict: Versions of the datasets read, keyed by name
+    """
+    argv = sys.argv
+    sys.argv = [str(REPO_ROOT / stage.script), *stage.args]
+    try:
+        with recording_reads() as reads:
+            try:
+                runpy.run_path(str(REPO_ROOT / stage.script), run_name='__main__')
+            except SystemExit as exit:
+                if exit.code not in (None, 0):
+                    raise RuntimeError(f"{stage.script} exited with status {exit.code}") from exit
+    finally:
+        sys.argv = argv
+    return dict(reads)
+
+
+def run_stages(stages, output_dir='processed_data', force=False, only=None):
+    """
+    Run every stage whose code, parameters or inputs changed
+
+    Stages run in the given order, so a stage reading datasets written by an
+    earlier one sees the new versions.
+
+    Args:
+        stages (iterable): Stage entries, in dependency order
+        output_dir (str or Path): Directory the stages write to, where the
+            manifest is kept
+        force (bool): Run every stage regardless of the manifest
+        only (list, optional): Stage names to consider, defaults to all
+
+    Returns:
+        dict: Stage names under 'ran', 'skipped' and 'failed'
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    result = {'ran': [], 'skipped': [], 'failed': []}
+    for stage in stages:
+        if only and stage.name not in only:
+            continue
+        code = code_version(REPO_ROOT / stage.script)
+        if not force and is_fresh(stage, manifest.get(stage.name), output_dir, code):
+            result['skipped'].append(stage.name)
+            continue
+
+        start = time.perf_counter()
+        error = None
+        try:
+            reads = run_stage(stage)
+        except Exception as e:
+            reads, error = {}, repr(e)
+        seconds = time.perf_counter() - start
+        metrics.record('analysis_stage', stage.name, seconds, skipped=False, failed=error is not None)
+
+        inputs = {}
+        for name, version in reads.items():
+            try:
+                inputs[name] = None if version is None else {'version': version, 'hash': dataset_content_hash(name)}
+            except DatasetNotFoundError:
+                inputs[name] = None
+        manifest[stage.name] = {
+            'script': stage.script,
+            'code': code,
+            'args': list(stage.args),
+            'inputs': inputs,
+            'outputs': _output_state(output_dir, stage.outputs),
+            'error': error,
+            'seconds': round(seconds, 3),
+            'ran': time.time()
+        }
+        result['failed' if error else 'ran'].append(stage.name)
+        # Saved after every stage, so an interrupted run keeps its progress
+        _save(manifest_path, manifest)
+
+    # Skipped stages may have had input versions refreshed
+    _save(manifest_path, manifest)
+    return result
+
+
+def _save(manifest_path, manifest):
+    temporary = manifest_path.with_name(f".{MANIFEST}.tmp")
+    temporary.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(temporary, manifest_path)
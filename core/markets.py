@@ -0,0 +1,357 @@
+"""
+Market Analytics
+
+Cross-ticker statistics for the Markets page, computed on whole matrices
+instead of ticker by ticker:
+
+- price_matrix() aligns any number of daily price series into one
+  date x ticker float64 matrix on the B3 trading calendar
+- market_stats() derives rolling returns, realized volatility, drawdowns
+  and rolling betas to commodity factors from that matrix in one pass of
+  NumPy operations, whatever the number of tickers
+- positioning_matrix() and positioning_stats() do the same for the CFTC
+  net long positions of funds: one report week x contract matrix, then
+  rolling percentile ranks, z-scores and weekly changes for all contracts
+
+Like core.analytics, these are plain functions: frames in, frames out.
+Pages call them through core.cache.cached, so results are rebuilt only
+when one of the price datasets changes:
+
+    @cached
+    def load_market_stats(codes):
+        prices = markets.price_matrix(load_price_series(codes))
+        factors = markets.price_matrix(load_price_series(FACTORS), prices.index)
+        return markets.market_stats(prices, factors)
+"""
+
+import numpy as np
+import pandas as pd
+
+from core.agcalendar import b3_trading_days
+
+TRADING_DAYS = 252
+
+# Trailing window of the positioning statistics, in weekly reports (3 years)
+POSITIONING_WINDOW = 156
+
+# Rolling windows, in trading days
+RETURN_WINDOW = 63
+VOLATILITY_WINDOW = 63
+BETA_WINDOW = 252
+
+
+def price_matrix(series, calendar=None):
+    """
+    Align price series on one trading calendar
+
+    Each series is reindexed onto the calendar and carried forward over
+    days it has no price for (e.g. a U.S. holiday for a U.S. contract),
+    but not before its first or after its last observation.
+
+    Args:
+        series (dict): Price Series indexed by date, keyed by ticker
+        calendar (pandas.DatetimeIndex, optional): Dates of the matrix;
+            B3 trading days over the span of the series by default
+
+    Returns:
+        pandas.DataFrame: date x ticker float64 prices, NaN where a ticker
+            has no price yet or any more
+    """
+    frame = pd.concat({name: values[~values.index.duplicated(keep='last')]
+                       for name, values in series.items()}, axis=1).sort_index()
+    frame = frame.astype(np.float64)
+    if calendar is None:
+        calendar = b3_trading_days(frame.index.min(), frame.index.max())
+    # Prices of non-trading days roll into the next trading day
+    aligned = frame.reindex(frame.index.union(calendar)).ffill().reindex(calendar)
+    values = aligned.to_numpy()
+    first, last = frame.apply(pd.Series.first_valid_index), frame.apply(pd.Series.last_valid_index)
+    dates = calendar.to_numpy()[:, None]
+    values[(dates < first.to_numpy(dtype='datetime64[ns]')) | (dates > last.to_numpy(dtype='datetime64[ns]'))] = np.nan
+    return pd.DataFrame(values, index=calendar, columns=frame.columns)
+
+
+def _returns(prices):
+    """Daily simple returns, NaN where either price is missing or not positive."""
+    previous = prices[:-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(previous > 0, prices[1:] / previous - 1, np.nan)
+    return np.vstack([np.full((1, prices.shape[1]), np.nan), returns])
+
+
+def _rolling_sum(values, window):
+    """Trailing sums over window rows, through cumulative sums, NaN counted as 0."""
+    totals = np.cumsum(np.nan_to_num(values), axis=0)
+    totals[window:] = totals[window:] - totals[:-window]
+    return totals
+
+
+def rolling_volatility(returns, window=VOLATILITY_WINDOW, min_periods=None):
+    """
+    Annualized standard deviation of returns over trailing windows
+
+    Args:
+        returns (numpy.ndarray): date x ticker daily returns
+        window (int): Trading days per window
+        min_periods (int, optional): Returns needed in a window, window by
+            default
+
+    Returns:
+        numpy.ndarray: Volatility, NaN for windows with too few returns
+    """
+    valid = ~np.isnan(returns)
+    count = _rolling_sum(valid.astype(np.float64), window)
+    total = _rolling_sum(returns, window)
+    squares = _rolling_sum(returns * returns, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = (squares - total * total / count) / (count - 1)
+    variance[count < (min_periods or window)] = np.nan
+    return np.sqrt(np.clip(variance, 0, None) * TRADING_DAYS)
+
+
+def rolling_beta(returns, factor_returns, window=BETA_WINDOW, min_periods=None):
+    """
+    Betas of every ticker to every factor over trailing windows
+
+    Computed from rolling sums of the products of the two return matrices,
+    on the days both have a return.
+
+    Args:
+        returns (numpy.ndarray): date x ticker daily returns
+        factor_returns (numpy.ndarray): date x factor daily returns
+        window (int): Trading days per window
+        min_periods (int, optional): Common returns needed in a window,
+            window // 2 by default
+
+    Returns:
+        numpy.ndarray: date x ticker x factor betas
+    """
+    x = returns[:, :, None]
+    y = factor_returns[:, None, :]
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+    count = _rolling_sum(valid.astype(np.float64), window)
+    sum_x, sum_y = _rolling_sum(x, window), _rolling_sum(y, window)
+    sum_xy, sum_yy = _rolling_sum(x * y, window), _rolling_sum(y * y, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = sum_xy - sum_x * sum_y / count
+        variance = sum_yy - sum_y * sum_y / count
+        beta = covariance / variance
+    beta[(count < (min_periods or window // 2)) | ~(variance > 0)] = np.nan
+    return beta
+
+
+def drawdowns(prices):
+    """
+    Decline of each price from its running maximum
+
+    Args:
+        prices (numpy.ndarray): date x ticker prices
+
+    Returns:
+        numpy.ndarray: Drawdowns as fractions (0 at a new high, -0.3 for
+            30% below the high), NaN where the price is missing or negative
+    """
+    peaks = np.fmax.accumulate(prices, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where((peaks > 0) & (prices >= 0), prices / peaks - 1, np.nan)
+
+
+def market_stats(prices, factors=None, return_window=RETURN_WINDOW,
+                 volatility_window=VOLATILITY_WINDOW, beta_window=BETA_WINDOW):
+    """
+    Rolling statistics of every ticker of a price matrix
+
+    Args:
+        prices (pandas.DataFrame): date x ticker prices from price_matrix()
+        factors (pandas.DataFrame, optional): date x factor prices on the
+            same dates (e.g. corn, soy, sugar and cattle)
+        return_window (int): Trading days of the rolling return
+        volatility_window (int): Trading days of the realized volatility
+        beta_window (int): Trading days of the rolling betas
+
+    Returns:
+        dict: Frames indexed like prices:
+            - 'returns': rolling return over return_window
+            - 'volatility': annualized realized volatility
+            - 'drawdown': decline from the running high
+            - 'beta': betas with (ticker, factor) columns, when factors are given
+            - 'summary': latest values per ticker (price, return, volatility,
+              drawdown, max drawdown and one beta column per factor)
+    """
+    values = prices.to_numpy(dtype=np.float64)
+    daily = _returns(values)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        shifted = np.full_like(values, np.nan)
+        shifted[return_window:] = values[:-return_window]
+        period_returns = np.where(shifted > 0, values / shifted - 1, np.nan)
+    volatility = rolling_volatility(daily, volatility_window)
+    drawdown = drawdowns(values)
+
+    def frame(matrix):
+        return pd.DataFrame(matrix, index=prices.index, columns=prices.columns)
+
+    # Latest row with a price, per ticker
+    has_price = ~np.isnan(values)
+    last_row = len(values) - 1 - np.argmax(has_price[::-1], axis=0)
+    tickers = np.arange(values.shape[1])
+    summary = pd.DataFrame({
+        'Price': values[last_row, tickers],
+        'Return': period_returns[last_row, tickers],
+        'Volatility': volatility[last_row, tickers],
+        'Drawdown': drawdown[last_row, tickers],
+        'Max Drawdown': np.fmin.reduce(drawdown, axis=0),
+    }, index=prices.columns)
+    summary.loc[~has_price.any(axis=0)] = np.nan
+
+    stats = {'returns': frame(period_returns), 'volatility': frame(volatility),
+             'drawdown': frame(drawdown), 'summary': summary}
+
+    if factors is not None and len(factors.columns):
+        factor_values = factors.reindex(prices.index).to_numpy(dtype=np.float64)
+        beta = rolling_beta(daily, _returns(factor_values), beta_window)
+        columns = pd.MultiIndex.from_product([prices.columns, factors.columns], names=['ticker', 'factor'])
+        stats['beta'] = pd.DataFrame(beta.reshape(len(values), -1), index=prices.index, columns=columns)
+        for position, factor in enumerate(factors.columns):
+            summary[f'Beta {factor}'] = beta[last_row, tickers, position]
+    return stats
+
+
+#######################
+# Fund positioning
+#######################
+
+def report_week(dates):
+    """
+    Tuesday of the week of each date, the "as of" day of CFTC reports
+
+    Reports delayed by a holiday still line up with the other contracts.
+
+    Args:
+        dates (pandas.DatetimeIndex): Report dates
+
+    Returns:
+        pandas.DatetimeIndex: Tuesdays
+    """
+    days = dates.normalize()
+    return days - pd.to_timedelta((days.weekday - 1) % 7, unit='D')
+
+
+def positioning_matrix(series):
+    """
+    Align weekly net long positions into one report week x contract matrix
+
+    Args:
+        series (dict): Net long Series indexed by report date, keyed by
+            contract
+
+    Returns:
+        pandas.DataFrame: float64 positions on every report week of any
+            contract, NaN for weeks a contract has no report
+    """
+    aligned = {}
+    for name, values in series.items():
+        weeks = report_week(pd.DatetimeIndex(values.index))
+        aligned[name] = pd.Series(values.to_numpy(dtype=np.float64), index=weeks).groupby(level=0).last()
+    return pd.concat(aligned, axis=1).sort_index().astype(np.float64)
+
+
+def rolling_percentile(values, window=POSITIONING_WINDOW, min_periods=None):
+    """
+    Percentile rank of each value within its trailing window
+
+    The rank is the share of the window's values at or below the current
+    one, so 100 is a window high and close to 0 a window low.
+
+    Args:
+        values (numpy.ndarray): date x series values
+        window (int): Rows per window, the current one included
+        min_periods (int, optional): Values needed in a window, window // 2
+            by default
+
+    Returns:
+        numpy.ndarray: Ranks from 0 to 100, NaN where the value is missing
+            or the window has too few values
+    """
+    rows = len(values)
+    padded = np.vstack([np.full((window - 1, values.shape[1]), np.nan), values])
+    # rows x series x window views, no copy
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)
+    current = values[:, :, None]
+    count = (~np.isnan(windows)).sum(axis=2)
+    at_or_below = (windows <= current).sum(axis=2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ranks = 100.0 * at_or_below / count
+    ranks[np.isnan(values) | (count < (min_periods or window // 2))] = np.nan
+    return ranks[:rows]
+
+
+def rolling_zscore(values, window=POSITIONING_WINDOW, min_periods=None):
+    """
+    Distance of each value from its trailing mean, in standard deviations
+
+    Args:
+        values (numpy.ndarray): date x series values
+        window (int): Rows per window, the current one included
+        min_periods (int, optional): Values needed in a window, window // 2
+            by default
+
+    Returns:
+        numpy.ndarray: z-scores, NaN where the value is missing or the
+            window has too few values
+    """
+    valid = ~np.isnan(values)
+    count = _rolling_sum(valid.astype(np.float64), window)
+    total = _rolling_sum(values, window)
+    squares = _rolling_sum(values * values, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = total / count
+        deviation = np.sqrt(np.clip((squares - total * mean) / (count - 1), 0, None))
+        scores = (values - mean) / deviation
+    scores[~valid | (count < (min_periods or window // 2)) | ~(deviation > 0)] = np.nan
+    return scores
+
+
+def positioning_stats(positions, window=POSITIONING_WINDOW):
+    """
+    Rolling positioning statistics of every contract
+
+    Args:
+        positions (pandas.DataFrame): report week x contract net long
+            positions from positioning_matrix()
+        window (int): Weekly reports in the trailing window
+
+    Returns:
+        dict: Frames indexed like positions:
+            - 'percentile': percentile rank within the window (0-100)
+            - 'zscore': z-score within the window
+            - 'change': change from the previous report
+            - 'summary': latest report of each contract (date, net long,
+              weekly change, percentile and z-score), highest percentile
+              first
+    """
+    values = positions.to_numpy(dtype=np.float64)
+    percentile = rolling_percentile(values, window)
+    zscore = rolling_zscore(values, window)
+    change = np.full_like(values, np.nan)
+    change[1:] = values[1:] - values[:-1]
+
+    def frame(matrix):
+        return pd.DataFrame(matrix, index=positions.index, columns=positions.columns)
+
+    # Latest report of each contract
+    reported = ~np.isnan(values)
+    last_row = len(values) - 1 - np.argmax(reported[::-1], axis=0)
+    contracts = np.arange(values.shape[1])
+    summary = pd.DataFrame({
+        'Report': positions.index[last_row],
+        'Net Long': values[last_row, contracts],
+        'Change': change[last_row, contracts],
+        'Percentile': percentile[last_row, contracts],
+        'Z-Score': zscore[last_row, contracts],
+    }, index=positions.columns)
+    summary = summary[reported.any(axis=0)].sort_values('Percentile', ascending=False)
+
+    return {'percentile': frame(percentile), 'zscore': frame(zscore), 'change': frame(change),
+            'summary': summary}
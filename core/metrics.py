@@ -0,0 +1,75 @@
+"""
+Instrumentation
+
+Lightweight timings for the dashboard. Measurements are kept in a bounded
+in-process buffer, so the latest numbers can be inspected from a page or
+a shell, and are also sent to the 'dashboard.metrics' logger at DEBUG level.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger('dashboard.metrics')
+
+MAX_RECORDS = 1000
+
+_records = deque(maxlen=MAX_RECORDS)
+_lock = threading.Lock()
+
+
+def record(event, name, seconds, **fields):
+    """
+    Store one measurement
+
+    Args:
+        event (str): Kind of measurement, e.g. 'dataset_load'
+        name (str): What was measured, e.g. a dataset name
+        seconds (float): Duration in seconds
+        **fields: Extra details such as row counts
+    """
+    entry = {'event': event, 'name': name, 'seconds': seconds, 'time': time.time(), **fields}
+    with _lock:
+        _records.append(entry)
+    logger.debug("%s %s %.3fs %s", event, name, seconds, fields or '')
+
+
+@contextmanager
+def timed(event, name, **fields):
+    """
+    Time the enclosed block and record it, even if it raises
+
+    Args:
+        event (str): Kind of measurement
+        name (str): What is being measured
+        **fields: Extra details stored with the measurement
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(event, name, time.perf_counter() - start, **fields)
+
+
+def recent(event=None, limit=None):
+    """
+    Latest measurements, oldest first
+
+    Args:
+        event (str, optional): Only return this kind of measurement
+        limit (int, optional): Maximum number of measurements to return
+
+    Returns:
+        list: Measurement dicts
+    """
+    with _lock:
+        entries = [entry for entry in _records if event is None or entry['event'] == event]
+    return entries[-limit:] if limit else entries
+
+
+def clear():
+    """Forget all stored measurements."""
+    with _lock:
+        _records.clear()
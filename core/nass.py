@@ -0,0 +1,226 @@
+"""
+NASS Quick Stats Ingestion
+
+Streams a USDA NASS Quick Stats bulk file (the multi-GB tab-separated
+qs.*.txt.gz dumps) and keeps only the configured series, so the file
+never has to fit in memory:
+
+- the file is read in blocks of a few MB with pyarrow, only the columns
+  needed for filtering and values are parsed, and each block is filtered
+  on them before anything is converted to pandas (predicate pushdown)
+- every series is normalized to its canonical form in core.schema (typed
+  Year, Week or Month, Date and value columns), with periods ('WEEK #12',
+  'JAN') and values ('1,234', '(D)') parsed once per distinct label, so
+  consumers no longer strip thousands separators or extract week numbers
+
+Series are declared as Series entries in SERIES, each with a schema
+registered under its name. Requires pyarrow.
+"""
+
+import csv
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from core import metrics
+from core.schema import get_schema, normalize as normalize_dataset
+
+DEFAULT_BLOCK_MB = 16
+
+# Columns read from the bulk file; all others are skipped by the parser
+FILTER_COLUMNS = ('SOURCE_DESC', 'SHORT_DESC', 'DOMAIN_DESC', 'AGG_LEVEL_DESC', 'FREQ_DESC')
+VALUE_COLUMNS = ('YEAR', 'REFERENCE_PERIOD_DESC', 'WEEK_ENDING', 'LOAD_TIME', 'VALUE')
+
+
+@dataclass(frozen=True)
+class Series:
+    """
+    One statistic to extract from the bulk file
+
+    Attributes:
+        name (str): Dataset name of the series, registered in core.schema
+        short_desc (str): NASS SHORT_DESC (commodity, statistic and unit)
+        agg_level (str): NASS AGG_LEVEL_DESC
+        domain (str): NASS DOMAIN_DESC
+        source (str): NASS SOURCE_DESC
+    """
+    name: str
+    short_desc: str
+    agg_level: str = 'NATIONAL'
+    domain: str = 'TOTAL'
+    source: str = 'SURVEY'
+
+    @property
+    def freq(self):
+        """NASS FREQ_DESC, from the frequency of the dataset schema."""
+        return get_schema(self.name).frequency.upper()
+
+    def key(self):
+        """The filter column values identifying the series, in FILTER_COLUMNS order."""
+        return (self.source, self.short_desc, self.domain, self.agg_level, self.freq)
+
+
+SERIES = (
+    Series('US_BROILER_EGG_SET_WEEKLY', 'CHICKENS, BROILERS - EGGS SET, MEASURED IN EGGS'),
+    Series('US_CHICKEN_PLACEMENTS_WEEKLY', 'CHICKENS, BROILERS - PLACEMENTS, MEASURED IN HEAD'),
+    Series('US_BROILER_HATCHING_EGGS_MONTHLY',
+           'CHICKENS, LAYERS, BROILER TYPE, HATCHING EGG - PRODUCTION, MEASURED IN EGGS'),
+    Series('US_BROILER_BREEDER_HERD_MONTHLY',
+           'CHICKENS, LAYERS, BROILER TYPE, HATCHING EGG - INVENTORY, MEASURED IN HEAD'),
+)
+
+
+def _import_pyarrow_csv():
+    try:
+        import pyarrow
+        import pyarrow.compute  # noqa: F401
+        import pyarrow.csv  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError as error:
+        raise ImportError("NASS ingestion requires pyarrow (pip install pyarrow)") from error
+    return pyarrow
+
+
+def _header(pa, path, delimiter):
+    """Column names of the bulk file, as written in it."""
+    with pa.input_stream(str(path), compression='detect') as stream:
+        line = b''
+        while not line.endswith(b'\n'):
+            chunk = stream.read(1 << 16)
+            if not chunk:
+                break
+            line += chunk
+    line = line.split(b'\n', 1)[0].decode('utf-8-sig').rstrip('\r')
+    quoting = csv.QUOTE_MINIMAL if _quoted(delimiter) else csv.QUOTE_NONE
+    return next(csv.reader([line], delimiter=delimiter, quoting=quoting))
+
+
+def _quoted(delimiter):
+    """
+    Whether fields may be quoted: the tab-separated bulk files are not, and
+    hold stray double quotes in descriptions, while the comma-separated API
+    exports quote fields containing commas (SHORT_DESC, VALUE '1,234').
+    """
+    return delimiter != '\t'
+
+
+def normalize(rows, series):
+    """
+    Canonical frame of one series from its raw bulk file rows
+
+    When a period was published more than once, the latest load is kept.
+
+    Args:
+        rows (pandas.DataFrame): Bulk file rows of the series (VALUE_COLUMNS)
+        series (Series): The series
+
+    Returns:
+        pandas.DataFrame: The series in its core.schema canonical form
+    """
+    raw = pd.DataFrame({
+        'year': rows['YEAR'].to_numpy(),
+        'reference_period_desc': rows['REFERENCE_PERIOD_DESC'].to_numpy(),
+        'week_ending': rows['WEEK_ENDING'].to_numpy(),
+        'Value': rows['VALUE'].to_numpy(),
+        'load_time': rows['LOAD_TIME'].to_numpy()
+    })
+    raw = raw.sort_values('load_time', kind='stable').drop(columns='load_time')
+    return normalize_dataset(series.name, raw)
+
+
+def read_series(path, series=SERIES, block_size=DEFAULT_BLOCK_MB << 20, delimiter=None):
+    """
+    Stream a bulk file and extract the configured series
+
+    Memory use is bounded by the block size plus the rows kept, not by the
+    size of the file.
+
+    Args:
+        path (str or Path): Bulk file, optionally gzip-compressed
+        series (iterable): Series entries to extract
+        block_size (int): Bytes parsed at a time
+        delimiter (str, optional): Field separator, defaults to ',' for
+            .csv files and tab otherwise
+
+    Returns:
+        dict: Normalized DataFrames keyed by series name; series with no
+            rows in the file are left out
+    """
+    pa = _import_pyarrow_csv()
+    pc = pa.compute
+    series = list(series)
+    path = Path(path)
+    delimiter = delimiter or (',' if '.csv' in path.suffixes else '\t')
+
+    # The bulk files use upper-case names, API exports lower-case ones
+    header = {name.upper(): name for name in _header(pa, path, delimiter)}
+    missing = [column for column in FILTER_COLUMNS + VALUE_COLUMNS if column not in header]
+    if missing:
+        raise ValueError(f"{path} is not a Quick Stats file, missing columns: {missing}")
+    names = [header[column] for column in FILTER_COLUMNS + VALUE_COLUMNS]
+
+    reader = pa.csv.open_csv(
+        str(path),
+        read_options=pa.csv.ReadOptions(block_size=block_size),
+        parse_options=pa.csv.ParseOptions(delimiter=delimiter, quote_char='"' if _quoted(delimiter) else False),
+        convert_options=pa.csv.ConvertOptions(include_columns=names,
+                                              column_types={name: pa.string() for name in names},
+                                              strings_can_be_null=False)
+    )
+
+    # Coarse filter on every column first, the exact series match is done on the kept rows
+    wanted = [pa.array(sorted({entry.key()[i] for entry in series})) for i in range(len(FILTER_COLUMNS))]
+    start = time.perf_counter()
+    scanned, kept = 0, []
+    for batch in reader:
+        scanned += batch.num_rows
+        mask = None
+        for name, values in zip(names, wanted):
+            matches = pc.is_in(batch.column(name), value_set=values)
+            mask = matches if mask is None else pc.and_(mask, matches)
+        batch = batch.filter(mask)
+        if batch.num_rows:
+            kept.append(batch)
+
+    rows = pa.Table.from_batches(kept, schema=reader.schema).to_pandas() if kept else pd.DataFrame(columns=names)
+    rows.columns = list(FILTER_COLUMNS + VALUE_COLUMNS)
+    row_keys = pd.MultiIndex.from_frame(rows[list(FILTER_COLUMNS)])
+
+    frames = {}
+    for entry in series:
+        selected = rows[row_keys.isin([entry.key()])]
+        if len(selected):
+            frames[entry.name] = normalize(selected, entry)
+    metrics.record('nass_ingest', path.name, time.perf_counter() - start, rows=scanned, kept=len(rows))
+    return frames
+
+
+def write_partitions(frames, output_dir):
+    """
+    Write normalized series as Parquet files partitioned by series
+
+    Each series goes to output_dir/series=<name>/part-0.parquet, replaced
+    atomically, so the directory can be read as one dataset with
+    pyarrow.dataset or per series.
+
+    Args:
+        frames (dict): DataFrames keyed by series name
+        output_dir (str or Path): Dataset directory
+
+    Returns:
+        list: Paths written
+    """
+    pa = _import_pyarrow_csv()
+    paths = []
+    for name, frame in frames.items():
+        directory = Path(output_dir) / f"series={name}"
+        directory.mkdir(parents=True, exist_ok=True)
+        target = directory / 'part-0.parquet'
+        temporary = directory / f".part-0.{os.getpid()}.tmp"
+        pa.parquet.write_table(pa.Table.from_pandas(frame, preserve_index=False), temporary)
+        os.replace(temporary, target)
+        paths.append(target)
+    return paths
@@ -0,0 +1,389 @@
+"""
+Aligned Panels
+
+Puts series of mixed frequencies (daily prices, weekly NASS counts,
+monthly indices, quarterly surveys) side by side on one target calendar,
+instead of each chart merging and resampling its own inputs:
+
+    panel = load_panel([
+        PanelColumn('AR_INFLATION'),
+        PanelColumn('AR_CPI_ALCOHOLIC_BEV'),
+        PanelColumn('US_BROILER_EGG_SET_WEEKLY', 'Eggs Set', date_column='Date', rule='day_weighted'),
+    ], frequency='monthly')
+
+Each column declares how its observations become target periods:
+
+- 'last': the last observation dated in the period; a series coarser
+  than the calendar is carried forward over its periods (a monthly index
+  on a daily calendar)
+- 'mean': the mean of the observations dated in the period
+- 'sum': the sum of the observations dated in the period
+- 'day_weighted': each observation is a flow spread evenly over the days
+  it covers (a week ending on its date, or its month or quarter) and the
+  days are summed per period, so a week spanning two months is split
+  between them; periods with days no observation covers (before the
+  first, after the last, or a missing or withheld one) are left NaN rather
+  than understated
+
+Target periods are labelled like the datasets: days, weeks ending on
+Sunday (the NASS week-ending date), and first days of months, quarters
+and years.
+
+Mapping observation dates to target periods is the costly part, so the
+maps of dataset columns are cached by dataset version and calendar: every
+panel (and every chart) aligning the same column to the same calendar
+reuses them. load_panel itself is not cached: pages call it from one of
+their @cached loaders, so the panel is cached under (and weighted by) the
+page until one of its datasets changes.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from core.storage import read_dataset, record_reads, recording_reads
+from core.tsstore import infer_frequency
+
+FREQUENCIES = ('daily', 'weekly', 'monthly', 'quarterly', 'yearly')
+RULES = ('last', 'mean', 'sum', 'day_weighted')
+
+MAP_CACHE_SIZE = 256
+
+_MONTHS = {'monthly': 1, 'quarterly': 3, 'yearly': 12}
+
+_maps = OrderedDict()
+_maps_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class PanelColumn:
+    """
+    One input of a panel
+
+    Attributes:
+        dataset (str): Dataset name
+        column (str): Value column, the dataset name by default
+        date_column (str): Date column
+        frequency (str): 'daily', 'weekly', 'monthly', 'quarterly' or 'yearly';
+            inferred from the dates when None
+        rule (str): 'last', 'mean', 'sum' or 'day_weighted'
+        label (str): Panel column name, the value column by default
+    """
+    dataset: str
+    column: str = None
+    date_column: str = 'DATE'
+    frequency: str = None
+    rule: str = 'last'
+    label: str = None
+
+    @property
+    def name(self):
+        return self.label or self.column or self.dataset
+
+
+def _days(dates):
+    """Dates as int64 days since the epoch."""
+    return pd.DatetimeIndex(dates).to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+
+def _month_days(months):
+    """First days (days since the epoch) of months counted since 1970-01."""
+    return np.asarray(months, dtype=np.int64).astype('datetime64[M]').astype('datetime64[D]').astype(np.int64)
+
+
+def _period_starts(days, frequency):
+    """First day of the period of the given frequency containing each day."""
+    if frequency == 'daily':
+        return days
+    if frequency == 'weekly':
+        # 1970-01-01 was a Thursday, so this gives Monday = 0
+        return days - (days + 3) % 7
+    months = days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return _month_days(months - months % _MONTHS[frequency])
+
+
+def _period_ends(starts, frequency):
+    """Day after the period starting at each start."""
+    if frequency == 'daily':
+        return starts + 1
+    if frequency == 'weekly':
+        return starts + 7
+    months = starts.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    return _month_days(months + _MONTHS[frequency])
+
+
+def source_spans(dates, frequency):
+    """
+    Days covered by each observation of a series
+
+    Weekly observations cover the week ending on their date; the others
+    the day, month, quarter or year containing their date.
+
+    Args:
+        dates (array-like): Observation dates
+        frequency (str): Frequency of the series
+
+    Returns:
+        tuple: First days and days after the last, as int64 days since the
+            epoch
+    """
+    days = _days(dates)
+    if frequency == 'weekly':
+        return days - 6, days + 1
+    starts = _period_starts(days, frequency)
+    return starts, _period_ends(starts, frequency)
+
+
+def calendar(frequency, start, end):
+    """
+    Target periods covering a date range
+
+    Args:
+        frequency (str): 'daily', 'weekly', 'monthly', 'quarterly' or 'yearly'
+        start (str or datetime): First date
+        end (str or datetime): Last date, included
+
+    Returns:
+        tuple: First days of the periods (int64 days since the epoch) and
+            their labels (pandas.DatetimeIndex)
+    """
+    if frequency not in FREQUENCIES:
+        raise ValueError(f"Unknown panel frequency {frequency!r}, use one of {FREQUENCIES}")
+    first, last = _period_starts(_days([start, end]), frequency)
+    if frequency in ('daily', 'weekly'):
+        starts = np.arange(first, last + 1, 1 if frequency == 'daily' else 7)
+    else:
+        months = np.arange(*(np.array([first, last]).astype('datetime64[D]').astype('datetime64[M]')
+                             .astype(np.int64) + [0, 1]), _MONTHS[frequency])
+        starts = _month_days(months)
+    labels = starts + 6 if frequency == 'weekly' else starts
+    return starts, pd.DatetimeIndex(labels.astype('datetime64[D]').astype('datetime64[ns]'))
+
+
+def _cached_map(key, build):
+    if key is None:
+        return build()
+    with _maps_lock:
+        if key in _maps:
+            _maps.move_to_end(key)
+            return _maps[key]
+    value = build()
+    with _maps_lock:
+        _maps[key] = value
+        while len(_maps) > MAP_CACHE_SIZE:
+            _maps.popitem(last=False)
+    return value
+
+
+def point_map(days, starts, ends, key=None):
+    """
+    Target period of each observation date
+
+    Args:
+        days (numpy.ndarray): Observation dates, int64 days since the epoch
+        starts (numpy.ndarray): First days of the target periods
+        ends (numpy.ndarray): Days after the target periods
+        key (tuple, optional): Identifies the dates and the calendar
+            together; the map is cached under it, and built on every call
+            without one
+
+    Returns:
+        numpy.ndarray: Period positions, -1 for dates outside the calendar
+    """
+    def build():
+        codes = np.searchsorted(starts, days, side='right') - 1
+        codes[(codes < 0) | (days >= ends[-1])] = -1
+        return codes
+
+    return _cached_map(None if key is None else ('point',) + key, build)
+
+
+def day_map(span_starts, span_ends, starts, ends, key=None):
+    """
+    Overlap in days of each observation span with each target period
+
+    Args:
+        span_starts (numpy.ndarray): First days covered by the observations
+        span_ends (numpy.ndarray): Days after the last covered days
+        starts (numpy.ndarray): First days of the target periods
+        ends (numpy.ndarray): Days after the target periods
+        key (tuple, optional): Identifies the spans and the calendar
+            together; the map is cached under it, and built on every call
+            without one
+
+    Returns:
+        tuple: Observation positions, period positions and overlapping
+            days, one entry per overlapping (observation, period) pair
+    """
+    def build():
+        first = np.searchsorted(starts, span_starts, side='right') - 1
+        last = np.searchsorted(starts, span_ends - 1, side='right') - 1
+        first = np.clip(first, 0, None)
+        count = np.clip(last - first + 1, 0, None)
+        rows = np.repeat(np.arange(len(span_starts)), count)
+        # Period positions: first period of each observation plus 0, 1, ...
+        offsets = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        periods = np.repeat(first, count) + offsets
+        overlap = (np.minimum(span_ends[rows], ends[periods])
+                   - np.maximum(span_starts[rows], starts[periods]))
+        keep = overlap > 0
+        return rows[keep], periods[keep], overlap[keep]
+
+    return _cached_map(None if key is None else ('days',) + key, build)
+
+
+def align(series, frequency, starts, ends, rule='last', source_frequency=None, series_key=None):
+    """
+    Values of one series on target periods
+
+    Args:
+        series (pandas.Series): Values indexed by date
+        frequency (str): Target frequency
+        starts (numpy.ndarray): First days of the target periods, from
+            calendar()
+        ends (numpy.ndarray): Days after the target periods
+        rule (str): 'last', 'mean', 'sum' or 'day_weighted'
+        source_frequency (str, optional): Frequency of the series, inferred
+            from its dates when None
+        series_key (tuple, optional): Identifies the series' dates and
+            missing values, e.g. its dataset, version and column; the
+            alignment maps are cached under it and the calendar
+
+    Returns:
+        numpy.ndarray: One float64 value per target period
+    """
+    if rule not in RULES:
+        raise ValueError(f"Unknown panel rule {rule!r}, use one of {RULES}")
+    series = series.dropna().sort_index()
+    result = np.full(len(starts), np.nan)
+    if series.empty:
+        return result
+    source_frequency = source_frequency or infer_frequency(series.index) or frequency
+    values = series.to_numpy(dtype=np.float64)
+    span_starts, span_ends = source_spans(series.index, source_frequency)
+    # The calendar is fully given by its frequency, first period and length
+    key = None if series_key is None else (series_key, source_frequency, frequency, int(starts[0]), len(starts))
+
+    if rule == 'day_weighted':
+        rows, periods, overlap = day_map(span_starts, span_ends, starts, ends, key)
+        result = np.bincount(periods, weights=values[rows] * overlap / (span_ends - span_starts)[rows],
+                             minlength=len(starts))
+        covered = np.bincount(periods, weights=overlap, minlength=len(starts))
+        # Periods with days no observation covers (before the first, after the
+        # last, or a missing or withheld week) would be understated
+        result[covered < ends - starts] = np.nan
+        return result
+
+    codes = point_map(_days(series.index), starts, ends, key)
+    inside = codes >= 0
+    codes, values = codes[inside], values[inside]
+    if rule == 'last':
+        # Last observation of each period: first occurrence in reversed date order
+        unique, position = np.unique(codes[::-1], return_index=True)
+        result[unique] = values[::-1][position]
+        if FREQUENCIES.index(source_frequency) <= FREQUENCIES.index(frequency):
+            return result
+        # A coarser series is carried forward over the target periods it spans
+        filled = pd.Series(result).ffill().to_numpy()
+        within = (ends > span_starts.min()) & (starts < span_ends.max())
+        return np.where(within, filled, np.nan)
+    counts = np.bincount(codes, minlength=len(starts))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = np.bincount(codes, weights=values, minlength=len(starts))
+        if rule == 'mean':
+            result = result / counts
+    result[counts == 0] = np.nan
+    return result
+
+
+def panel(series, frequency='monthly', start=None, end=None, rules=None, frequencies=None, series_keys=None):
+    """
+    Align several series on one calendar
+
+    Args:
+        series (dict): Series indexed by date, keyed by column name
+        frequency (str): Target frequency
+        start (str or datetime, optional): First date, the earliest date
+            covered by any series by default
+        end (str or datetime, optional): Last date, the latest date
+            covered by any series by default
+        rules (dict, optional): Rule of each column, 'last' by default
+        frequencies (dict, optional): Frequency of each column, inferred
+            from its dates when missing
+        series_keys (dict, optional): Cache key of each column, see align()
+
+    Returns:
+        pandas.DataFrame: One row per target period, one float64 column per
+            series
+    """
+    rules = rules or {}
+    series = {name: values.dropna().sort_index() for name, values in series.items()}
+    frequencies = {name: (frequencies or {}).get(name) or infer_frequency(values.index) or frequency
+                   for name, values in series.items()}
+    spans = [source_spans(values.index, frequencies[name]) for name, values in series.items() if len(values)]
+    if start is None:
+        start = min(span[0].min() for span in spans).astype('datetime64[D]') if spans else pd.Timestamp.now()
+    if end is None:
+        end = max(span[1].max() - 1 for span in spans).astype('datetime64[D]') if spans else pd.Timestamp.now()
+    starts, labels = calendar(frequency, start, end)
+    ends = _period_ends(starts, frequency)
+    series_keys = series_keys or {}
+    columns = {name: align(values, frequency, starts, ends, rules.get(name, 'last'), frequencies[name],
+                           series_keys.get(name))
+               for name, values in series.items()}
+    return pd.DataFrame(columns, index=labels.rename('DATE'))
+
+
+def weekly_to_monthly(dates, values):
+    """
+    Monthly totals of a weekly flow, each week split by its days in each month
+
+    A week ending on Wednesday 2 April puts 5/7 of its value in March and
+    2/7 in April, instead of all of it in April. Months are integer codes
+    throughout; no date is formatted.
+
+    Args:
+        dates (array-like): Week-ending dates
+        values (array-like): Weekly values (eggs set, chicks placed...)
+
+    Returns:
+        pandas.Series: Totals indexed by the first day of each month, without
+            the months not fully covered by weeks: those cut by the first or
+            last week of the series, and those with a missing or NaN week
+    """
+    series = pd.Series(np.asarray(values, dtype=np.float64), index=pd.DatetimeIndex(dates))
+    totals = panel({'value': series}, 'monthly', rules={'value': 'day_weighted'}, frequencies={'value': 'weekly'})
+    return totals['value'].dropna().rename(None)
+
+
+def load_panel(columns, frequency='monthly', start=None, end=None):
+    """
+    Panel of dataset columns
+
+    Args:
+        columns (list): PanelColumn inputs
+        frequency (str): Target frequency
+        start (str, optional): First date
+        end (str, optional): Last date
+
+    Returns:
+        pandas.DataFrame: One row per target period indexed by DATE, one
+            column per input (named by its label)
+    """
+    series, rules, frequencies, keys = {}, {}, {}, {}
+    for spec in columns:
+        # The version the frame was read at, for the alignment map keys
+        with recording_reads() as reads:
+            df = read_dataset(spec.dataset)
+        record_reads(reads)
+        values = df[spec.column or spec.dataset]
+        series[spec.name] = pd.Series(values.to_numpy(dtype=np.float64), index=pd.to_datetime(df[spec.date_column]))
+        rules[spec.name] = spec.rule
+        if spec.frequency:
+            frequencies[spec.name] = spec.frequency
+        if reads.get(spec.dataset) is not None:
+            keys[spec.name] = (spec.dataset, reads[spec.dataset], spec.column or spec.dataset, spec.date_column)
+    return panel(series, frequency, start, end, rules, frequencies, keys)
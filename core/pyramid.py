@@ -0,0 +1,109 @@
+"""
+Resolution Pyramids
+
+Long time series are stored at several resolutions (daily, weekly, monthly,
+quarterly, yearly), each bucket keeping its min, max and last value. A
+chart asks for a date window and a point budget and gets the finest level
+that fits, so payloads stay bounded however long the history grows:
+zoomed out, a 25-year daily series is sent as a few hundred monthly
+buckets; zoomed into a quarter, as the raw daily points.
+
+A pyramid is a dict of DataFrames, finest level first, each indexed by the
+date of the last observation in the bucket with columns min, max and last.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Level name and pandas period frequency, finest first
+LEVELS = (('daily', None), ('weekly', 'W'), ('monthly', 'M'), ('quarterly', 'Q'), ('yearly', 'Y'))
+
+DEFAULT_MAX_POINTS = 1500
+
+
+def build_pyramid(series, levels=LEVELS):
+    """
+    Precompute every resolution of a time series
+
+    Args:
+        series (pandas.Series): Values indexed by date
+        levels (tuple): (name, period frequency) pairs, finest first; a
+            frequency of None keeps the observations as they are
+
+    Returns:
+        dict: DataFrames with columns min, max and last keyed by level name
+    """
+    series = pd.Series(series, dtype=float).dropna()
+    series.index = pd.DatetimeIndex(series.index)
+    series = series[~series.index.duplicated(keep='last')].sort_index()
+
+    pyramid = {}
+    for name, frequency in levels:
+        if frequency is None:
+            level = pd.DataFrame({'min': series, 'max': series, 'last': series})
+        else:
+            buckets = series.index.to_period(frequency)
+            grouped = series.groupby(buckets, sort=True)
+            last_dates = pd.Series(series.index, index=series.index).groupby(buckets, sort=True).last()
+            level = pd.DataFrame({
+                'min': grouped.min().to_numpy(),
+                'max': grouped.max().to_numpy(),
+                'last': grouped.last().to_numpy()
+            }, index=pd.DatetimeIndex(last_dates.to_numpy()))
+        level.index.name = 'DATE'
+        pyramid[name] = level
+        if len(level) <= 1:
+            break
+    return pyramid
+
+
+def level_bounds(level, start=None, end=None):
+    """
+    Positions of a date window in one level, widened by one bucket per side
+    so that lines run to the edges of the visible range
+
+    Args:
+        level (pandas.DataFrame): One pyramid level
+        start (str or datetime, optional): Window start, open when None
+        end (str or datetime, optional): Window end, open when None
+
+    Returns:
+        tuple: (first, last) positions, last exclusive
+    """
+    index = level.index
+    first = 0 if start is None else max(int(index.searchsorted(pd.Timestamp(start), 'left')) - 1, 0)
+    last = len(index) if end is None else min(int(index.searchsorted(pd.Timestamp(end), 'right')) + 1, len(index))
+    return first, last
+
+
+def window(pyramid, start=None, end=None, max_points=DEFAULT_MAX_POINTS):
+    """
+    Finest resolution of a date window that fits in a point budget
+
+    Args:
+        pyramid (dict): Levels from build_pyramid
+        start (str or datetime, optional): Window start, open when None
+        end (str or datetime, optional): Window end, open when None
+        max_points (int): Most buckets to return
+
+    Returns:
+        tuple: (level name, DataFrame slice); the coarsest level is returned
+            when none fits
+    """
+    name, level = None, None
+    for name, level in pyramid.items():
+        first, last = level_bounds(level, start, end)
+        if last - first <= max_points:
+            return name, level.iloc[first:last]
+    first, last = level_bounds(level, start, end)
+    # Even the coarsest level is too long: thin it evenly
+    step = int(np.ceil((last - first) / max_points))
+    return name, level.iloc[first:last:step]
+
+
+def pyramid_extent(pyramid):
+    """First and last date covered by a pyramid, or (None, None) if empty."""
+    finest = next(iter(pyramid.values()), None)
+    if finest is None or finest.empty:
+        return None, None
+    return finest.index[0], finest.index[-1]
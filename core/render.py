@@ -0,0 +1,319 @@
+"""
+Chart Rendering
+
+Drop-in replacement for st.plotly_chart that keeps large figures fast:
+
+- when a figure holds more points than DASHBOARD_WEBGL_POINTS, its line and
+  scatter traces are switched to WebGL (Scattergl), which draws hundreds of
+  thousands of points where SVG stalls at a few tens of thousands
+- numeric arrays are rounded to DASHBOARD_CHART_DIGITS significant digits
+  and dates at midnight are sent as plain dates, so the JSON sent to the
+  browser carries '12.35' instead of '12.350000000000001' and '2024-01-02'
+  instead of '2024-01-02T00:00:00'
+
+The plotly.js bundled with Streamlit 1.32 (2.26) cannot decode base64
+typed arrays, so rounding is the compact encoding used here.
+
+zoom_chart() serves long series from resolution pyramids (core.pyramid):
+it starts at an overview and, when the user zooms or pans, re-renders only
+the visible window at the finest resolution that fits the point budget.
+"""
+
+import hashlib
+import os
+import shutil
+from datetime import date
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io
+
+from core.pyramid import DEFAULT_MAX_POINTS, LEVELS, window
+from core.storage import CACHE_DIR_ENV, DEFAULT_CACHE_DIR
+
+WEBGL_POINTS_ENV = 'DASHBOARD_WEBGL_POINTS'
+DIGITS_ENV = 'DASHBOARD_CHART_DIGITS'
+DEFAULT_WEBGL_POINTS = 5000
+DEFAULT_DIGITS = 6
+
+ARRAY_ATTRIBUTES = ('x', 'y', 'customdata')
+
+
+def _trace_length(trace):
+    for attribute in ('x', 'y'):
+        if trace[attribute] is not None:
+            return len(trace[attribute])
+    return 0
+
+
+def point_count(fig):
+    """Number of points drawn by the line and scatter traces of a figure."""
+    return sum(_trace_length(trace) for trace in fig.data if trace.type in ('scatter', 'scattergl'))
+
+
+def round_significant(values, digits=DEFAULT_DIGITS):
+    """
+    Round an array to a number of significant digits
+
+    The scale is taken from the largest value, so every element keeps the
+    same absolute precision, which is what a chart axis shows.
+
+    Args:
+        values (numpy.ndarray): Float values
+        digits (int): Significant digits to keep
+
+    Returns:
+        numpy.ndarray: Rounded values
+    """
+    finite = np.abs(values[np.isfinite(values)])
+    if finite.size == 0 or finite.max() == 0:
+        return values
+    decimals = digits - 1 - int(np.floor(np.log10(finite.max())))
+    return np.round(values, decimals)
+
+
+def _compact_dates(values):
+    """Dates as 'YYYY-MM-DD' strings when none has a time of day, else None."""
+    try:
+        dates = pd.DatetimeIndex(values)
+    except (TypeError, ValueError):
+        return None
+    if dates.tz is not None or not (dates.isna() | (dates == dates.normalize())).all():
+        return None
+    return np.where(dates.isna(), None, dates.strftime('%Y-%m-%d').to_numpy(dtype=object))
+
+
+def _compact_array(values, digits):
+    """Compact version of one trace array, or None to keep it as it is."""
+    array = np.asarray(values)
+    if array.ndim != 1 or array.size == 0:
+        return None
+    if np.issubdtype(array.dtype, np.floating):
+        return round_significant(array, digits)
+    if np.issubdtype(array.dtype, np.datetime64):
+        return _compact_dates(array)
+    # plotly stores datetime columns as object arrays of datetime.datetime
+    if array.dtype == object and isinstance(array[0], (date, np.datetime64)):
+        return _compact_dates(array)
+    return None
+
+
+def compact_arrays(fig, digits=DEFAULT_DIGITS):
+    """
+    Round floats and shorten dates in every trace, in place
+
+    Args:
+        fig (plotly.graph_objects.Figure): Figure to compact
+        digits (int): Significant digits kept for floats
+
+    Returns:
+        plotly.graph_objects.Figure: The same figure
+    """
+    for trace in fig.data:
+        for attribute in ARRAY_ATTRIBUTES:
+            if attribute not in trace or trace[attribute] is None:
+                continue
+            compacted = _compact_array(trace[attribute], digits)
+            if compacted is not None:
+                trace[attribute] = compacted
+    return fig
+
+
+def use_webgl(fig):
+    """
+    Copy of a figure with its scatter traces drawn through WebGL
+
+    Properties that Scattergl does not support (such as spline lines) are
+    dropped.
+
+    Args:
+        fig (plotly.graph_objects.Figure): Figure to convert
+
+    Returns:
+        plotly.graph_objects.Figure: The converted figure
+    """
+    traces = []
+    for trace in fig.data:
+        if trace.type == 'scatter':
+            properties = trace.to_plotly_json()
+            properties.pop('type', None)
+            trace = go.Scattergl(properties, skip_invalid=True)
+        traces.append(trace)
+    return go.Figure(data=traces, layout=fig.layout, frames=fig.frames)
+
+
+def optimize(fig, webgl_points=None, digits=None):
+    """
+    Prepare a figure for the browser: WebGL when large, compact arrays
+
+    Args:
+        fig (plotly.graph_objects.Figure): Figure to optimize
+        webgl_points (int, optional): Point count above which WebGL is used,
+            defaults to DASHBOARD_WEBGL_POINTS
+        digits (int, optional): Significant digits kept for floats,
+            defaults to DASHBOARD_CHART_DIGITS
+
+    Returns:
+        plotly.graph_objects.Figure: The optimized figure
+    """
+    webgl_points = webgl_points or int(os.environ.get(WEBGL_POINTS_ENV, DEFAULT_WEBGL_POINTS))
+    digits = digits or int(os.environ.get(DIGITS_ENV, DEFAULT_DIGITS))
+    if point_count(fig) > webgl_points:
+        fig = use_webgl(fig)
+    return compact_arrays(fig, digits)
+
+
+def plotly_chart(fig, **kwargs):
+    """
+    Optimize a figure and display it with st.plotly_chart
+
+    Args:
+        fig (plotly.graph_objects.Figure): Figure to display
+        **kwargs: Passed to st.plotly_chart, e.g. use_container_width
+    """
+    import streamlit as st
+
+    return st.plotly_chart(optimize(fig), **kwargs)
+
+
+ZOOM_CHART_SOURCE = Path(__file__).resolve().parent / 'components' / 'zoom_chart'
+
+
+@lru_cache(maxsize=1)
+def _zoom_component():
+    """
+    Declare the zoom chart component
+
+    The component directory is assembled in the cache directory from
+    index.html and the plotly.js shipped with the installed plotly package,
+    so the browser needs no CDN access.
+    """
+    import streamlit.components.v1 as components
+
+    index = (ZOOM_CHART_SOURCE / 'index.html').read_bytes()
+    digest = hashlib.md5(index).hexdigest()[:8]
+    cache_dir = Path(os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+    target = cache_dir / 'components' / f"zoom_chart-{plotly.__version__}-{digest}"
+    if not (target / 'plotly.min.js').exists():
+        target.mkdir(parents=True, exist_ok=True)
+        (target / 'index.html').write_bytes(index)
+        source = Path(plotly.__file__).parent / 'package_data' / 'plotly.min.js'
+        temporary = target / f".plotly.min.js.{os.getpid()}.tmp"
+        shutil.copyfile(source, temporary)
+        os.replace(temporary, target / 'plotly.min.js')
+    return components.declare_component('zoom_chart', path=str(target))
+
+
+def _rgba(color, alpha):
+    color = color.lstrip('#')
+    red, green, blue = (int(color[position:position + 2], 16) for position in (0, 2, 4))
+    return f"rgba({red}, {green}, {blue}, {alpha})"
+
+
+def zoom_figure(series, start=None, end=None, max_points=DEFAULT_MAX_POINTS, title=None,
+                y_title=None, colors=None):
+    """
+    Figure of the visible window of one or more pyramids
+
+    Aggregated levels are drawn as the last value of each bucket over a
+    shaded min/max band, so spikes stay visible when zoomed out.
+
+    Args:
+        series (dict): Resolution pyramids keyed by series name
+        start (str or datetime, optional): Visible window start
+        end (str or datetime, optional): Visible window end
+        max_points (int): Point budget shared by all series
+        title (str, optional): Chart title
+        y_title (str, optional): Y axis title
+        colors (list, optional): Line colors, defaults to plotly's palette
+
+    Returns:
+        tuple: (figure, name of the coarsest level shown); the title names
+            the level when the data is aggregated
+    """
+    colors = colors or px.colors.qualitative.Plotly
+    budget = max(max_points // max(len(series), 1), 2)
+    fig = go.Figure()
+    levels = []
+    for position, (name, pyramid) in enumerate(series.items()):
+        level, frame = window(pyramid, start, end, budget)
+        levels.append(level)
+        color = colors[position % len(colors)]
+        if level != next(iter(pyramid)):
+            fig.add_trace(go.Scatter(x=frame.index, y=frame['min'], mode='lines', line={'width': 0},
+                                     legendgroup=name, showlegend=False, hoverinfo='skip'))
+            fig.add_trace(go.Scatter(x=frame.index, y=frame['max'], mode='lines', line={'width': 0},
+                                     fill='tonexty', fillcolor=_rgba(color, 0.2),
+                                     legendgroup=name, showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=frame.index, y=frame['last'], mode='lines', name=name,
+                                 legendgroup=name, line={'color': color}))
+
+    order = [name for name, _ in LEVELS]
+    coarsest = max(levels, key=order.index) if levels else None
+    fig.update_layout(
+        title=f"{title} ({coarsest})" if title and coarsest not in (None, order[0]) else title,
+        xaxis_title='Date',
+        yaxis_title=y_title,
+        showlegend=len(series) > 1,
+        hovermode='x unified'
+    )
+    if start is not None and end is not None:
+        fig.update_xaxes(range=[pd.Timestamp(start), pd.Timestamp(end)])
+    return fig, coarsest
+
+
+def zoom_chart(series, key, title=None, y_title=None, initial_range=None, height=450,
+               max_points=DEFAULT_MAX_POINTS):
+    """
+    Time-series chart that loads detail as the user zooms
+
+    The first render shows initial_range (or the whole history). Each zoom
+    or pan reruns only this chart, as a fragment (see
+    core.controls.fragment), with the new visible range in
+    st.session_state[key], and only that window is sent, at the finest
+    resolution that fits in max_points. Streamlit versions without
+    fragments rerun the whole script instead.
+
+    Args:
+        series (dict or pyramid): Resolution pyramids keyed by series name,
+            or a single pyramid
+        key (str): Unique widget key of the chart
+        title (str, optional): Chart title
+        y_title (str, optional): Y axis title
+        initial_range (tuple, optional): (start, end) shown before any zoom
+        height (int): Chart height in pixels
+        max_points (int): Point budget per render
+
+    Returns:
+        dict or None: The last reported view, {'range': [start, end]} or
+            {'range': None} after a reset
+    """
+    return _zoom_fragment()(series, key, title, y_title, initial_range, height, max_points)
+
+
+@lru_cache(maxsize=1)
+def _zoom_fragment():
+    from core.controls import fragment
+
+    return fragment(_draw_zoom_chart)
+
+
+def _draw_zoom_chart(series, key, title, y_title, initial_range, height, max_points):
+    import streamlit as st
+
+    if not isinstance(next(iter(series.values())), dict):
+        series = {title or key: series}
+    view = st.session_state.get(key)
+    start, end = (view['range'] or (None, None)) if view else (initial_range or (None, None))
+
+    fig, _ = zoom_figure(series, start, end, max_points, title, y_title)
+    # Keep the user's zoom across re-renders with new data
+    fig.update_layout(uirevision=key, margin={'l': 60, 'r': 20, 't': 50, 'b': 40})
+    fig = compact_arrays(fig)
+    spec = plotly.io.to_json(fig, validate=False)
+    return _zoom_component()(spec=spec, height=height, key=key, default=None)
@@ -0,0 +1,479 @@
+"""
+Industry Reports
+
+Builds one HTML and/or PDF report with a section per industry (Beef,
+Chicken, Pork, Table Eggs, Biodiesel, Agribusiness, Markets) from the
+pages themselves, so the report shows exactly the charts the dashboard
+shows.
+
+Each section is produced by running its page headlessly in a worker
+process (see core.snapshot), with tabs laid out one after another. The
+section's HTML and, for PDF, its printed pages are kept under sections/ in
+the output directory. A manifest records the datasets each section read
+with their versions and a hash of the code. On the next run only sections
+whose datasets or code changed are rendered again, in parallel, and the
+report is reassembled from the kept sections.
+
+PDF pages are drawn with matplotlib from the pages' Plotly figures (line,
+scatter, bar and heatmap traces; other trace types are left out) and bound into one file with Pillow, so no
+browser or image export service is needed.
+
+Usage:
+    python -m core.report OUTPUT_DIR [--pdf] [--no-html] [--workers N]
+        [--force] [--sections Beef Markets ...] [--interval SECONDS]
+"""
+
+import html
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from core import metrics
+from core.snapshot import (DEFAULT_TIMEOUT, PLOTLY_JS, HtmlWriter, code_hash, is_current,
+                           page_title, run_page)
+from core.warmup import page_name, page_scripts
+
+SECTIONS = ('Beef', 'Chicken', 'Pork', 'Table Eggs', 'Biodiesel', 'Agribusiness', 'Markets')
+MANIFEST = 'report.json'
+SECTIONS_DIR = 'sections'
+HTML_REPORT = 'report.html'
+PDF_REPORT = 'report.pdf'
+
+# A4 landscape, four charts per printed page
+PDF_PAGE_SIZE = (11.69, 8.27)
+PDF_DPI = 120
+CHARTS_PER_PDF_PAGE = 4
+
+PALETTE = ('#636efa', '#EF553B', '#00cc96', '#ab63fa', '#FFA15A', '#19d3f3', '#FF6692', '#B6E880')
+
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<script src="{plotly_js}"></script>
+<style>
+body {{ font-family: "Source Sans Pro", sans-serif; margin: 0 auto; max-width: 1400px; padding: 16px 48px; color: #31333f; }}
+header {{ border-bottom: 1px solid #e6e9ef; margin-bottom: 16px; }}
+.toc a {{ margin-right: 14px; color: #31333f; }}
+.industry {{ page-break-before: always; }}
+.row {{ display: flex; gap: 16px; }}
+.row > div {{ min-width: 0; }}
+.alert {{ padding: 12px 16px; border-radius: 6px; margin: 8px 0; background: #f0f2f6; }}
+.chart {{ width: 100%; min-height: 450px; }}
+</style>
+</head>
+<body>
+<header>
+<h1>{title}</h1>
+<p>Generated {generated}</p>
+<p class="toc">{contents}</p>
+</header>
+{body}
+<script>
+document.querySelectorAll('script[data-chart]').forEach(function (spec) {{
+  const figure = JSON.parse(spec.textContent);
+  Plotly.newPlot(spec.dataset.chart, figure.data, figure.layout, {{responsive: true, displaylogo: false}});
+}});
+</script>
+</body>
+</html>
+"""
+
+
+def section_scripts():
+    """Page script of every report section, keyed by section name."""
+    return {page_title(page_name(path)): path for path in page_scripts()
+            if page_title(page_name(path)) in SECTIONS}
+
+
+def _anchor(section):
+    return re.sub(r'[^a-z0-9]+', '-', section.lower()).strip('-')
+
+
+def _color(value, fallback):
+    """Plotly color string as something matplotlib accepts."""
+    if not isinstance(value, str):
+        return fallback
+    match = re.match(r'rgba?\(([^)]*)\)', value.replace(' ', ''))
+    if match:
+        parts = [float(part) for part in match.group(1).split(',')]
+        return tuple(part / 255 for part in parts[:3]) + (tuple(parts[3:4]) or (1.0,))
+    return value
+
+
+def _axis_values(values):
+    """Trace coordinates, with ISO date strings turned into dates."""
+    import pandas as pd
+
+    if not values or not isinstance(values[0], str) or not re.match(r'\d{4}-\d{2}-\d{2}', values[0]):
+        return values
+    return pd.to_datetime(pd.Series(values), format='ISO8601', errors='coerce').to_numpy()
+
+
+def _text(value):
+    if isinstance(value, dict):
+        return value.get('text')
+    return value
+
+
+def _colormap(colorscale, fallback):
+    """Plotly colorscale (a name or [position, color] pairs) as a matplotlib colormap."""
+    import matplotlib
+    from matplotlib.colors import LinearSegmentedColormap
+
+    if isinstance(colorscale, list) and colorscale:
+        return LinearSegmentedColormap.from_list(
+            'plotly', [(float(position), _color(color, 'gray')) for position, color in colorscale])
+    if isinstance(colorscale, str) and colorscale in matplotlib.colormaps:
+        return matplotlib.colormaps[colorscale]
+    return matplotlib.colormaps[fallback]
+
+
+def _draw_heatmap(ax, trace):
+    """Draw a heatmap trace as an image with its x and y categories as tick labels."""
+    import numpy as np
+
+    from matplotlib.ticker import FixedLocator, MaxNLocator
+
+    z = np.asarray(trace.get('z') or [], dtype=float)
+    if z.ndim != 2 or not z.size:
+        return
+    x, y = _axis_values(trace.get('x') or []), trace.get('y') or []
+    if isinstance(x, np.ndarray) and np.issubdtype(x.dtype, np.datetime64):
+        x = np.datetime_as_string(x, unit='D')
+    low = trace.get('zmin', np.nanmin(z) if np.isfinite(z).any() else 0.0)
+    high = trace.get('zmax', np.nanmax(z) if np.isfinite(z).any() else 1.0)
+    if trace.get('zmid') is not None:
+        spread = max(abs(low - trace['zmid']), abs(high - trace['zmid']))
+        low, high = trace['zmid'] - spread, trace['zmid'] + spread
+    # Plotly draws the first row at the bottom
+    image = ax.imshow(z, aspect='auto', origin='lower', interpolation='nearest', vmin=low, vmax=high,
+                      cmap=_colormap(trace.get('colorscale'), 'viridis'))
+    ax.figure.colorbar(image, ax=ax, fraction=0.04, pad=0.02).ax.tick_params(labelsize=7)
+    for axis, labels, count in ((ax.xaxis, x, z.shape[1]), (ax.yaxis, y, z.shape[0])):
+        if len(labels) == count:
+            locator = MaxNLocator(8, integer=True) if len(labels) > 20 else FixedLocator(range(len(labels)))
+            axis.set_major_locator(locator)
+            axis.set_major_formatter(lambda value, _, labels=labels: (
+                str(labels[int(value)]) if 0 <= int(value) < len(labels) else ''))
+    text = trace.get('text')
+    if text is not None and trace.get('texttemplate') and z.size <= 200:
+        for (row, column), value in np.ndenumerate(np.asarray(text, dtype=object).reshape(z.shape)):
+            if value is not None:
+                ax.text(column, row, str(value), ha='center', va='center', fontsize=6)
+
+
+def draw_figure(ax, figure):
+    """
+    Draw a Plotly figure's line, scatter, bar and heatmap traces on matplotlib axes
+
+    Traces of other types are skipped.
+
+    Args:
+        ax (matplotlib.axes.Axes): Target axes
+        figure (dict): Plotly figure as parsed from its JSON
+    """
+    import numpy as np
+
+    from matplotlib.ticker import MaxNLocator
+
+    layout = figure.get('layout', {})
+    colorway = layout.get('colorway') or layout.get('template', {}).get('layout', {}).get('colorway') or PALETTE
+    previous_y = None
+    stack = {}
+    labelled = 0
+    for position, trace in enumerate(figure.get('data', [])):
+        kind = trace.get('type', 'scatter')
+        if kind == 'heatmap':
+            _draw_heatmap(ax, trace)
+            continue
+        if kind not in ('scatter', 'scattergl', 'bar'):
+            continue
+        x, y = _axis_values(trace.get('x') or []), trace.get('y') or []
+        if len(y) == 0:
+            continue
+        if len(x) == 0:
+            x = np.arange(len(y))
+        fallback = colorway[position % len(colorway)]
+        label = trace.get('name') if trace.get('showlegend', True) and trace.get('name') else '_nolegend_'
+        labelled += label != '_nolegend_'
+        y = np.asarray(y, dtype=float)
+
+        if kind in ('scatter', 'scattergl'):
+            line = trace.get('line', {})
+            color = _color(line.get('color') or trace.get('marker', {}).get('color'), fallback)
+            if trace.get('fill') == 'tonexty' and previous_y is not None and len(previous_y) == len(y):
+                ax.fill_between(x, previous_y, y, color=_color(trace.get('fillcolor'), color),
+                                linewidth=0, label=label)
+            elif 'markers' in trace.get('mode', 'lines') and 'lines' not in trace.get('mode', 'lines'):
+                ax.scatter(x, y, s=8, color=color, label=label)
+            elif line.get('width', 1) != 0:
+                ax.plot(x, y, color=color, linewidth=1.2, label=label)
+            previous_y = y
+        elif kind == 'bar':
+            marker = trace.get('marker', {})
+            colors = marker.get('color')
+            colors = [_color(color, fallback) for color in colors] if isinstance(colors, list) else _color(colors, fallback)
+            width = 0.8
+            if isinstance(x, np.ndarray) and np.issubdtype(x.dtype, np.datetime64) and len(x) > 1:
+                # Bars on a date axis are as wide as the typical gap between dates
+                width = np.median(np.diff(x.astype('datetime64[D]')).astype(float)) * 0.8
+            bottom = None
+            if layout.get('barmode', 'relative') in ('stack', 'relative'):
+                key = tuple(map(str, x))
+                bottom = stack.get(key)
+                stack[key] = y if bottom is None else bottom + np.nan_to_num(y)
+            ax.bar(x, y, width=width, bottom=bottom, color=colors, label=label)
+        if isinstance(x, list) and len(x) > 12 and isinstance(x[0], str):
+            # Long category axes (quarters, months) get a label every few bars
+            ax.xaxis.set_major_locator(MaxNLocator(8, integer=True))
+
+    ax.set_title(_text(layout.get('title')) or '', fontsize=10)
+    ax.set_xlabel(_text(layout.get('xaxis', {}).get('title')) or '', fontsize=8)
+    ax.set_ylabel(_text(layout.get('yaxis', {}).get('title')) or '', fontsize=8)
+    x_range = layout.get('xaxis', {}).get('range')
+    if x_range and isinstance(x_range[0], str):
+        x_range = _axis_values(list(x_range))
+        if not np.isnat(x_range).any():
+            ax.set_xlim(x_range)
+    ax.tick_params(labelsize=7)
+    if not any(trace.get('type') == 'heatmap' for trace in figure.get('data', [])):
+        ax.grid(True, alpha=0.3)
+    if labelled > 1:
+        ax.legend(fontsize=7, frameon=False)
+
+
+def pdf_pages(section, charts, directory, stem):
+    """
+    Draw a section's charts as printed page images
+
+    Args:
+        section (str): Section name, printed as the page heading
+        charts (list): (tab label or None, Plotly JSON) pairs in page order
+        directory (Path): Where the images go
+        stem (str): File name prefix of the images
+
+    Returns:
+        list: File names of the page images, in order
+    """
+    import matplotlib
+    import matplotlib.dates
+    from matplotlib.figure import Figure
+
+    matplotlib.rcParams['date.converter'] = 'concise'
+    groups = []
+    for tab, spec in charts:
+        if not groups or groups[-1][0] != tab or len(groups[-1][1]) == CHARTS_PER_PDF_PAGE:
+            groups.append((tab, []))
+        groups[-1][1].append(spec)
+
+    names = []
+    for number, (tab, specs) in enumerate(groups, start=1):
+        fig = Figure(figsize=PDF_PAGE_SIZE, dpi=PDF_DPI)
+        fig.suptitle(f"{section} - {tab}" if tab else section, fontsize=14, x=0.04, ha='left')
+        axes = fig.subplots(2, 2).flatten()
+        for ax, spec in zip(axes, specs):
+            draw_figure(ax, json.loads(spec))
+        for ax in axes[len(specs):]:
+            ax.set_visible(False)
+        fig.subplots_adjust(left=0.07, right=0.98, top=0.9, bottom=0.07, hspace=0.35, wspace=0.18)
+        name = f"{stem}-{number:02d}.png"
+        temporary = directory / f".{name}.tmp"
+        fig.savefig(temporary, format='png')
+        os.replace(temporary, directory / name)
+        names.append(name)
+    return names
+
+
+def render_section(section, path, sections_dir, pdf=False, timeout=DEFAULT_TIMEOUT):
+    """
+    Run one section's page and keep its HTML and printed pages
+
+    Runs in a worker process, like core.snapshot.render_page.
+
+    Args:
+        section (str): Section name
+        path (str): Page script
+        sections_dir (str): Directory of the kept sections
+        pdf (bool): Also draw the printed pages
+        timeout (float): Seconds allowed for the page to run
+
+    Returns:
+        dict: 'html' and 'pages' (file names), 'inputs' (versions of the
+            datasets read), 'errors' and 'seconds'
+    """
+    start = time.perf_counter()
+    app, inputs, errors = run_page(path, timeout)
+    sections_dir = Path(sections_dir)
+    stem = _anchor(section)
+    result = {'html': None, 'pages': [], 'inputs': inputs, 'errors': errors}
+    if not errors:
+        writer = HtmlWriter(flat_tabs=True, id_prefix=f"{stem}-")
+        body = writer.children(app._tree.main)
+        temporary = sections_dir / f".{stem}.html.tmp"
+        temporary.write_text(body, encoding='utf-8')
+        os.replace(temporary, sections_dir / f"{stem}.html")
+        result['html'] = f"{stem}.html"
+        if pdf:
+            result['pages'] = pdf_pages(section, writer.charts, sections_dir, stem)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _is_fresh(record, path, pdf, sections_dir):
+    """Whether a kept section matches its page and has every file needed."""
+    if not is_current(record, path) or not record.get('html'):
+        return False
+    files = [record['html']]
+    if pdf:
+        if not record.get('pages'):
+            return False
+        files += record['pages']
+    return all((sections_dir / name).exists() for name in files)
+
+
+def build_report(output_dir, sections=SECTIONS, html_report=True, pdf_report=False, workers=None,
+                 force=False, timeout=DEFAULT_TIMEOUT):
+    """
+    Bring the report up to date, re-rendering only changed sections
+
+    Args:
+        output_dir (str or Path): Where the report, its sections and the
+            manifest go
+        sections (iterable): Section names, in report order
+        html_report (bool): Write report.html
+        pdf_report (bool): Write report.pdf
+        workers (int, optional): Worker processes, defaults to the CPU count
+        force (bool): Render every section regardless of the manifest
+        timeout (float): Seconds allowed per page
+
+    Returns:
+        dict: Section names under 'rendered', 'skipped' and 'failed'
+    """
+    output_dir = Path(output_dir)
+    sections_dir = output_dir / SECTIONS_DIR
+    sections_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    scripts = section_scripts()
+    sections = [section for section in sections if section in scripts]
+    stale = [section for section in sections
+             if force or not _is_fresh(manifest.get(section), scripts[section], pdf_report, sections_dir)]
+    result = {'rendered': [], 'skipped': [section for section in sections if section not in stale], 'failed': []}
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(stale))) as pool:
+            futures = {pool.submit(render_section, section, str(scripts[section]), str(sections_dir),
+                                   pdf_report, timeout): section
+                       for section in stale}
+            for future in as_completed(futures):
+                section = futures[future]
+                try:
+                    rendered = future.result()
+                except Exception as error:
+                    rendered = {'html': None, 'pages': [], 'inputs': {}, 'errors': [repr(error)], 'seconds': 0.0}
+                metrics.record('report_section', section, rendered['seconds'], errors=len(rendered['errors']))
+                result['failed' if rendered['errors'] else 'rendered'].append(section)
+                previous = manifest.get(section) or {}
+                manifest[section] = {
+                    'html': rendered['html'],
+                    # A failed run keeps the pages of the last good one in the report
+                    'pages': rendered['pages'] or (previous.get('pages', []) if rendered['errors'] else []),
+                    'code': code_hash(scripts[section]),
+                    'inputs': rendered['inputs'],
+                    'errors': rendered['errors'],
+                    'rendered': time.time()
+                }
+                if rendered['errors'] and previous.get('html'):
+                    manifest[section]['html'] = previous['html']
+
+    temporary = manifest_path.with_name(f".{MANIFEST}.tmp")
+    temporary.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(temporary, manifest_path)
+
+    generated = datetime.now().strftime('%Y-%m-%d %H:%M')
+    if html_report:
+        _write_html(output_dir, sections, manifest, generated)
+    if pdf_report:
+        _write_pdf(output_dir, sections, manifest)
+    return result
+
+
+def _write_html(output_dir, sections, manifest, generated):
+    import plotly
+
+    plotly_js = output_dir / PLOTLY_JS
+    if not plotly_js.exists():
+        shutil.copyfile(Path(plotly.__file__).parent / 'package_data' / PLOTLY_JS, plotly_js)
+
+    parts = []
+    for section in sections:
+        name = (manifest.get(section) or {}).get('html')
+        if not name or not (output_dir / SECTIONS_DIR / name).exists():
+            body = '<div class="alert">This section could not be rendered.</div>'
+        else:
+            body = (output_dir / SECTIONS_DIR / name).read_text(encoding='utf-8')
+        parts.append(f'<section class="industry" id="{_anchor(section)}">{body}</section>')
+
+    contents = ''.join(f'<a href="#{_anchor(section)}">{html.escape(section)}</a>' for section in sections)
+    document = REPORT_TEMPLATE.format(title='Industry Report', plotly_js=PLOTLY_JS, generated=generated,
+                                      contents=contents, body='\n'.join(parts))
+    temporary = output_dir / f".{HTML_REPORT}.tmp"
+    temporary.write_text(document, encoding='utf-8')
+    os.replace(temporary, output_dir / HTML_REPORT)
+
+
+def _write_pdf(output_dir, sections, manifest):
+    from PIL import Image
+
+    files = [output_dir / SECTIONS_DIR / name
+             for section in sections for name in (manifest.get(section) or {}).get('pages', [])]
+    files = [path for path in files if path.exists()]
+    if not files:
+        return
+    images = [Image.open(path).convert('RGB') for path in files]
+    temporary = output_dir / f".{PDF_REPORT}.tmp"
+    images[0].save(temporary, format='PDF', save_all=True, append_images=images[1:], resolution=PDF_DPI)
+    os.replace(temporary, output_dir / PDF_REPORT)
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Build the industry report")
+    parser.add_argument('output_dir', help="Directory to write the report to")
+    parser.add_argument('--pdf', action='store_true', help="Also write report.pdf")
+    parser.add_argument('--no-html', action='store_true', help="Do not write report.html")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="Render sections even if nothing changed")
+    parser.add_argument('--sections', nargs='*', default=list(SECTIONS), help="Section names, in order")
+    parser.add_argument('--interval', type=float, default=None,
+                        help="Keep running and rebuild every this many seconds")
+    args = parser.parse_args()
+
+    # Call through the imported module: workers unpickle render_section by
+    # module name, and AppTest replaces __main__ inside them
+    from core import report
+
+    while True:
+        start = time.perf_counter()
+        result = report.build_report(args.output_dir, args.sections, not args.no_html, args.pdf,
+                                     args.workers, args.force)
+        print(f"{datetime.now():%Y-%m-%d %H:%M} Rendered {len(result['rendered'])}, skipped "
+              f"{len(result['skipped'])} unchanged, failed {len(result['failed'])} "
+              f"in {time.perf_counter() - start:.1f}s")
+        for section in result['failed']:
+            print(f"FAILED {section}")
+        if args.interval is None:
+            sys.exit(1 if result['failed'] else 0)
+        args.force = False
+        time.sleep(args.interval)
@@ -0,0 +1,313 @@
+"""
+Dataset Schemas
+
+A registry of the canonical form of the datasets the analyses read: their
+columns, dtypes, units and frequency. Datasets are normalized to it once,
+when they are ingested (core.nass) or migrated (python -m core.schema),
+so the analyses and pages read typed columns directly instead of looking
+for 'Value', 'year' or 'reference_period_desc' and converting '1,234'
+strings on every run.
+
+Canonical datasets have one row per period, sorted by Date:
+
+- weekly: Year, Week, Date (the week ending when published), measures
+- monthly: Year, Month ('JAN'...'DEC'), Date (first of the month), measures
+
+read_normalized() returns a dataset in its canonical form. A stored dataset
+that is not normalized yet is converted on the fly, with a warning, until
+it is migrated.
+"""
+
+import logging
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from core.agcalendar import MONTH_ABBR, month_number, month_to_date, nass_week_number, week_to_date
+from core.storage import dataset_exists, get_backend, read_dataset
+
+logger = logging.getLogger('dashboard.schema')
+
+FREQUENCY_KEYS = {'weekly': ('Year', 'Week'), 'monthly': ('Year', 'Month')}
+
+DTYPES = {'int': 'int64', 'float': 'float64', 'str': 'object', 'date': 'datetime64[ns]'}
+
+
+class SchemaError(ValueError):
+    """Raised when a dataset cannot be brought to its canonical form."""
+
+
+@dataclass(frozen=True)
+class Column:
+    """
+    One canonical column
+
+    Attributes:
+        name (str): Column name
+        dtype (str): 'int', 'float', 'str' or 'date'
+        unit (str): Unit of the values, empty for keys and dates
+    """
+    name: str
+    dtype: str
+    unit: str = ''
+
+
+@dataclass(frozen=True)
+class Schema:
+    """
+    Canonical form of a dataset
+
+    Attributes:
+        name (str): Dataset name
+        frequency (str): 'weekly', 'monthly' or None for datasets that are
+            not a plain series (their columns are only typed)
+        measures (tuple): Column entries of the values
+        dates (tuple): Extra date columns besides Date
+    """
+    name: str
+    frequency: str
+    measures: tuple
+    dates: tuple = ()
+
+    @property
+    def keys(self):
+        """Columns identifying a period."""
+        return FREQUENCY_KEYS.get(self.frequency, ())
+
+    @property
+    def columns(self):
+        """Every canonical column, in order."""
+        keys = [Column('Year', 'int'), Column('Week', 'int') if self.frequency == 'weekly' else Column('Month', 'str')]
+        return (tuple(keys if self.frequency else ()) + (Column('Date', 'date'),)
+                + tuple(Column(name, 'date') for name in self.dates) + self.measures)
+
+
+def _weekly(name, measure, unit):
+    return Schema(name, 'weekly', (Column(measure, 'float', unit),))
+
+
+def _monthly(name, *measures):
+    return Schema(name, 'monthly', tuple(Column(measure, 'float', unit) for measure, unit in measures))
+
+
+SCHEMAS = {schema.name: schema for schema in (
+    _weekly('US_BROILER_EGG_SET_WEEKLY', 'Eggs Set', '1000 eggs'),
+    _weekly('US_CHICKEN_PLACEMENTS_WEEKLY', 'Placements', '1000 head'),
+    _monthly('US_BROILER_HATCHING_EGGS_MONTHLY', ('Hatching Eggs', '1000 eggs')),
+    _monthly('US_BROILER_BREEDER_HERD_MONTHLY', ('Layer_Herd', '1000 head')),
+    _monthly('US_PULLET_PLACEMENTS_MONTHLY', ('Pullet Placements', '1000 head')),
+    _monthly('US_CHICKEN_SLAUGHTER_MONTHLY', ('Heads', 'head'), ('Weight', 'lb live weight')),
+    Schema('US_PULLET_CUMULATIVE_POTENTIAL_PLACEMENTS', None,
+           (Column('Cumulative_Potential_Placements', 'float', '1000 head'),),
+           dates=('Start_Date', 'Projected_Date')),
+)}
+
+
+def get_schema(name):
+    """
+    The registered schema of a dataset
+
+    Args:
+        name (str): Dataset name
+
+    Returns:
+        Schema: Its schema
+
+    Raises:
+        SchemaError: If the dataset is not registered
+    """
+    try:
+        return SCHEMAS[name]
+    except KeyError:
+        raise SchemaError(f"No schema registered for dataset {name}") from None
+
+
+def parse_values(values):
+    """
+    Parse NASS values such as '1,234' or ' (D)' through their distinct labels
+
+    Args:
+        values (array-like): Value strings or numbers
+
+    Returns:
+        numpy.ndarray: Floats, NaN for withheld or missing values ('(D)',
+            '(NA)', '(Z)', ...)
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    codes, uniques = pd.factorize(values, sort=False)
+    table = pd.to_numeric(pd.Series(uniques, dtype=object).astype(str).str.replace(',', '').str.strip(),
+                          errors='coerce').to_numpy(dtype=float)
+    result = np.full(len(codes), np.nan)
+    valid = codes >= 0
+    result[valid] = table[codes[valid]]
+    return result
+
+
+def is_normalized(df, schema):
+    """Whether a frame already has exactly the canonical columns and dtypes."""
+    columns = schema.columns
+    return (list(df.columns) == [column.name for column in columns]
+            and all(str(df[column.name].dtype) == DTYPES[column.dtype] for column in columns))
+
+
+def _raw_columns(df, schema):
+    """Rename the raw NASS export columns ('year', 'Value') to canonical names."""
+    df = df.rename(columns={'year': 'Year'}) if 'Year' not in df.columns else df
+    if 'Value' in df.columns and len(schema.measures) == 1 and schema.measures[0].name not in df.columns:
+        df = df.rename(columns={'Value': schema.measures[0].name})
+    return df
+
+
+def _period_columns(df, schema):
+    """Week or Month and Date, derived from the NASS period when missing."""
+    if schema.frequency == 'weekly':
+        if 'Week' not in df.columns and 'reference_period_desc' in df.columns:
+            df['Week'] = nass_week_number(df['reference_period_desc'])
+        if 'Date' in df.columns:
+            df['Date'] = pd.to_datetime(df['Date'], errors='coerce', format='ISO8601')
+        else:
+            df['Date'] = pd.to_datetime(df.get('week_ending'), errors='coerce')
+        missing = df['Date'].isna()
+        if missing.any() and 'Year' in df.columns and 'Week' in df.columns:
+            # Weeks published without a week ending are dated from the week number
+            year = pd.to_numeric(df['Year'], errors='coerce')
+            df.loc[missing, 'Date'] = week_to_date(year[missing], df.loc[missing, 'Week'])
+    elif schema.frequency == 'monthly':
+        if 'Month' not in df.columns and 'reference_period_desc' in df.columns:
+            df['Month'] = df['reference_period_desc']
+        if 'Month' in df.columns:
+            numbers = month_number(df['Month'])
+            df['Month'] = numbers.map(lambda number: MONTH_ABBR[number - 1].upper(), na_action='ignore')
+            if 'Date' not in df.columns and 'Year' in df.columns:
+                df['Date'] = month_to_date(pd.to_numeric(df['Year'], errors='coerce'), numbers)
+    return df
+
+
+def normalize(name, df):
+    """
+    Bring a dataset to its canonical form
+
+    Accepts the raw NASS export layout (year, reference_period_desc,
+    week_ending, Value with thousands separators) as well as frames that are
+    already canonical, e.g. read back from CSV with untyped dates. Rows
+    whose period cannot be parsed are dropped with a warning; withheld
+    values become NaN.
+
+    Args:
+        name (str): Dataset name
+        df (pandas.DataFrame): Dataset as stored or downloaded
+
+    Returns:
+        pandas.DataFrame: Canonical columns only, typed, sorted by Date
+
+    Raises:
+        SchemaError: If a canonical column is missing and cannot be derived,
+            or a key or date column cannot be converted
+    """
+    schema = get_schema(name)
+    if is_normalized(df, schema):
+        return df
+
+    df = _period_columns(_raw_columns(df.copy(), schema), schema)
+    missing = [column.name for column in schema.columns if column.name not in df.columns]
+    if missing:
+        raise SchemaError(f"Dataset {name} has no {missing} columns (columns: {df.columns.tolist()})")
+
+    df = df[[column.name for column in schema.columns]].copy()
+    for column in schema.columns:
+        values = df[column.name]
+        if column.dtype == 'date':
+            df[column.name] = pd.to_datetime(values, errors='coerce', format='ISO8601')
+        elif column.dtype == 'float':
+            df[column.name] = parse_values(values)
+        elif column.dtype == 'int':
+            df[column.name] = pd.to_numeric(values, errors='coerce')
+
+    required = [*schema.keys, 'Date']
+    invalid = df[required].isna().any(axis=1)
+    if invalid.all() and len(df):
+        raise SchemaError(f"Dataset {name} has no row with a valid {required}")
+    if invalid.any():
+        logger.warning("Dropped %d rows of %s without a valid %s", invalid.sum(), name, required)
+        df = df[~invalid]
+
+    df = df.astype({column.name: DTYPES[column.dtype] for column in schema.columns if column.dtype != 'date'})
+    if schema.keys:
+        df = df.drop_duplicates(list(schema.keys), keep='last')
+    return df.sort_values('Date', kind='stable').reset_index(drop=True)
+
+
+_warned = set()
+
+
+def read_normalized(name):
+    """
+    Read a registered dataset in its canonical form
+
+    Args:
+        name (str): Dataset name
+
+    Returns:
+        pandas.DataFrame: The canonical dataset
+
+    Raises:
+        SchemaError: If the stored dataset cannot be normalized
+    """
+    schema = get_schema(name)
+    df = read_dataset(name)
+    if set(df.columns) != {column.name for column in schema.columns} and name not in _warned:
+        _warned.add(name)
+        logger.warning("Dataset %s is not normalized, converting it on every read; "
+                       "run python -m core.schema to store it normalized", name)
+    return normalize(name, df)
+
+
+def normalize_datasets(names=None, check=False):
+    """
+    Store registered datasets in their canonical form
+
+    Args:
+        names (list, optional): Dataset names, defaults to every registered
+            dataset that exists
+        check (bool): Only report, do not write
+
+    Returns:
+        dict: 'normalized', 'unchanged' or an error message by dataset name
+    """
+    backend = get_backend()
+    results = {}
+    for name in names or [name for name in SCHEMAS if dataset_exists(name)]:
+        try:
+            stored = read_dataset(name)
+            df = normalize(name, stored)
+        except (SchemaError, FileNotFoundError) as e:
+            results[name] = f"error: {e}"
+            continue
+        if list(stored.columns) == list(df.columns) and len(stored) == len(df):
+            results[name] = 'unchanged'
+            continue
+        if not check:
+            backend.write_frame(name, df)
+        results[name] = 'normalized'
+    return results
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Store datasets in their canonical form")
+    parser.add_argument('names', nargs='*', help="Dataset names, defaults to every registered one")
+    parser.add_argument('--check', action='store_true', help="Only report datasets that are not normalized")
+    args = parser.parse_args()
+
+    results = normalize_datasets(args.names, args.check)
+    for name, result in results.items():
+        print(f"{name}: {'not normalized' if args.check and result == 'normalized' else result}")
+    return 1 if any(result.startswith('error') for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
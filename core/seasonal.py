@@ -0,0 +1,268 @@
+"""
+Seasonal Comparisons
+
+Year-over-year views of any dated series: each observation is placed by
+its season year and its period within the season (month, quarter, week or
+day, for seasons starting in any month), and the series is reshaped into a
+season x period table in one vectorized step. From that table come:
+
+- the lines of the latest seasons, for year-overlay charts
+- min/max/mean bands over the previous seasons (5 by default)
+- the current season against the last one, period by period
+
+Pages get a seasonal chart from a dataset column in one call, and keep the
+view in one of their @cached loaders, so it is cached until the dataset
+changes and weighted by the page's usage:
+
+    @cached
+    def load_consecana():
+        return seasonal_dataset('BR_CONSECANA_ACC', 'BR_CONSECANA_ACC', start_month=4)
+
+    plotly_chart(seasonal_figure(load_consecana(), 'Brazil CONSECANA Accumulated'))
+"""
+
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from core.agcalendar import month_to_date, season_month, season_month_labels, season_year
+from core.storage import read_dataset
+
+# Periods per season, by frequency
+PERIODS = {'D': 366, 'W': 53, 'M': 12, 'Q': 4}
+
+BAND_YEARS = 5
+
+
+@dataclass(frozen=True)
+class Seasonal:
+    """
+    Seasonal view of a series
+
+    Attributes:
+        table (pandas.DataFrame): Season years x period labels
+        bands (pandas.DataFrame): min, max and mean of each period over the
+            band seasons, indexed by period label
+        band_seasons (list): Season years the bands cover
+        delta (pandas.DataFrame): Current, Last Year, Change and Change (%)
+            of each period, indexed by period label
+        current (int): Latest season year
+        frequency (str): 'D', 'W', 'M' or 'Q'
+        start_month (int): First month of the season
+    """
+    table: pd.DataFrame
+    bands: pd.DataFrame
+    band_seasons: list
+    delta: pd.DataFrame
+    current: int
+    frequency: str
+    start_month: int
+
+    def season_label(self, year):
+        """'2024' for calendar years, '2024/25' for seasons starting later in the year."""
+        return str(year) if self.start_month == 1 else f"{year}/{(year + 1) % 100:02d}"
+
+
+def period_labels(frequency='M', start_month=1):
+    """
+    Labels of the periods of a season, in season order
+
+    Args:
+        frequency (str): 'D', 'W', 'M' or 'Q'
+        start_month (int): First month of the season (1-12)
+
+    Returns:
+        list: Month abbreviations, 'Q1'..'Q4', 'W1'..'W53' or day numbers
+    """
+    if frequency == 'M':
+        return season_month_labels(start_month)
+    if frequency == 'Q':
+        return [f"Q{quarter}" for quarter in range(1, 5)]
+    if frequency == 'W':
+        return [f"W{week}" for week in range(1, 54)]
+    if frequency == 'D':
+        return list(range(1, 367))
+    raise ValueError(f"Unknown seasonal frequency {frequency!r}, use one of {sorted(PERIODS)}")
+
+
+def season_periods(dates, frequency='M', start_month=1):
+    """
+    Season year and period within the season of each date
+
+    Weeks and days are counted from the first day of the season, so week 1
+    of a season starting in April is April 1-7.
+
+    Args:
+        dates (array-like): Dates
+        frequency (str): 'D', 'W', 'M' or 'Q'
+        start_month (int): First month of the season (1-12)
+
+    Returns:
+        tuple: Season years and 1-based periods, as int64 arrays
+    """
+    if frequency not in PERIODS:
+        raise ValueError(f"Unknown seasonal frequency {frequency!r}, use one of {sorted(PERIODS)}")
+    dates = pd.Series(pd.to_datetime(dates))
+    years = season_year(dates, start_month).to_numpy(dtype=np.int64)
+    if frequency in ('M', 'Q'):
+        months = season_month(dates, start_month).to_numpy(dtype=np.int64)
+        return years, months if frequency == 'M' else (months - 1) // 3 + 1
+    starts = month_to_date(years, np.full(len(years), start_month))
+    days = (dates.to_numpy(dtype='datetime64[D]') - starts.to_numpy(dtype='datetime64[D]')).astype(np.int64)
+    return years, days // 7 + 1 if frequency == 'W' else days + 1
+
+
+def pivot(series, frequency='M', start_month=1, how='mean'):
+    """
+    Reshape a dated series into a season x period table
+
+    Observations falling in the same period (e.g. daily prices in a monthly
+    view) are combined with how.
+
+    Args:
+        series (pandas.Series): Values indexed by date
+        frequency (str): 'D', 'W', 'M' or 'Q'
+        start_month (int): First month of the season (1-12)
+        how (str): 'mean', 'sum' or 'last'
+
+    Returns:
+        pandas.DataFrame: Season years x period labels, NaN for periods
+            without observations
+    """
+    series = series.dropna().sort_index()
+    labels = period_labels(frequency, start_month)
+    if series.empty:
+        return pd.DataFrame(columns=labels, dtype=np.float64)
+    years, periods = season_periods(series.index, frequency, start_month)
+    values = series.to_numpy(dtype=np.float64)
+
+    first = years.min()
+    seasons = years.max() - first + 1
+    cells = seasons * len(labels)
+    codes = (years - first) * len(labels) + periods - 1
+    counts = np.bincount(codes, minlength=cells)
+    if how == 'last':
+        table = np.full(cells, np.nan)
+        # Last observation of each cell: first occurrence in reversed date order
+        reversed_codes = codes[::-1]
+        unique, position = np.unique(reversed_codes, return_index=True)
+        table[unique] = values[::-1][position]
+    elif how in ('mean', 'sum'):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            table = np.bincount(codes, weights=values, minlength=cells)
+            if how == 'mean':
+                table = table / counts
+        table[counts == 0] = np.nan
+    else:
+        raise ValueError(f"Unknown aggregation {how!r}, use 'mean', 'sum' or 'last'")
+    return pd.DataFrame(table.reshape(seasons, len(labels)), index=pd.RangeIndex(first, first + seasons, name='Season'),
+                        columns=labels)
+
+
+def seasonal(series, frequency='M', start_month=1, how='mean', band_years=BAND_YEARS):
+    """
+    Seasonal view of a series: season table, bands and current vs last year
+
+    Args:
+        series (pandas.Series): Values indexed by date
+        frequency (str): 'D', 'W', 'M' or 'Q'
+        start_month (int): First month of the season (1-12)
+        how (str): How observations in one period are combined, 'mean',
+            'sum' or 'last'
+        band_years (int): Seasons before the current one in the bands
+
+    Returns:
+        Seasonal: The view; the current season is the latest with data
+    """
+    table = pivot(series, frequency, start_month, how)
+    current = int(table.index.max()) if len(table) else None
+    if current is None:
+        empty = pd.DataFrame(index=table.columns, dtype=np.float64)
+        return Seasonal(table, empty, [], empty, current, frequency, start_month)
+
+    band_seasons = [year for year in range(current - band_years, current) if year in table.index]
+    bands = pd.DataFrame(np.nan, index=table.columns, columns=['min', 'max', 'mean'])
+    if band_seasons:
+        values = table.loc[band_seasons].to_numpy()
+        with warnings.catch_warnings():
+            # Periods without data in any band season stay NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            bands['min'], bands['max'], bands['mean'] = (np.nanmin(values, axis=0), np.nanmax(values, axis=0),
+                                                         np.nanmean(values, axis=0))
+
+    this_year = table.loc[current]
+    last_year = table.loc[current - 1] if current - 1 in table.index else pd.Series(np.nan, index=table.columns)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        delta = pd.DataFrame({'Current': this_year, 'Last Year': last_year,
+                              'Change': this_year - last_year,
+                              'Change (%)': (this_year / last_year - 1) * 100})
+    return Seasonal(table, bands, band_seasons, delta, current, frequency, start_month)
+
+
+def seasonal_dataset(name, column, date_column='DATE', frequency='M', start_month=1, how='mean',
+                     band_years=BAND_YEARS):
+    """
+    Seasonal view of a dataset column
+
+    Args:
+        name (str): Dataset name
+        column (str): Value column
+        date_column (str): Date column
+        frequency, start_month, how, band_years: As in seasonal()
+
+    Returns:
+        Seasonal: The view
+    """
+    df = read_dataset(name)
+    series = pd.Series(df[column].to_numpy(dtype=np.float64), index=pd.to_datetime(df[date_column]))
+    return seasonal(series, frequency, start_month, how, band_years)
+
+
+def seasonal_figure(view, title, y_title=None, seasons=3, bands=True):
+    """
+    Year-overlay chart of a seasonal view
+
+    Args:
+        view (Seasonal): View from seasonal() or seasonal_dataset()
+        title (str): Chart title
+        y_title (str, optional): Y axis title
+        seasons (int): Latest seasons drawn as lines
+        bands (bool): Shade the min-max band and draw the mean of the
+            band seasons
+
+    Returns:
+        plotly.graph_objects.Figure: The chart
+    """
+    import plotly.graph_objects as go
+
+    labels = list(view.table.columns)
+    fig = go.Figure()
+    if bands and view.band_seasons:
+        span = (f"{view.season_label(view.band_seasons[0])}-{view.season_label(view.band_seasons[-1])}"
+                if len(view.band_seasons) > 1 else view.season_label(view.band_seasons[0]))
+        fig.add_trace(go.Scatter(x=labels, y=view.bands['max'], mode='lines', line=dict(width=0),
+                                 hoverinfo='skip', showlegend=False))
+        fig.add_trace(go.Scatter(x=labels, y=view.bands['min'], mode='lines', line=dict(width=0),
+                                 fill='tonexty', fillcolor='rgba(128, 128, 128, 0.2)',
+                                 name=f"Range {span}"))
+        fig.add_trace(go.Scatter(x=labels, y=view.bands['mean'], mode='lines',
+                                 line=dict(color='gray', dash='dot'), name=f"Average {span}"))
+    for year in view.table.index[-seasons:]:
+        fig.add_trace(go.Scatter(x=labels, y=view.table.loc[year], mode='lines+markers',
+                                 name=view.season_label(year),
+                                 line=dict(width=3 if year == view.current else 2)))
+
+    x_title = {'M': 'Month', 'Q': 'Quarter', 'W': 'Week', 'D': 'Day of Season'}[view.frequency]
+    if view.frequency == 'M' and view.start_month != 1:
+        x_title = f"Month ({labels[0]} to {labels[-1]})"
+    fig.update_layout(
+        title=title,
+        xaxis_title=x_title,
+        yaxis_title=y_title,
+        legend_title='Year' if view.start_month == 1 else 'Season',
+        hovermode='x unified',
+        xaxis={'categoryorder': 'array', 'categoryarray': labels} if view.frequency != 'D' else {}
+    )
+    return fig
@@ -0,0 +1,421 @@
+"""
+Static Snapshots
+
+Renders Home.py and every page into self-contained static HTML, so
+read-only viewers can be served by any static file server instead of the
+Streamlit process.
+
+Each page is executed headlessly (streamlit's AppTest) in a worker process,
+against the configured datasets, and its element tree is written out as
+HTML: headings, markdown, alerts, columns, tabs and expanders become plain
+HTML and every chart becomes its Plotly JSON plus a call to plotly.js,
+which is copied next to the pages. Zoom charts are exported at the
+resolution of their initial view.
+
+A manifest records, for every page, the datasets it read with their
+versions and a hash of the code that rendered it. A page is rendered again
+only when one of those changed.
+
+Usage:
+    python -m core.snapshot OUTPUT_DIR [--workers N] [--force] [--only PAGE ...]
+"""
+
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from core import metrics
+from core.storage import DatasetNotFoundError, REPO_ROOT, dataset_version
+from core.warmup import page_name, page_scripts
+
+MANIFEST = 'manifest.json'
+PLOTLY_JS = 'plotly.min.js'
+DEFAULT_TIMEOUT = 120
+
+# Streamlit's plotly theme writes placeholder colors ('#000001' ...) into
+# figures and its frontend swaps them for the theme's colors; these are the
+# light theme values
+THEME_COLORS = dict(zip(
+    [f"#{number:06d}" for number in range(1, 41) if number != 35],
+    # categorical
+    ['#0068c9', '#83c9ff', '#ff2b2b', '#ffabab', '#29b09d', '#7defa1', '#ff8700', '#ffd16a', '#6d3fc0', '#d5dae5']
+    # sequential
+    + ['#e4f5ff', '#c7ebff', '#a6dcff', '#83c9ff', '#60b4ff', '#3d9df3', '#1c83e1', '#0068c9', '#0054a3', '#004280']
+    # diverging
+    + ['#7d353b', '#bd4043', '#ff4b4b', '#ff8c8c', '#ffc7c7', '#f0f2f6', '#a6dcff', '#60b4ff', '#1c83e1',
+       '#0054a3', '#004280']
+    # increasing, decreasing, total, gray 70, gray 90, background, faded text, background mix
+    + ['#29b09d', '#ff2b2b', '#0068c9', '#808495', '#31333f', '#ffffff', 'rgba(49, 51, 63, 0.1)',
+       'rgba(248, 249, 251, 1)']
+))
+THEME_COLOR_PATTERN = re.compile(r'#0000[0-4][0-9]\b')
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{title}</title>
+<script src="{plotly_js}"></script>
+<style>
+body {{ font-family: "Source Sans Pro", sans-serif; margin: 0; color: #31333f; }}
+nav {{ background: #f0f2f6; padding: 10px 24px; }}
+nav a {{ margin-right: 14px; color: #31333f; text-decoration: none; }}
+nav a.current {{ font-weight: bold; }}
+main {{ padding: 16px 48px; }}
+.row {{ display: flex; gap: 16px; }}
+.row > div {{ min-width: 0; }}
+.alert {{ padding: 12px 16px; border-radius: 6px; margin: 8px 0; }}
+.alert-info {{ background: #e7f0fb; }} .alert-warning {{ background: #fffce7; }}
+.alert-error {{ background: #fdecec; }} .alert-success {{ background: #e8f6ec; }}
+.tabs > button {{ border: none; background: none; padding: 8px 12px; cursor: pointer; font-size: 15px; }}
+.tabs > button.active {{ border-bottom: 2px solid #ff4b4b; color: #ff4b4b; }}
+.tab-panel {{ display: none; }} .tab-panel.active {{ display: block; }}
+.chart {{ width: 100%; min-height: 450px; }}
+footer {{ color: #808495; font-size: 12px; padding: 16px 48px; }}
+</style>
+</head>
+<body>
+<nav>{navigation}</nav>
+<main>
+{body}
+</main>
+<footer>Snapshot rendered {rendered}</footer>
+<script>
+document.querySelectorAll('script[data-chart]').forEach(function (spec) {{
+  const figure = JSON.parse(spec.textContent);
+  Plotly.newPlot(spec.dataset.chart, figure.data, figure.layout, {{responsive: true, displaylogo: false}});
+}});
+document.querySelectorAll('.tabs > button').forEach(function (button) {{
+  button.addEventListener('click', function () {{
+    const group = button.parentElement;
+    group.querySelectorAll(':scope > button').forEach(function (other) {{ other.classList.remove('active'); }});
+    group.parentElement.querySelectorAll(':scope > .tab-panel').forEach(function (panel) {{
+      panel.classList.toggle('active', panel.id === button.dataset.panel);
+    }});
+    button.classList.add('active');
+    // Charts drawn while hidden need their width recomputed
+    document.getElementById(button.dataset.panel).querySelectorAll('.chart').forEach(function (chart) {{
+      Plotly.Plots.resize(chart);
+    }});
+  }});
+}});
+</script>
+</body>
+</html>
+"""
+
+
+def output_name(page):
+    """File name of a page snapshot; Home becomes index.html."""
+    return 'index.html' if page == 'Home' else f"{page}.html"
+
+
+def page_title(page):
+    """Human readable name of a page, e.g. 'Sugar & Ethanol'."""
+    if page == 'Home':
+        return 'Home'
+    number, _, name = page.partition('_')
+    return (name if number.isdigit() else page).replace('_', ' ')
+
+
+def code_hash(path):
+    """
+    Hash of a page and the shared code it runs with
+
+    Args:
+        path (Path): Page script
+
+    Returns:
+        str: Hex digest that changes when the page or core/ changes
+    """
+    digest = hashlib.md5(Path(path).read_bytes())
+    core_dir = REPO_ROOT / 'core'
+    for source in sorted(list(core_dir.rglob('*.py')) + list(core_dir.rglob('*.html'))):
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+class HtmlWriter:
+    """
+    Turns an AppTest element tree into HTML
+
+    Args:
+        flat_tabs (bool): Write tabs one after another under their label
+            instead of as clickable tabs, e.g. for printed reports
+        id_prefix (str): Prefix of element ids, to combine several pages
+            in one document
+    """
+
+    def __init__(self, flat_tabs=False, id_prefix=''):
+        from markdown_it import MarkdownIt
+
+        self._markdown = MarkdownIt('commonmark', {'html': False}).enable('table')
+        self._markdown_html = MarkdownIt('commonmark', {'html': True}).enable('table')
+        self._ids = 0
+        self._id_prefix = id_prefix
+        self._flat_tabs = flat_tabs
+        self._tab = None
+        # (tab label or None, Plotly JSON) of every chart written
+        self.charts = []
+
+    def _next_id(self, prefix):
+        self._ids += 1
+        return f"{self._id_prefix}{prefix}-{self._ids}"
+
+    def chart(self, spec):
+        spec = THEME_COLOR_PATTERN.sub(lambda match: THEME_COLORS.get(match.group(0), match.group(0)), spec)
+        self.charts.append((self._tab, spec))
+        chart_id = self._next_id('chart')
+        # Plotly JSON already escapes '<', so it can sit inside a script tag
+        return (f'<div class="chart" id="{chart_id}"></div>'
+                f'<script type="application/json" data-chart="{chart_id}">{spec}</script>')
+
+    def children(self, node):
+        return '\n'.join(self.node(child) for _, child in sorted(node.children.items()))
+
+    def node(self, node):
+        kind = getattr(node, 'type', '')
+        if kind in ('title', 'header', 'subheader'):
+            level = {'title': 1, 'header': 2, 'subheader': 3}[kind]
+            return f"<h{level}>{html.escape(node.value)}</h{level}>"
+        if kind == 'markdown':
+            renderer = self._markdown_html if node.proto.allow_html else self._markdown
+            return renderer.render(node.value)
+        if kind == 'divider':
+            return '<hr>'
+        if kind == 'caption':
+            return f'<p><small>{self._markdown.renderInline(node.value)}</small></p>'
+        if kind in ('info', 'warning', 'error', 'success'):
+            return f'<div class="alert alert-{kind}">{self._markdown.render(node.value)}</div>'
+        if kind == 'metric':
+            return (f'<div class="metric"><div>{html.escape(node.label)}</div>'
+                    f'<div style="font-size:2em">{html.escape(node.value)}</div></div>')
+        if kind == 'dataframe':
+            return node.value.to_html(index=False, border=0, classes='dataframe')
+        if kind == 'plotly_chart':
+            # Streamlit 1.37 moved the figure JSON from figure.spec to spec
+            return self.chart(getattr(node.proto, 'spec', '') or node.proto.figure.spec)
+        if kind == 'component_instance':
+            spec = json.loads(node.proto.json_args or '{}').get('spec')
+            return self.chart(spec) if spec else ''
+        if kind == 'horizontal':
+            return f'<div class="row">{self.columns(node)}</div>'
+        if kind == 'tab_container':
+            return self.tabs(node)
+        if kind == 'expander':
+            return f"<details><summary>{html.escape(node.label)}</summary>{self.children(node)}</details>"
+        if kind in ('iframe', 'radio'):
+            # Browser-side helpers such as the usage tracker, and chart controls, have no place in a snapshot
+            return ''
+        if getattr(node, 'children', None):
+            return self.children(node)
+        return f"<!-- {html.escape(kind or type(node).__name__)} not exported -->"
+
+    def columns(self, node):
+        parts = []
+        for _, column in sorted(node.children.items()):
+            weight = getattr(column, 'weight', 1) or 1
+            parts.append(f'<div style="flex: {weight}">{self.children(column)}</div>')
+        return ''.join(parts)
+
+    def tabs(self, node):
+        tabs = [tab for _, tab in sorted(node.children.items())]
+        if self._flat_tabs:
+            return ''.join(f"<section><h2>{html.escape(tab.label)}</h2>{self.tab(tab)}</section>"
+                           for tab in tabs)
+        ids = [self._next_id('tab') for _ in tabs]
+        buttons = ''.join(
+            f'<button data-panel="{tab_id}"{" class=active" if position == 0 else ""}>{html.escape(tab.label)}</button>'
+            for position, (tab_id, tab) in enumerate(zip(ids, tabs)))
+        panels = ''.join(
+            f'<div class="tab-panel{" active" if position == 0 else ""}" id="{tab_id}">{self.tab(tab)}</div>'
+            for position, (tab_id, tab) in enumerate(zip(ids, tabs)))
+        return f'<div class="tab-group"><div class="tabs">{buttons}</div>{panels}</div>'
+
+    def tab(self, tab):
+        outer, self._tab = self._tab, tab.label
+        try:
+            return self.children(tab)
+        finally:
+            self._tab = outer
+
+
+def run_page(path, timeout=DEFAULT_TIMEOUT):
+    """
+    Execute one page headlessly
+
+    Must run in a worker process: AppTest swaps streamlit's runtime, so it
+    must not share a process with a live server.
+
+    Args:
+        path (str): Page script
+        timeout (float): Seconds allowed for the page to run
+
+    Returns:
+        tuple: (AppTest after the run, versions of the datasets read,
+            error messages)
+    """
+    from streamlit.testing.v1 import AppTest
+
+    # Snapshot runs are not visits and must not start background services
+    os.environ['DASHBOARD_USAGE'] = '0'
+    os.environ.pop('DASHBOARD_WARMUP', None)
+
+    metrics.clear()
+    app = AppTest.from_file(str(path), default_timeout=timeout).run()
+    errors = [exception.message for exception in app.exception]
+
+    # Loaders served from the artifact disk cache read no dataset but report their inputs
+    names = [entry['name'] for entry in metrics.recent('dataset_load')]
+    names += [name for entry in metrics.recent('artifact_disk_load') for name in entry['datasets']]
+    inputs = {}
+    for name in dict.fromkeys(names):
+        try:
+            inputs[name] = dataset_version(name)
+        except DatasetNotFoundError:
+            inputs[name] = None
+    return app, inputs, errors
+
+
+def render_page(path, timeout=DEFAULT_TIMEOUT):
+    """
+    Execute one page headlessly and convert it to HTML
+
+    Args:
+        path (str): Page script
+        timeout (float): Seconds allowed for the page to run
+
+    Returns:
+        dict: 'body' (HTML), 'inputs' (versions of the datasets read),
+            'errors' and 'seconds'
+    """
+    start = time.perf_counter()
+    app, inputs, errors = run_page(path, timeout)
+    body = HtmlWriter().children(app._tree.main)
+    return {'body': body, 'inputs': inputs, 'errors': errors, 'seconds': time.perf_counter() - start}
+
+
+def is_current(record, path):
+    """Whether a manifest record still matches the page code and its datasets."""
+    if record is None or record.get('errors') or record.get('code') != code_hash(path):
+        return False
+    for name, version in record.get('inputs', {}).items():
+        try:
+            if dataset_version(name) != version:
+                return False
+        except DatasetNotFoundError:
+            if version is not None:
+                return False
+    return True
+
+
+def _navigation(pages, current):
+    return ''.join(
+        f'<a href="{output_name(page)}"{" class=current" if page == current else ""}>{html.escape(page_title(page))}</a>'
+        for page in pages)
+
+
+def build_snapshots(output_dir, workers=None, force=False, only=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Render every page whose code or datasets changed since the last build
+
+    Args:
+        output_dir (str or Path): Where the HTML files and manifest go
+        workers (int, optional): Worker processes, defaults to the CPU count
+        force (bool): Render every page regardless of the manifest
+        only (list, optional): Page names to consider, defaults to all
+        timeout (float): Seconds allowed per page
+
+    Returns:
+        dict: Lists of page names under 'rendered', 'skipped' and 'failed'
+    """
+    import plotly
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+
+    scripts = {page_name(path): path for path in page_scripts()}
+    pages = list(scripts)
+    selected = [page for page in pages if only is None or page in only]
+    stale = [page for page in selected
+             if force or not (output_dir / output_name(page)).exists()
+             or not is_current(manifest.get(page), scripts[page])]
+
+    plotly_js = output_dir / PLOTLY_JS
+    if not plotly_js.exists():
+        shutil.copyfile(Path(plotly.__file__).parent / 'package_data' / PLOTLY_JS, plotly_js)
+
+    result = {'rendered': [], 'skipped': [page for page in selected if page not in stale], 'failed': []}
+    if not stale:
+        return result
+
+    with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(stale))) as pool:
+        futures = {pool.submit(render_page, str(scripts[page]), timeout): page for page in stale}
+        for future in as_completed(futures):
+            page = futures[future]
+            try:
+                rendered = future.result()
+            except Exception as error:
+                rendered = {'body': '', 'inputs': {}, 'errors': [repr(error)], 'seconds': 0.0}
+            metrics.record('snapshot_page', page, rendered['seconds'], errors=len(rendered['errors']))
+
+            if rendered['errors']:
+                result['failed'].append(page)
+            else:
+                result['rendered'].append(page)
+                document = PAGE_TEMPLATE.format(
+                    title=html.escape(f"{page_title(page)} - Industry Dashboard"),
+                    plotly_js=PLOTLY_JS,
+                    navigation=_navigation(pages, page),
+                    body=rendered['body'],
+                    rendered=time.strftime('%Y-%m-%d %H:%M'))
+                target = output_dir / output_name(page)
+                temporary = target.with_name(f".{target.name}.tmp")
+                temporary.write_text(document, encoding='utf-8')
+                # A static server never serves a half-written page
+                os.replace(temporary, target)
+            manifest[page] = {
+                'file': output_name(page),
+                'code': code_hash(scripts[page]),
+                'inputs': rendered['inputs'],
+                'errors': rendered['errors'],
+                'rendered': time.time()
+            }
+
+    temporary = manifest_path.with_name(f".{MANIFEST}.tmp")
+    temporary.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    os.replace(temporary, manifest_path)
+    return result
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Export every page as static HTML")
+    parser.add_argument('output_dir', help="Directory to write the snapshots to")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="Render pages even if nothing changed")
+    parser.add_argument('--only', nargs='*', help="Page names, e.g. 2_Beef Home")
+    args = parser.parse_args()
+
+    # Call through the imported module: workers unpickle render_page by module
+    # name, and AppTest replaces __main__ inside them
+    from core import snapshot
+
+    start = time.perf_counter()
+    result = snapshot.build_snapshots(args.output_dir, args.workers, args.force, args.only)
+    print(f"Rendered {len(result['rendered'])}, skipped {len(result['skipped'])} unchanged, "
+          f"failed {len(result['failed'])} in {time.perf_counter() - start:.1f}s")
+    for page in result['failed']:
+        print(f"FAILED {page}")
+    sys.exit(1 if result['failed'] else 0)
@@ -0,0 +1,622 @@
+"""
+Dataset Storage
+
+Every dataset read goes through a storage backend configured once per
+process, so pages and analysis scripts no longer depend on the current
+working directory or on hard-coded paths.
+
+The backend is chosen from the environment:
+
+- DASHBOARD_DATA_ROOT: a directory or an s3://bucket/prefix URL
+  (defaults to the datasets/ directory of this repository)
+- DASHBOARD_STORAGE: 'local' (CSV files), 'mmap' (memory-mapped Arrow files)
+  or 's3'; inferred from the data root when unset
+- DASHBOARD_S3_ENDPOINT: endpoint URL for S3-compatible stores such as MinIO
+- DASHBOARD_CACHE_DIR: local read-through cache for remote backends
+- DASHBOARD_FRAME_CACHE_MB: memory for parsed datasets kept by read_dataset
+  (0 disables it)
+
+Datasets are addressed by name, e.g. read_dataset('BR_BEEF_PRICES').
+"""
+
+import contextvars
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+from core import metrics
+
+logger = logging.getLogger('dashboard.storage')
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DATA_ROOT = REPO_ROOT / 'datasets'
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'industry-dashboard'
+
+DATA_ROOT_ENV = 'DASHBOARD_DATA_ROOT'
+STORAGE_ENV = 'DASHBOARD_STORAGE'
+S3_ENDPOINT_ENV = 'DASHBOARD_S3_ENDPOINT'
+CACHE_DIR_ENV = 'DASHBOARD_CACHE_DIR'
+FRAME_CACHE_ENV = 'DASHBOARD_FRAME_CACHE_MB'
+DEFAULT_FRAME_CACHE_MB = 256
+
+# Date columns of the datasets, besides those declared in core.schema
+DATE_COLUMNS = ('DATE', 'Date')
+
+# Loads are mostly file or network I/O and C-level CSV parsing, both of
+# which release the GIL, so a small thread pool overlaps them well
+DEFAULT_LOAD_WORKERS = 8
+
+
+class DatasetNotFoundError(FileNotFoundError):
+    """Raised when a dataset does not exist in the configured backend."""
+
+
+class StorageBackend:
+    """Interface shared by all storage backends."""
+
+    # Whether read_frame returns read-only views of shared memory (see MmapBackend)
+    zero_copy = False
+
+    def read_frame(self, name, **read_options):
+        """Read a dataset into a DataFrame."""
+        raise NotImplementedError
+
+    def version(self, name):
+        """Opaque token that changes whenever the dataset changes."""
+        raise NotImplementedError
+
+    def content_hash(self, name):
+        """
+        Token that changes only when the dataset's contents change
+
+        Defaults to the version, which is already content-based for object
+        stores (ETag).
+        """
+        return self.version(name)
+
+    def list_datasets(self):
+        """Sorted names of all available datasets."""
+        raise NotImplementedError
+
+    def exists(self, name):
+        """Whether the dataset exists."""
+        return name in self.list_datasets()
+
+    def write_frame(self, name, df):
+        """Store a DataFrame as a dataset."""
+        raise NotImplementedError(f"{type(self).__name__} is read-only")
+
+
+class LocalBackend(StorageBackend):
+    """CSV files in a local directory."""
+
+    suffix = '.csv'
+
+    def __init__(self, root=DEFAULT_DATA_ROOT):
+        self.root = Path(root)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({str(self.root)!r})"
+
+    def path(self, name):
+        """Location of a dataset file."""
+        return self.root / f"{name}{self.suffix}"
+
+    def _existing_path(self, name):
+        path = self.path(name)
+        if not path.exists():
+            raise DatasetNotFoundError(f"Dataset {name} not found in {self.root}")
+        return path
+
+    def read_frame(self, name, **read_options):
+        return pd.read_csv(self._existing_path(name), **read_options)
+
+    def version(self, name):
+        stat = self._existing_path(name).stat()
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def content_hash(self, name):
+        # The version changes on a mere touch or re-download; the bytes do not
+        digest = hashlib.md5()
+        with open(self._existing_path(name), 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def list_datasets(self):
+        return sorted(path.stem for path in self.root.glob(f"*{self.suffix}"))
+
+    def exists(self, name):
+        return self.path(name).exists()
+
+    def write_frame(self, name, df):
+        self.root.mkdir(parents=True, exist_ok=True)
+        target = self.path(name)
+        temporary = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        self._write(temporary, df)
+        # Readers either see the old file or the new one, never a partial write
+        os.replace(temporary, target)
+
+    def _write(self, path, df):
+        df.to_csv(path, index=False)
+
+
+class MmapBackend(LocalBackend):
+    """
+    Arrow IPC files in a local directory, read through memory maps
+
+    Columns are stored already typed, so reads skip CSV parsing and date
+    conversion. Numeric and date columns without missing values are not
+    copied: the DataFrame columns are read-only views of the mapped file,
+    so every worker process on a host shares the same physical pages
+    through the OS page cache. Text columns are still converted per
+    process. Files are replaced by atomic rename, so a process holding the
+    previous version keeps reading it intact. Requires pyarrow.
+    """
+
+    suffix = '.arrow'
+    zero_copy = True
+
+    def __init__(self, root=DEFAULT_DATA_ROOT):
+        super().__init__(root)
+        self._pa = _import_pyarrow()
+
+    def read_frame(self, name, columns=None, dtype=None, **read_options):
+        # CSV parsing options do not apply to typed files and are ignored
+        pa = self._pa
+        # The table's buffers keep the mapping alive after the file is closed
+        with pa.memory_map(str(self._existing_path(name)), 'r') as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns is not None:
+            table = table.select(columns)
+        # One block per column, so columns are views instead of being copied into 2D blocks
+        df = table.to_pandas(split_blocks=True)
+        return df if dtype is None else df.astype(dtype)
+
+    def _write(self, path, df):
+        pa = self._pa
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        for i, name in enumerate(df.columns):
+            if pd.api.types.is_float_dtype(df[name].dtype):
+                # Keep NaN as a value rather than a null, which would force a copy on read
+                table = table.set_column(i, table.field(i), pa.array(df[name].to_numpy(), from_pandas=False))
+        with pa.OSFile(str(path), 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+
+class S3Backend(StorageBackend):
+    """
+    CSV objects in an S3-compatible bucket with a local read-through cache
+
+    One client (and its connection pool) is shared by all reads. Each read
+    checks the object's ETag and downloads it only when the cached copy is
+    missing or stale, so replicas share the bucket without mirroring it.
+    Requires boto3.
+    """
+
+    suffix = '.csv'
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, cache_dir=DEFAULT_CACHE_DIR,
+                 max_connections=16, client=None):
+        self.bucket = bucket
+        self.prefix = prefix.strip('/')
+        self.endpoint_url = endpoint_url
+        self.cache_dir = Path(cache_dir) / bucket / self.prefix
+        self._client = client or self._make_client(endpoint_url, max_connections)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"{type(self).__name__}('s3://{self.bucket}/{self.prefix}')"
+
+    @staticmethod
+    def _make_client(endpoint_url, max_connections):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as error:
+            raise ImportError("The S3 storage backend requires boto3 (pip install boto3)") from error
+        config = Config(max_pool_connections=max_connections, retries={'max_attempts': 3})
+        return boto3.client('s3', endpoint_url=endpoint_url, config=config)
+
+    def key(self, name):
+        """Object key of a dataset."""
+        filename = f"{name}{self.suffix}"
+        return f"{self.prefix}/{filename}" if self.prefix else filename
+
+    def _head(self, name):
+        from botocore.exceptions import ClientError
+        try:
+            return self._client.head_object(Bucket=self.bucket, Key=self.key(name))
+        except ClientError as error:
+            if error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                raise DatasetNotFoundError(f"Dataset {name} not found in {self!r}") from error
+            raise
+
+    def version(self, name):
+        return self._head(name)['ETag'].strip('"')
+
+    def local_copy(self, name):
+        """Path of an up-to-date local copy, downloading it if needed."""
+        etag = self.version(name)
+        cached = self.cache_dir / f"{name}.{etag}{self.suffix}"
+        if cached.exists():
+            return cached
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temporary = cached.with_name(f".{cached.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        self._client.download_file(self.bucket, self.key(name), str(temporary))
+        os.replace(temporary, cached)
+
+        # Drop copies of older versions of the same dataset
+        with self._lock:
+            for stale in self.cache_dir.glob(f"{name}.*{self.suffix}"):
+                if stale != cached:
+                    stale.unlink(missing_ok=True)
+        return cached
+
+    def read_frame(self, name, **read_options):
+        return pd.read_csv(self.local_copy(name), **read_options)
+
+    def list_datasets(self):
+        prefix = f"{self.prefix}/" if self.prefix else ''
+        names = []
+        paginator = self._client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get('Contents', []):
+                key = item['Key'][len(prefix):]
+                if '/' not in key and key.endswith(self.suffix):
+                    names.append(key[:-len(self.suffix)])
+        return sorted(names)
+
+    def exists(self, name):
+        try:
+            self._head(name)
+        except DatasetNotFoundError:
+            return False
+        return True
+
+    def write_frame(self, name, df):
+        body = io.BytesIO(df.to_csv(index=False).encode('utf-8'))
+        self._client.upload_fileobj(body, self.bucket, self.key(name))
+
+
+class FrameCache:
+    """
+    Parsed datasets kept in memory, least recently used first out
+
+    Entries are keyed by dataset name and read options and remember the
+    dataset version they were read at, so a changed dataset is re-read.
+    Callers get copies, because pages add derived columns to their frames.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, version):
+        """Cached frame for key if it was read at this version, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version, df):
+        """Store a frame, evicting the least recently used ones if needed."""
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[2]
+            self._entries[key] = (version, df, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes:
+                _, (_, _, evicted) = self._entries.popitem(last=False)
+                self.size -= evicted
+
+    def clear(self):
+        """Drop every cached frame."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+def _frame_cache_from_env():
+    megabytes = float(os.environ.get(FRAME_CACHE_ENV, DEFAULT_FRAME_CACHE_MB))
+    return FrameCache(int(megabytes * 1024 * 1024)) if megabytes > 0 else None
+
+
+def _options_key(read_options):
+    """Hashable form of read options, None when they cannot be cached."""
+    try:
+        key = tuple(sorted((option, repr(value)) for option, value in read_options.items()))
+    except TypeError:
+        return None
+    # Callables such as converters have no stable repr
+    return None if any(callable(value) for value in read_options.values()) else key
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as error:
+        raise ImportError("The mmap storage backend requires pyarrow (pip install pyarrow)") from error
+    return pyarrow
+
+
+def make_backend(root=None, kind=None, **options):
+    """
+    Create a backend from a data root and an optional backend kind
+
+    Args:
+        root (str or Path, optional): Directory or s3://bucket/prefix URL,
+            defaults to DASHBOARD_DATA_ROOT or the repository datasets/
+        kind (str, optional): 'local', 'mmap' or 's3', defaults to
+            DASHBOARD_STORAGE or is inferred from the root
+        **options: Extra keyword arguments for the backend
+
+    Returns:
+        StorageBackend: The backend
+    """
+    root = str(root or os.environ.get(DATA_ROOT_ENV) or DEFAULT_DATA_ROOT)
+    kind = kind or os.environ.get(STORAGE_ENV) or ('s3' if root.startswith('s3://') else 'local')
+
+    if kind == 's3':
+        bucket, _, prefix = root[len('s3://'):].partition('/')
+        options.setdefault('endpoint_url', os.environ.get(S3_ENDPOINT_ENV))
+        options.setdefault('cache_dir', os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+        return S3Backend(bucket, prefix, **options)
+
+    root = Path(root)
+    if not root.is_absolute():
+        root = REPO_ROOT / root
+    if kind == 'mmap':
+        return MmapBackend(root, **options)
+    if kind == 'local':
+        return LocalBackend(root, **options)
+    raise ValueError(f"Unknown storage backend: {kind}")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+_frames = _frame_cache_from_env()
+_read_recorder = contextvars.ContextVar('dataset_reads', default=None)
+
+
+def configure(backend=None, **options):
+    """
+    Set the process-wide backend
+
+    Args:
+        backend (StorageBackend, optional): Backend to use; when omitted one
+            is built with make_backend(**options)
+
+    Returns:
+        StorageBackend: The configured backend
+    """
+    global _backend
+    with _backend_lock:
+        _backend = backend if backend is not None else make_backend(**options)
+        if _frames is not None:
+            _frames.clear()
+    return _backend
+
+
+def get_backend():
+    """The process-wide backend, configured from the environment on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = make_backend()
+    return _backend
+
+
+def read_dataset(name, **read_options):
+    """
+    Read a dataset by name
+
+    Parsed datasets are kept in memory (see FrameCache) and re-read only
+    when their version changes. With a zero-copy backend (mmap), numeric
+    and date columns are read-only views shared with other processes:
+    assign new columns instead of writing into existing ones.
+
+    Args:
+        name (str): Dataset name, e.g. 'BR_BEEF_PRICES'
+        **read_options: Passed to the backend (pandas.read_csv options for
+            CSV backends)
+
+    Returns:
+        pandas.DataFrame: The dataset
+    """
+    start = time.perf_counter()
+    backend = get_backend()
+    options_key = _options_key(read_options)
+    recorder = _read_recorder.get()
+    use_cache = _frames is not None and options_key is not None
+    version = backend.version(name) if use_cache or recorder is not None else None
+    if recorder is not None:
+        recorder[name] = version
+
+    if not use_cache:
+        df = backend.read_frame(name, **read_options)
+        metrics.record('dataset_load', name, time.perf_counter() - start, cached=False)
+        return df
+
+    df = _frames.get((name, options_key), version)
+    cached = df is not None
+    if not cached:
+        df = backend.read_frame(name, **read_options)
+        _frames.put((name, options_key), version, df)
+    metrics.record('dataset_load', name, time.perf_counter() - start, cached=cached)
+    # Shared read-only columns are not copied; callers replace columns rather than writing into them
+    return df.copy(deep=not backend.zero_copy)
+
+
+@contextmanager
+def recording_reads():
+    """
+    Collect the datasets read inside the block, including worker threads
+    started by load_datasets
+
+    Datasets found missing by dataset_exists are recorded with version
+    None, so code that skips work on missing data is rerun once it appears.
+
+    Yields:
+        dict: Version of every dataset read, keyed by name
+    """
+    reads = {}
+    token = _read_recorder.set(reads)
+    try:
+        yield reads
+    finally:
+        _read_recorder.reset(token)
+
+
+def record_reads(versions):
+    """
+    Report datasets read elsewhere to the recording_reads block in progress
+
+    Used for results derived from datasets without reading them again, such
+    as a cached loader called from another loader being cached.
+
+    Args:
+        versions (dict): Version of every dataset, keyed by name
+    """
+    recorder = _read_recorder.get()
+    if recorder is not None:
+        recorder.update(versions)
+
+
+def load_datasets(names, max_workers=DEFAULT_LOAD_WORKERS, **read_options):
+    """
+    Read several datasets concurrently
+
+    A page that needs many datasets then waits for the slowest one instead
+    of the sum of all of them. Each read is timed individually.
+
+    Args:
+        names (list): Dataset names
+        max_workers (int): Upper bound on concurrent reads
+        **read_options: Passed to every read, see read_dataset
+
+    Returns:
+        dict: DataFrames keyed by dataset name, in the order of names
+    """
+    names = list(dict.fromkeys(names))
+    if len(names) <= 1 or max_workers <= 1:
+        return {name: read_dataset(name, **read_options) for name in names}
+
+    with metrics.timed('dataset_batch', ','.join(names), datasets=len(names)):
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(names)),
+                                thread_name_prefix='dataset-load') as pool:
+            # Each read runs in a copy of the caller's context so recording_reads sees it
+            futures = {name: pool.submit(contextvars.copy_context().run, read_dataset, name, **read_options)
+                       for name in names}
+            # result() re-raises the first failure, e.g. DatasetNotFoundError
+            return {name: future.result() for name, future in futures.items()}
+
+
+def dataset_version(name):
+    """Version token of a dataset, for cache keys."""
+    return get_backend().version(name)
+
+
+def dataset_content_hash(name):
+    """Hash of a dataset's contents, for lineage keys that survive re-downloads."""
+    return get_backend().content_hash(name)
+
+
+def dataset_exists(name):
+    """Whether a dataset exists in the configured backend."""
+    exists = get_backend().exists(name)
+    recorder = _read_recorder.get()
+    if not exists and recorder is not None:
+        recorder.setdefault(name, None)
+    return exists
+
+
+def list_datasets():
+    """Names of all datasets in the configured backend."""
+    return get_backend().list_datasets()
+
+
+def typed_dates(name, df):
+    """
+    Convert the date columns of a dataset from text to datetime64
+
+    DATE, Date and the date columns of the dataset's schema are converted
+    when every value parses as an ISO date; other columns are left as read.
+
+    Args:
+        name (str): Dataset name
+        df (pandas.DataFrame): Dataset as read, e.g. from CSV
+
+    Returns:
+        pandas.DataFrame: The dataset with typed date columns
+    """
+    from core.schema import SCHEMAS
+
+    schema = SCHEMAS.get(name)
+    candidates = DATE_COLUMNS + (schema.dates if schema is not None else ())
+    for column in candidates:
+        if column not in df.columns or pd.api.types.is_datetime64_any_dtype(df[column]):
+            continue
+        try:
+            df[column] = pd.to_datetime(df[column], format='ISO8601')
+        except (ValueError, TypeError):
+            logger.warning("Kept %s.%s as text: not all values are dates", name, column)
+    return df
+
+
+def copy_datasets(source, target, names=None):
+    """
+    Copy datasets between backends, e.g. to build a memory-mapped tree
+
+    Date columns are converted on the way (see typed_dates), so typed
+    backends store them as timestamps instead of text.
+
+    Args:
+        source (StorageBackend): Backend to read from
+        target (StorageBackend): Backend to write to
+        names (list, optional): Datasets to copy, defaults to all
+
+    Returns:
+        list: Names of the copied datasets
+    """
+    names = source.list_datasets() if names is None else names
+    for name in names:
+        target.write_frame(name, typed_dates(name, source.read_frame(name)))
+    return names
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Copy datasets into another storage backend")
+    parser.add_argument('target', help="Target directory or s3://bucket/prefix URL")
+    parser.add_argument('--kind', choices=['local', 'mmap', 's3'], help="Target backend kind")
+    parser.add_argument('--only', nargs='*', help="Dataset names to copy (default: all)")
+    args = parser.parse_args()
+
+    copied = copy_datasets(get_backend(), make_backend(args.target, args.kind), args.only)
+    print(f"Copied {len(copied)} datasets from {get_backend()!r} to {args.target}")
@@ -0,0 +1,443 @@
+"""
+Intraday Ticks
+
+Live prices for the Markets page, kept in fixed memory:
+
+- the last N ticks of each ticker are stored in preallocated NumPy ring
+  buffers (TickRing), so memory does not grow during the session and
+  adding a tick is O(1)
+- 1, 5 and 15 minute OHLC bars are built incrementally as ticks arrive
+  (BarBuilder): a tick updates the open bar, or closes it into a ring of
+  bars and opens the next one
+- one feed thread per process reads the tick feed and fills a TickStore
+  shared by every session; pages only copy out the arrays they draw
+
+The feed is set with DASHBOARD_TICK_FEED, as tcp://host:port (one JSON
+object per line) or ws://host:port/path (one or more lines per message,
+through tornado, which Streamlit already depends on). A tick looks like:
+
+    {"ticker": "JBSS3", "time": 1718889600.25, "price": 31.42, "size": 300}
+
+with time in seconds since the epoch (UTC) or as an ISO 8601 string.
+
+For development, python -m core.ticks serve publishes a random walk
+around the last daily closes on a local socket.
+
+Configuration:
+- DASHBOARD_TICK_FEED: feed URL; live prices are off when unset
+- DASHBOARD_TICK_BUFFER: ticks kept per ticker (default 50000)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+
+from core import metrics
+
+logger = logging.getLogger('dashboard.ticks')
+
+FEED_ENV = 'DASHBOARD_TICK_FEED'
+BUFFER_ENV = 'DASHBOARD_TICK_BUFFER'
+DEFAULT_TICKS = 50_000
+DEFAULT_BARS = 2_000
+
+# Bar intervals in seconds
+BAR_INTERVALS = (60, 300, 900)
+
+RECONNECT_SECONDS = (1, 2, 5, 10, 30)
+
+_NS = 1_000_000_000
+
+
+def _parse_time(value):
+    """Tick time as int64 nanoseconds since the epoch (UTC)."""
+    if isinstance(value, (int, float)):
+        return int(value * _NS)
+    timestamp = pd.Timestamp(value)
+    return (timestamp.tz_localize('UTC') if timestamp.tz is None else timestamp).value
+
+
+class TickRing:
+    """
+    The last capacity ticks of one ticker, in preallocated arrays
+
+    Args:
+        capacity (int): Ticks kept; older ones are overwritten
+    """
+
+    def __init__(self, capacity=DEFAULT_TICKS):
+        self.capacity = capacity
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.prices = np.zeros(capacity, dtype=np.float64)
+        self.sizes = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+        self._next = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, time_ns, price, size):
+        """Store a tick, overwriting the oldest one when full."""
+        position = self._next
+        self.times[position] = time_ns
+        self.prices[position] = price
+        self.sizes[position] = size
+        self._next = position + 1 if position + 1 < self.capacity else 0
+        if self.count < self.capacity:
+            self.count += 1
+
+    def _order(self):
+        """Positions of the stored ticks, oldest first."""
+        if self.count < self.capacity:
+            return slice(0, self.count)
+        return np.r_[self._next:self.capacity, 0:self._next]
+
+    def frame(self):
+        """Copy of the stored ticks, oldest first, indexed by UTC time."""
+        order = self._order()
+        return pd.DataFrame({'price': self.prices[order], 'size': self.sizes[order]},
+                            index=pd.to_datetime(self.times[order], utc=True).rename('time'))
+
+
+class BarBuilder:
+    """
+    OHLC bars of one ticker at one interval, built tick by tick
+
+    Closed bars go to a ring of capacity bars; the bar in progress is kept
+    apart and included by frame().
+
+    Args:
+        interval (int): Bar length in seconds
+        capacity (int): Closed bars kept
+    """
+
+    def __init__(self, interval, capacity=DEFAULT_BARS):
+        self.interval = interval
+        self._step = interval * _NS
+        self.bars = TickRing(capacity)
+        self.highs = np.zeros(capacity, dtype=np.float64)
+        self.lows = np.zeros(capacity, dtype=np.float64)
+        self.opens = np.zeros(capacity, dtype=np.float64)
+        # The open bar: start, open, high, low, close, volume
+        self._start = None
+        self._open = self._high = self._low = self._close = self._volume = 0.0
+
+    def update(self, time_ns, price, size):
+        """Add a tick to the open bar, closing it first if the tick starts a new one."""
+        start = time_ns - time_ns % self._step
+        if start == self._start:
+            if price > self._high:
+                self._high = price
+            elif price < self._low:
+                self._low = price
+            self._close = price
+            self._volume += size
+            return
+        if self._start is not None and start < self._start:
+            # Late ticks from an already closed bar are not revised into it
+            return
+        if self._start is not None:
+            self._close_bar()
+        self._start = start
+        self._open = self._high = self._low = self._close = price
+        self._volume = size
+
+    def _close_bar(self):
+        position = self.bars._next
+        self.opens[position] = self._open
+        self.highs[position] = self._high
+        self.lows[position] = self._low
+        # The ring keeps start, close and volume; the other prices sit at the same position
+        self.bars.append(self._start, self._close, self._volume)
+
+    def frame(self):
+        """Copy of the bars, open one included, with open/high/low/close/volume columns."""
+        order = self.bars._order()
+        frame = pd.DataFrame({
+            'open': self.opens[order], 'high': self.highs[order], 'low': self.lows[order],
+            'close': self.bars.prices[order], 'volume': self.bars.sizes[order]
+        }, index=pd.to_datetime(self.bars.times[order], utc=True).rename('time'))
+        if self._start is not None:
+            current = pd.DataFrame({'open': [self._open], 'high': [self._high], 'low': [self._low],
+                                    'close': [self._close], 'volume': [self._volume]},
+                                   index=pd.to_datetime([self._start], utc=True).rename('time'))
+            frame = pd.concat([frame, current]) if len(frame) else current
+        return frame
+
+
+class TickStore:
+    """
+    Ticks and bars of every ticker, written by the feed thread
+
+    Args:
+        capacity (int): Ticks kept per ticker
+        intervals (tuple): Bar intervals in seconds
+        bar_capacity (int): Closed bars kept per ticker and interval
+    """
+
+    def __init__(self, capacity=DEFAULT_TICKS, intervals=BAR_INTERVALS, bar_capacity=DEFAULT_BARS):
+        self.capacity = capacity
+        self.intervals = intervals
+        self.bar_capacity = bar_capacity
+        self.updated = None
+        self._ticks = {}
+        self._bars = {}
+        self._lock = threading.Lock()
+
+    def tickers(self):
+        """Tickers that received ticks, sorted."""
+        with self._lock:
+            return sorted(self._ticks)
+
+    def add(self, ticker, time_ns, price, size=0.0):
+        """Record one tick; O(1) apart from the first tick of a ticker."""
+        with self._lock:
+            ring = self._ticks.get(ticker)
+            if ring is None:
+                ring = self._ticks[ticker] = TickRing(self.capacity)
+                self._bars[ticker] = {interval: BarBuilder(interval, self.bar_capacity)
+                                      for interval in self.intervals}
+            ring.append(time_ns, price, size)
+            for builder in self._bars[ticker].values():
+                builder.update(time_ns, price, size)
+            self.updated = time.time()
+
+    def add_message(self, line):
+        """Record a tick from a feed line, ignoring malformed ones."""
+        try:
+            tick = json.loads(line)
+            self.add(str(tick['ticker']), _parse_time(tick['time']), float(tick['price']),
+                     float(tick.get('size', 0.0)))
+        except (ValueError, KeyError, TypeError) as error:
+            logger.debug("Ignoring malformed tick %r: %r", line, error)
+
+    def ticks(self, ticker):
+        """Ticks of a ticker, oldest first; empty if it has none."""
+        with self._lock:
+            ring = self._ticks.get(ticker)
+            return ring.frame() if ring is not None else TickRing(0).frame()
+
+    def bars(self, ticker, interval):
+        """
+        OHLC bars of a ticker
+
+        Args:
+            ticker (str): Ticker
+            interval (int): Bar length in seconds, one of the store's intervals
+
+        Returns:
+            pandas.DataFrame: open, high, low, close and volume indexed by
+                the UTC start time of each bar, the open bar last
+        """
+        with self._lock:
+            builders = self._bars.get(ticker)
+            if builders is None:
+                return BarBuilder(interval, 0).frame()
+            return builders[interval].frame()
+
+    def nbytes(self):
+        """Memory held by the preallocated buffers."""
+        with self._lock:
+            rings = list(self._ticks.values())
+            builders = [builder for bars in self._bars.values() for builder in bars.values()]
+        return (sum(ring.times.nbytes * 3 for ring in rings)
+                + sum(builder.bars.times.nbytes * 6 for builder in builders))
+
+
+def _read_tcp(address, store, stop, on_connect):
+    with socket.create_connection((address.hostname, address.port), timeout=30) as connection:
+        connection.settimeout(None)
+        on_connect()
+        # Undecodable bytes become U+FFFD, so the line is dropped as malformed
+        with connection.makefile('r', encoding='utf-8', errors='replace') as lines:
+            for line in lines:
+                if stop.is_set():
+                    return
+                if line.strip():
+                    store.add_message(line)
+
+
+async def _read_websocket(url, store, stop, on_connect):
+    from tornado.websocket import websocket_connect
+
+    connection = await websocket_connect(url)
+    on_connect()
+    try:
+        while not stop.is_set():
+            message = await connection.read_message()
+            if message is None:
+                return
+            for line in (message.decode('utf-8', errors='replace') if isinstance(message, bytes) else message).splitlines():
+                if line.strip():
+                    store.add_message(line)
+    finally:
+        connection.close()
+
+
+class Feed:
+    """
+    Thread reading a tick feed into a TickStore, reconnecting when it drops
+
+    Args:
+        url (str): tcp://host:port or ws://host:port/path
+        store (TickStore): Store to fill
+    """
+
+    def __init__(self, url, store):
+        self.url = url
+        self.store = store
+        self.connected = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='dashboard-ticks', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _connected(self):
+        self.connected = True
+
+    def _run(self):
+        address = urlparse(self.url)
+        if address.scheme not in ('tcp', 'ws', 'wss'):
+            logger.error("Tick feed disabled: unsupported feed %s, use tcp:// or ws://", self.url)
+            return
+        attempt = 0
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                if address.scheme == 'tcp':
+                    _read_tcp(address, self.store, self._stop, self._connected)
+                else:
+                    asyncio.run(_read_websocket(self.url, self.store, self._stop, self._connected))
+                attempt = 0
+            except Exception as error:
+                logger.warning("Tick feed %s failed: %r", self.url, error)
+            finally:
+                self.connected = False
+            metrics.record('tick_feed', self.url, time.perf_counter() - start)
+            self._stop.wait(RECONNECT_SECONDS[min(attempt, len(RECONNECT_SECONDS) - 1)])
+            attempt += 1
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_feed():
+    """
+    The process-wide feed, started on first use
+
+    Returns:
+        Feed: The running feed, or None when DASHBOARD_TICK_FEED is unset
+    """
+    global _feed
+    url = os.environ.get(FEED_ENV)
+    if not url:
+        return None
+    with _feed_lock:
+        if _feed is None:
+            store = TickStore(int(os.environ.get(BUFFER_ENV, DEFAULT_TICKS)))
+            _feed = Feed(url, store).start()
+        return _feed
+
+
+def _random_walk(prices, rate):
+    """Endless (feed line, seconds to the next one) pairs moving each price by small random steps."""
+    rng = np.random.default_rng()
+    tickers = list(prices)
+    while True:
+        ticker = tickers[rng.integers(len(tickers))]
+        prices[ticker] = max(prices[ticker] * (1 + rng.normal(0, 0.0005)), 0.01)
+        line = json.dumps({'ticker': ticker, 'time': time.time(), 'price': round(prices[ticker], 2),
+                           'size': int(rng.integers(1, 50)) * 100}) + '\n'
+        yield line, rng.exponential(1 / rate)
+
+
+def serve(port, prices, rate=20.0, websocket=False):
+    """
+    Publish random-walk ticks on a local socket, as a stand-in for a feed
+
+    Args:
+        port (int): Port to listen on
+        prices (dict): Starting price by ticker
+        rate (float): Ticks per second, over all tickers
+        websocket (bool): Serve ws://localhost:port/ instead of tcp://
+    """
+    if websocket:
+        import tornado.ioloop
+        import tornado.web
+        import tornado.websocket
+
+        clients = set()
+
+        class Handler(tornado.websocket.WebSocketHandler):
+            def open(self):
+                clients.add(self)
+
+            def on_close(self):
+                clients.discard(self)
+
+        loop = tornado.ioloop.IOLoop.current()
+        lines = _random_walk(dict(prices), rate)
+
+        def publish():
+            line, delay = next(lines)
+            for client in list(clients):
+                client.write_message(line)
+            loop.call_later(delay, publish)
+
+        tornado.web.Application([(r'/', Handler)]).listen(port)
+        loop.add_callback(publish)
+        loop.start()
+        return
+
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line, delay in _random_walk(dict(prices), rate):
+                self.wfile.write(line.encode('utf-8'))
+                time.sleep(delay)
+
+    with socketserver.ThreadingTCPServer(('', port), Handler) as server:
+        server.daemon_threads = True
+        server.serve_forever()
+
+
+def main():
+    import argparse
+
+    from core.storage import load_datasets
+
+    parser = argparse.ArgumentParser(description="Publish random-walk ticks as a stand-in tick feed")
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('tickers', nargs='*', default=['ABEV3', 'BEEF3', 'BRFS3', 'JBSS3', 'MRFG3', 'SMTO3'])
+    parser.add_argument('--port', type=int, default=9001)
+    parser.add_argument('--rate', type=float, default=20.0, help="Ticks per second")
+    parser.add_argument('--websocket', action='store_true', help="Serve a WebSocket instead of a TCP socket")
+    args = parser.parse_args()
+
+    # Start from the last daily closes
+    datasets = load_datasets([f"BR_{ticker}_PRICE" for ticker in args.tickers])
+    prices = {ticker: float(abs(datasets[f"BR_{ticker}_PRICE"][f"BR_{ticker}_PRICE"].iloc[-1])) or 10.0
+              for ticker in args.tickers}
+    scheme = 'ws' if args.websocket else 'tcp'
+    print(f"Serving {len(prices)} tickers on {scheme}://localhost:{args.port}/ (set {FEED_ENV} to it)")
+    serve(args.port, prices, args.rate, args.websocket)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,418 @@
+"""
+Time Series Store
+
+An embedded SQLite store holding every series in one long table of
+(series, date, value) observations, clustered on (series, date), and a
+catalog of their metadata (frequency, unit, source, last update, row
+count and date range). Reading a window of a few series out of thousands
+is an index range scan per series instead of parsing whole CSV files:
+
+    from core.tsstore import open_store
+
+    store = open_store()
+    prices = store.query(['BR_CATTLE_PRICE', 'US_CORN_PRICE'], start='2020-01-01')
+
+Series are loaded from the datasets with python -m core.tsstore, which
+only re-imports datasets whose version changed. Datasets registered in
+core.schema are read in their canonical form, with their units and
+frequency; the others are imported when they have a Date column, one
+series per numeric column and value of their text columns (e.g. State).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from core import metrics
+from core.schema import SCHEMAS, read_normalized
+from core.storage import REPO_ROOT, dataset_version, list_datasets, read_dataset
+
+STORE_ENV = 'DASHBOARD_SERIES_DB'
+DEFAULT_STORE_PATH = REPO_ROOT / 'processed_data' / 'series.db'
+
+DATE_COLUMNS = ('Date', 'DATE', 'date')
+
+# Largest median spacing, in days, of each inferred frequency
+FREQUENCIES = (('daily', 1), ('weekly', 7), ('monthly', 31), ('quarterly', 92), ('yearly', 366))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog (
+    id INTEGER PRIMARY KEY,
+    series_id TEXT NOT NULL UNIQUE,
+    frequency TEXT,
+    unit TEXT,
+    source TEXT,
+    last_update TEXT,
+    rows INTEGER NOT NULL DEFAULT 0,
+    first_date INTEGER,
+    last_date INTEGER
+);
+CREATE TABLE IF NOT EXISTS observations (
+    series INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    value REAL,
+    PRIMARY KEY (series, date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS imports (
+    dataset TEXT PRIMARY KEY,
+    version TEXT
+);
+"""
+
+CATALOG_COLUMNS = ('series_id', 'frequency', 'unit', 'source', 'last_update', 'rows', 'first_date', 'last_date')
+
+
+class SeriesNotFoundError(KeyError):
+    """Raised when a queried series is not in the store."""
+
+
+def _to_ns(dates):
+    """Dates as int64 nanoseconds since the epoch, the stored date format."""
+    return pd.DatetimeIndex(pd.to_datetime(dates)).tz_localize(None).asi8
+
+
+def infer_frequency(dates):
+    """
+    Frequency of a date column from the median spacing of its dates
+
+    Args:
+        dates (array-like): Dates
+
+    Returns:
+        str: 'daily', 'weekly', 'monthly', 'quarterly', 'yearly' or None
+            when there are fewer than two distinct dates
+    """
+    ns = np.unique(_to_ns(pd.Series(dates).dropna()))
+    if len(ns) < 2:
+        return None
+    days = np.median(np.diff(ns)) / 86_400e9
+    return next((name for name, limit in FREQUENCIES if days <= limit), 'yearly')
+
+
+class TimeSeriesStore:
+    """
+    Long-format series store in one SQLite file
+
+    Observations are stored in a WITHOUT ROWID table whose primary key
+    (series, date) is the clustered index, so the rows of a series are
+    contiguous on disk and ordered by date. Each method opens its own
+    connection, so a store can be shared by threads and processes; the
+    database runs in WAL mode so readers are not blocked by an import.
+
+    Args:
+        path (str or Path): Database file, created when missing
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(_SCHEMA)
+
+    def __repr__(self):
+        return f"TimeSeriesStore({str(self.path)!r})"
+
+    @contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def write_series(self, series_id, values, frequency=None, unit='', source=''):
+        """
+        Store a series, replacing its previous observations
+
+        Args:
+            series_id (str): Series name
+            values (pandas.Series): Values indexed by date; NaN values are
+                not stored
+            frequency (str, optional): Frequency, inferred from the dates
+                when not given
+            unit (str): Unit of the values
+            source (str): Where the series comes from, e.g. its dataset
+
+        Returns:
+            int: Number of observations stored
+        """
+        with self._connect() as connection:
+            return self._write(connection, series_id, values, frequency, unit, source)
+
+    def _write(self, connection, series_id, values, frequency, unit, source):
+        values = values[values.notna() & values.index.notna()]
+        dates = _to_ns(values.index)
+        # Keep the last value of duplicated dates, as the primary key requires
+        order = np.argsort(dates, kind='stable')
+        dates, numbers = dates[order], values.to_numpy(dtype=float)[order]
+        last = np.append(dates[1:] != dates[:-1], True)
+        dates, numbers = dates[last], numbers[last]
+
+        connection.execute(
+            "INSERT INTO catalog (series_id) VALUES (?) ON CONFLICT (series_id) DO NOTHING", (series_id,))
+        key = connection.execute("SELECT id FROM catalog WHERE series_id = ?", (series_id,)).fetchone()[0]
+        connection.execute("DELETE FROM observations WHERE series = ?", (key,))
+        connection.executemany("INSERT INTO observations (series, date, value) VALUES (?, ?, ?)",
+                               zip([key] * len(dates), dates.tolist(), numbers.tolist()))
+        connection.execute(
+            "UPDATE catalog SET frequency = ?, unit = ?, source = ?, last_update = ?, rows = ?, "
+            "first_date = ?, last_date = ? WHERE id = ?",
+            (frequency or infer_frequency(values.index), unit, source,
+             datetime.now(timezone.utc).isoformat(timespec='seconds'), len(dates),
+             int(dates[0]) if len(dates) else None, int(dates[-1]) if len(dates) else None, key))
+        return len(dates)
+
+    def delete_series(self, series_ids):
+        """Remove series and their observations from the store."""
+        with self._connect() as connection:
+            for series_id in series_ids:
+                row = connection.execute("SELECT id FROM catalog WHERE series_id = ?", (series_id,)).fetchone()
+                if row:
+                    connection.execute("DELETE FROM observations WHERE series = ?", row)
+                    connection.execute("DELETE FROM catalog WHERE id = ?", row)
+
+    def catalog(self, source=None):
+        """
+        Metadata of the stored series
+
+        Args:
+            source (str, optional): Only the series from this source
+
+        Returns:
+            pandas.DataFrame: One row per series, indexed by series_id, with
+                frequency, unit, source, last_update, rows, first_date and
+                last_date
+        """
+        query = f"SELECT {', '.join(CATALOG_COLUMNS)} FROM catalog"
+        with self._connect() as connection:
+            if source is None:
+                rows = connection.execute(query + " ORDER BY series_id").fetchall()
+            else:
+                rows = connection.execute(query + " WHERE source = ? ORDER BY series_id", (source,)).fetchall()
+        df = pd.DataFrame(rows, columns=list(CATALOG_COLUMNS))
+        for column in ('first_date', 'last_date'):
+            df[column] = pd.to_datetime(df[column], unit='ns')
+        return df.set_index('series_id')
+
+    def query(self, series_ids, start=None, end=None, how='outer', ffill=False):
+        """
+        Aligned wide frame of some series over a date window
+
+        Args:
+            series_ids (list): Series names, in the order of the columns
+            start (str or datetime, optional): First date, inclusive
+            end (str or datetime, optional): Last date, inclusive
+            how (str): 'outer' keeps every date any series has, 'inner' only
+                the dates all of them have
+            ffill (bool): Carry values forward over the dates a series does
+                not have, e.g. to align monthly and weekly series
+
+        Returns:
+            pandas.DataFrame: One column per series, indexed by date
+
+        Raises:
+            SeriesNotFoundError: If a series is not in the store
+        """
+        series_ids = list(dict.fromkeys(series_ids))
+        bounds = (int(_to_ns([start])[0]) if start is not None else np.iinfo(np.int64).min,
+                  int(_to_ns([end])[0]) if end is not None else np.iinfo(np.int64).max)
+        started = time.perf_counter()
+        with self._connect() as connection:
+            keys = dict(connection.execute(
+                f"SELECT series_id, id FROM catalog WHERE series_id IN ({', '.join('?' * len(series_ids))})",
+                series_ids).fetchall()) if series_ids else {}
+            missing = [series_id for series_id in series_ids if series_id not in keys]
+            if missing:
+                raise SeriesNotFoundError(f"Series not in {self.path}: {missing}")
+            columns = {}
+            for series_id in series_ids:
+                # One primary key range scan per series
+                rows = connection.execute(
+                    "SELECT date, value FROM observations WHERE series = ? AND date BETWEEN ? AND ? ORDER BY date",
+                    (keys[series_id], *bounds)).fetchall()
+                data = np.array(rows, dtype=float).reshape(-1, 2)
+                columns[series_id] = pd.Series(data[:, 1], index=pd.to_datetime(data[:, 0].astype(np.int64)))
+
+        df = pd.DataFrame(columns, columns=series_ids) if columns else pd.DataFrame(index=pd.DatetimeIndex([]))
+        df.index.name = 'date'
+        if ffill:
+            df = df.ffill()
+        if how == 'inner':
+            df = df.dropna()
+        metrics.record('tsstore_query', ','.join(series_ids[:3]), time.perf_counter() - started,
+                       series=len(series_ids), rows=len(df))
+        return df
+
+    def read_series(self, series_id, start=None, end=None):
+        """One series over a date window, as a pandas Series indexed by date."""
+        return self.query([series_id], start, end)[series_id]
+
+    def imported_version(self, dataset):
+        """Version of a dataset when it was last imported, None if it never was."""
+        with self._connect() as connection:
+            row = connection.execute("SELECT version FROM imports WHERE dataset = ?", (dataset,)).fetchone()
+        return row[0] if row else None
+
+    def replace_dataset(self, dataset, series, version=None):
+        """
+        Replace every series of a dataset in one transaction
+
+        Series previously imported from the dataset that it no longer has
+        are removed.
+
+        Args:
+            dataset (str): Dataset name, stored as the series source
+            series (dict): (values, frequency, unit) tuples by series name
+            version (str, optional): Dataset version, to skip it next time
+
+        Returns:
+            int: Number of observations stored
+        """
+        with self._connect() as connection:
+            stale = [row[0] for row in connection.execute(
+                "SELECT id FROM catalog WHERE source = ?", (dataset,)).fetchall()]
+            for key in stale:
+                connection.execute("DELETE FROM observations WHERE series = ?", (key,))
+            connection.execute("DELETE FROM catalog WHERE source = ?", (dataset,))
+            stored = sum(self._write(connection, series_id, values, frequency, unit, dataset)
+                         for series_id, (values, frequency, unit) in series.items())
+            connection.execute("INSERT OR REPLACE INTO imports (dataset, version) VALUES (?, ?)",
+                               (dataset, version))
+        return stored
+
+
+def dataset_series(name):
+    """
+    Series of a dataset, as imported into the store
+
+    Registered datasets give one series per measure, named
+    'DATASET/Measure', with the schema units and frequency. Other datasets
+    with a Date column give one series per numeric column and combination
+    of their text columns, e.g. 'BR_BROILER_COSTS_STATE/PR/R$_kg'; a dataset
+    with a single value column named after itself (e.g. BR_CATTLE_PRICE)
+    gives a series of the same name.
+
+    Args:
+        name (str): Dataset name
+
+    Returns:
+        dict: (values, frequency, unit) tuples by series name, empty when
+            the dataset is not a time series (no date column, or a
+            registered schema without a frequency)
+    """
+    if name in SCHEMAS:
+        schema = SCHEMAS[name]
+        if not schema.frequency:
+            return {}
+        df = read_normalized(name).set_index('Date')
+        return {f"{name}/{measure.name}": (df[measure.name], schema.frequency, measure.unit)
+                for measure in schema.measures}
+
+    df = read_dataset(name)
+    date = next((column for column in DATE_COLUMNS if column in df.columns), None)
+    if date is None:
+        return {}
+    df = df.assign(**{date: pd.to_datetime(df[date], errors='coerce', format='ISO8601')}).set_index(date)
+    measures = [column for column in df.columns if pd.api.types.is_numeric_dtype(df[column])]
+    groups = [column for column in df.columns if column not in measures]
+    if measures == [name] and not groups:
+        return {name: (df[name], infer_frequency(df.index), '')}
+
+    series = {}
+    for group, rows in (df.groupby(groups, sort=True) if groups else [((), df)]):
+        group = group if isinstance(group, tuple) else (group,)
+        frequency = infer_frequency(rows.index)
+        for measure in measures:
+            series['/'.join([name, *map(str, group), measure])] = (rows[measure], frequency, '')
+    return series
+
+
+def import_datasets(store, names=None, force=False):
+    """
+    Load datasets into the store, skipping the ones that did not change
+
+    Args:
+        store (TimeSeriesStore): Target store
+        names (list, optional): Dataset names, defaults to every dataset
+        force (bool): Re-import datasets whose version did not change
+
+    Returns:
+        dict: 'imported N series', 'unchanged', 'skipped: ...' or an error
+            message by dataset name
+    """
+    results = {}
+    for name in names or list_datasets():
+        version = dataset_version(name)
+        if not force and version is not None and store.imported_version(name) == str(version):
+            results[name] = 'unchanged'
+            continue
+        try:
+            series = dataset_series(name)
+        except (ValueError, FileNotFoundError) as e:
+            results[name] = f"error: {e}"
+            continue
+        if not series:
+            results[name] = 'skipped: not a time series'
+            continue
+        store.replace_dataset(name, series, None if version is None else str(version))
+        results[name] = f"imported {len(series)} series"
+    return results
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def open_store(path=None):
+    """
+    The store at path, $DASHBOARD_SERIES_DB or processed_data/series.db
+
+    Args:
+        path (str or Path, optional): Database file
+
+    Returns:
+        TimeSeriesStore: One instance per path for the process
+    """
+    path = Path(path or os.environ.get(STORE_ENV) or DEFAULT_STORE_PATH).resolve()
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = TimeSeriesStore(path)
+        return _stores[path]
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load datasets into the time series store")
+    parser.add_argument('names', nargs='*', help="Dataset names, defaults to every dataset")
+    parser.add_argument('--path', help=f"Database file (default: ${STORE_ENV} or {DEFAULT_STORE_PATH})")
+    parser.add_argument('--force', action='store_true', help="Re-import datasets that did not change")
+    parser.add_argument('--catalog', action='store_true', help="Print the catalog instead of importing")
+    args = parser.parse_args()
+
+    store = open_store(args.path)
+    if args.catalog:
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(store.catalog())
+        return 0
+
+    start = time.perf_counter()
+    results = import_datasets(store, args.names, args.force)
+    for name, result in results.items():
+        print(f"{name}: {result}")
+    print(f"{len(store.catalog())} series in {store.path} ({time.perf_counter() - start:.1f}s)")
+    return 1 if any(result.startswith('error') for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,329 @@
+"""
+Usage Statistics
+
+Anonymous access counts per page, tab, chart and date window. Nothing
+identifies a visitor: there are no session ids, addresses or timestamps
+finer than a day, only counters per (day, kind, page, item).
+
+Counts are buffered in memory and flushed to a small SQLite database, so
+recording a view costs a dictionary update. The database is shared by all
+server processes on a host.
+
+Scores weight recent days more (see page_scores) and drive the artifact
+cache in core.cache (what stays in memory, what is refreshed first) and the
+warm-up order in core.warmup. Loaders serving a single tab are also ranked
+by the clicks on that tab (see tab_scores), so e.g. the Prices tab of the
+Markets page outranks its Analytics tab when it is opened more.
+
+Tab clicks and chart zooms happen in the browser. track_page() injects a
+small script that reports them to POST /usage on the readiness server of
+core.warmup (or to DASHBOARD_USAGE_URL).
+
+Configuration:
+- DASHBOARD_USAGE: set to 0 to disable recording
+- DASHBOARD_USAGE_DB: database path (defaults to the storage cache directory)
+- DASHBOARD_USAGE_URL: where the browser reports tab and chart usage
+"""
+
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+
+from core.storage import CACHE_DIR_ENV, DEFAULT_CACHE_DIR
+
+USAGE_ENV = 'DASHBOARD_USAGE'
+USAGE_DB_ENV = 'DASHBOARD_USAGE_DB'
+USAGE_URL_ENV = 'DASHBOARD_USAGE_URL'
+
+KINDS = ('page', 'tab', 'chart', 'window')
+FLUSH_SECONDS = 30
+HALF_LIFE_DAYS = 14
+HISTORY_DAYS = 90
+
+# Date windows are reported as coarse spans only
+WINDOW_BUCKETS = [(93, '3M'), (366, '1Y'), (3 * 366, '3Y'), (5 * 366, '5Y')]
+
+
+def enabled():
+    """Whether usage recording is enabled."""
+    return os.environ.get(USAGE_ENV, '1').lower() not in ('0', 'false', 'no')
+
+
+def database_path():
+    """Location of the usage database."""
+    configured = os.environ.get(USAGE_DB_ENV)
+    if configured:
+        return Path(configured)
+    return Path(os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR) / 'usage.sqlite'
+
+
+def window_bucket(days):
+    """
+    Coarse label for a date window
+
+    Args:
+        days (float): Length of the visible date range in days
+
+    Returns:
+        str: '3M', '1Y', '3Y', '5Y' or 'MAX'
+    """
+    for limit, label in WINDOW_BUCKETS:
+        if days <= limit:
+            return label
+    return 'MAX'
+
+
+def page_name(page):
+    """Page name from a page script path or name, e.g. '2_Beef'."""
+    return Path(str(page)).stem
+
+
+_pending = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record(kind, page, item=''):
+    """
+    Count one access
+
+    Args:
+        kind (str): 'page', 'tab', 'chart' or 'window'
+        page (str): Page name or script path
+        item (str): Tab label, chart title or 'chart|window' for date windows
+    """
+    global _last_flush
+    if not enabled() or kind not in KINDS:
+        return
+    key = (date.today().isoformat(), kind, page_name(page), str(item)[:200])
+    with _pending_lock:
+        _pending[key] += 1
+        due = time.monotonic() - _last_flush >= FLUSH_SECONDS
+    if due:
+        flush()
+
+
+def _connect():
+    path = database_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path, timeout=10)
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS usage ("
+        " day TEXT NOT NULL, kind TEXT NOT NULL, page TEXT NOT NULL, item TEXT NOT NULL,"
+        " count INTEGER NOT NULL, PRIMARY KEY (day, kind, page, item))"
+    )
+    return connection
+
+
+def flush():
+    """Write buffered counts to the database."""
+    global _last_flush
+    with _pending_lock:
+        rows = [key + (count,) for key, count in _pending.items()]
+        _pending.clear()
+        _last_flush = time.monotonic()
+    if not rows:
+        return
+    with _connect() as connection:
+        connection.executemany(
+            "INSERT INTO usage (day, kind, page, item, count) VALUES (?, ?, ?, ?, ?)"
+            " ON CONFLICT (day, kind, page, item) DO UPDATE SET count = count + excluded.count",
+            rows
+        )
+        cutoff = (date.today() - timedelta(days=HISTORY_DAYS)).isoformat()
+        connection.execute("DELETE FROM usage WHERE day < ?", (cutoff,))
+    connection.close()
+
+
+atexit.register(flush)
+
+
+def scores(kind, page=None, half_life_days=HALF_LIFE_DAYS):
+    """
+    Recency-weighted counts, a view from half_life_days ago counting half
+
+    Args:
+        kind (str): 'page', 'tab', 'chart' or 'window'
+        page (str, optional): Only items of this page
+        half_life_days (float): Age at which a count weighs one half
+
+    Returns:
+        dict: Scores keyed by (page, item)
+    """
+    flush()
+    path = database_path()
+    if not path.exists():
+        return {}
+    query = "SELECT day, page, item, count FROM usage WHERE kind = ?"
+    params = [kind]
+    if page is not None:
+        query += " AND page = ?"
+        params.append(page_name(page))
+    connection = sqlite3.connect(path, timeout=10)
+    try:
+        rows = connection.execute(query, params).fetchall()
+    except sqlite3.OperationalError:
+        rows = []
+    finally:
+        connection.close()
+
+    today = date.today()
+    result = Counter()
+    for day, page_key, item, count in rows:
+        age = (today - date.fromisoformat(day)).days
+        result[(page_key, item)] += count * 0.5 ** (age / half_life_days)
+    return dict(result)
+
+
+def page_scores(half_life_days=HALF_LIFE_DAYS):
+    """
+    Popularity of each page: its views plus the tab and chart interactions
+
+    Returns:
+        dict: Scores keyed by page name
+    """
+    result = Counter()
+    for kind in ('page', 'tab', 'chart'):
+        for (page, _), score in scores(kind, half_life_days=half_life_days).items():
+            result[page] += score
+    return dict(result)
+
+
+def tab_scores(half_life_days=HALF_LIFE_DAYS):
+    """
+    Popularity of each tab: the clicks on it
+
+    Returns:
+        dict: Scores keyed by (page name, tab label)
+    """
+    return scores('tab', half_life_days=half_life_days)
+
+
+def ranked_pages():
+    """Page names, most used first."""
+    return [page for page, _ in sorted(page_scores().items(), key=lambda item: -item[1])]
+
+
+def beacon_url():
+    """URL the browser reports to, or None when no endpoint is configured."""
+    configured = os.environ.get(USAGE_URL_ENV)
+    if configured:
+        return configured
+    from core.warmup import READY_PORT_ENV
+    port = os.environ.get(READY_PORT_ENV)
+    return f":{port}/usage" if port else None
+
+
+# Runs in a zero-height component iframe, which is same-origin with the app,
+# and listens to tab clicks and plotly zooms in the parent document
+_TRACKING_SCRIPT = """
+<script>
+(function() {
+  const page = %(page)s;
+  let url = %(url)s;
+  if (url.startsWith(':')) {
+    url = window.parent.location.protocol + '//' + window.parent.location.hostname + url;
+  }
+  const doc = window.parent.document;
+  // The iframe is replaced on every page run, so replace the previous listeners too
+  if (doc.__usageTracking) doc.__usageTracking.stop();
+  const send = (kind, item) => navigator.sendBeacon(url, JSON.stringify({kind, page, item}));
+  const onClick = (event) => {
+    const tab = event.target.closest('button[role="tab"]');
+    if (tab) send('tab', tab.innerText.trim());
+  };
+  const onRelayout = (plot, update) => {
+    const title = (plot.layout.title && plot.layout.title.text) || '';
+    const start = update['xaxis.range[0]'], end = update['xaxis.range[1]'];
+    if (start === undefined) { send('chart', title); return; }
+    const days = (new Date(end) - new Date(start)) / 86400000;
+    send('window', title + '|' + days.toFixed(0));
+  };
+  const plots = new Map();
+  const watch = () => doc.querySelectorAll('.js-plotly-plot').forEach((plot) => {
+    if (plots.has(plot) || !plot.on) return;
+    const handler = (update) => onRelayout(plot, update);
+    plots.set(plot, handler);
+    plot.on('plotly_relayout', handler);
+  });
+  const observer = new MutationObserver(watch);
+  doc.addEventListener('click', onClick, true);
+  observer.observe(doc.body, {childList: true, subtree: true});
+  watch();
+  doc.__usageTracking = {stop: () => {
+    doc.removeEventListener('click', onClick, true);
+    observer.disconnect();
+    plots.forEach((handler, plot) => plot.removeListener('plotly_relayout', handler));
+  }};
+})();
+</script>
+"""
+
+
+def track_page(page):
+    """
+    Count a page view and report tab and chart usage from the browser
+
+    Call once near the top of a page script.
+
+    Args:
+        page (str): Page script path (__file__) or page name
+    """
+    if not enabled():
+        return
+    record('page', page)
+    url = beacon_url()
+    if url is None:
+        return
+    import streamlit.components.v1 as components
+    components.html(_TRACKING_SCRIPT % {'page': json.dumps(page_name(page)), 'url': json.dumps(url)}, height=0)
+
+
+def record_beacon(body):
+    """
+    Record a usage report sent by the tracking script
+
+    Date windows arrive as 'chart title|days' and are stored bucketed.
+    Reports for pages the app does not have are ignored, since anyone can
+    post to the endpoint.
+
+    Args:
+        body (bytes or str): JSON object with kind, page and item
+    """
+    from core.warmup import page_scripts
+
+    try:
+        report = json.loads(body)
+        kind, page, item = report['kind'], str(report['page']), str(report.get('item', ''))
+    except (ValueError, KeyError, TypeError):
+        return
+    if page not in {page_name(path) for path in page_scripts()}:
+        return
+    if kind == 'window':
+        chart, _, days = item.rpartition('|')
+        try:
+            item = f"{chart}|{window_bucket(float(days))}"
+        except ValueError:
+            return
+    record(kind, page, item)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Show usage statistics")
+    parser.add_argument('--kind', choices=KINDS, default=None, help="Only show this kind")
+    parser.add_argument('--top', type=int, default=20, help="Rows per kind")
+    args = parser.parse_args()
+
+    for kind in [args.kind] if args.kind else KINDS:
+        ranked = sorted(scores(kind).items(), key=lambda item: -item[1])[:args.top]
+        print(f"\n{kind}")
+        for (page, item), score in ranked:
+            print(f"  {score:8.1f}  {page:<20} {item}")
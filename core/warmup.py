@@ -0,0 +1,464 @@
+"""
+Warm-up
+
+After a deploy or restart the first visitor of every page pays for CSV
+parsing and for plotly's first-use costs (lazy imports of trace validators
+and templates). Warm-up pays those costs up front, page by page in priority
+order:
+
+1. every dataset a page reads is loaded into the process-wide frame cache
+   of core.storage
+2. every chart type a page builds is rendered once and serialized the way
+   st.plotly_chart does
+3. the page itself is run headlessly in a worker process, so its @cached
+   loaders are built and written to the artifact disk tier (core.cache),
+   from which the server reads them on the first visit instead of
+   deriving them; skipped when the disk tier is disabled or
+   DASHBOARD_WARMUP_PAGES=0
+
+Page dependencies are discovered from the page sources: string literals
+and simple f-strings that name an existing dataset, and px.<function> /
+go.<trace> calls.
+
+Pages are warmed in the order of DASHBOARD_WARMUP_PRIORITY when it is set,
+otherwise most used first (see core.usage).
+
+Readiness is exposed through is_ready()/status() and, optionally, an HTTP
+endpoint (GET /ready returns 200 once warm-up has finished, 503 before) for
+load balancer health checks. The same server receives the browser usage
+reports (POST /usage).
+
+Usage:
+    python -m core.warmup            # warm up once and report timings
+    python -m core.warmup --check    # also run every page headlessly
+    python -m core.warmup --serve    # warm up in the background, expose
+                                     # /ready and run the Streamlit server
+                                     # in the same process
+
+Setting DASHBOARD_WARMUP=1 makes Home.py start the background warm-up.
+"""
+
+import ast
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from core import metrics, usage
+from core.cache import get_cache, start_refresh_watcher
+from core.storage import REPO_ROOT, list_datasets, load_datasets
+
+logger = logging.getLogger('dashboard.warmup')
+
+HOME_PAGE = REPO_ROOT / 'Home.py'
+PAGES_DIR = REPO_ROOT / 'pages'
+
+WARMUP_ENV = 'DASHBOARD_WARMUP'
+PRIORITY_ENV = 'DASHBOARD_WARMUP_PRIORITY'
+READY_PORT_ENV = 'DASHBOARD_READY_PORT'
+DEFAULT_READY_PORT = 8502
+PAGES_ENV = 'DASHBOARD_WARMUP_PAGES'
+PAGE_TIMEOUT = 300
+
+CHART_MODULES = ('px', 'go')
+
+
+@dataclass
+class PageWarmup:
+    """What warming up one page involves."""
+
+    page: str
+    datasets: list = field(default_factory=list)
+    charts: list = field(default_factory=list)
+    path: str = None
+
+
+def page_scripts():
+    """Home.py and the pages, in sidebar order."""
+    def sidebar_position(path):
+        number, _, _ = path.stem.partition('_')
+        return (int(number) if number.isdigit() else sys.maxsize, path.stem)
+
+    return [HOME_PAGE] + sorted(PAGES_DIR.glob('*.py'), key=sidebar_position)
+
+
+def page_name(path):
+    """Page name as used in priorities, e.g. '2_Beef'."""
+    return path.stem
+
+
+def _name_patterns(tree):
+    """(prefix, suffix) of f-strings with one placeholder, e.g. f"BR_{code}_PRICE"."""
+    patterns = set()
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.JoinedStr):
+            continue
+        parts = node.values
+        placeholders = [part for part in parts if isinstance(part, ast.FormattedValue)]
+        if len(placeholders) != 1:
+            continue
+        position = parts.index(placeholders[0])
+        text = lambda items: ''.join(part.value for part in items if isinstance(part, ast.Constant))
+        patterns.add((text(parts[:position]), text(parts[position + 1:])))
+    return patterns
+
+
+def scan_page(path, available):
+    """
+    Find the datasets and chart types a page uses
+
+    Datasets are string literals naming an existing dataset, or f-strings
+    such as f"BR_{code}_PRICE" filled with any string literal of the page.
+
+    Args:
+        path (Path): Page script
+        available (set): Names of the existing datasets
+
+    Returns:
+        PageWarmup: The page's dependencies, in order of appearance
+    """
+    tree = ast.parse(path.read_text(encoding='utf-8'))
+    patterns = _name_patterns(tree)
+    datasets, charts = [], []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            candidates = [node.value] + [f"{prefix}{node.value}{suffix}" for prefix, suffix in patterns]
+            datasets.extend(name for name in candidates if name in available)
+        elif (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+              and isinstance(node.func.value, ast.Name) and node.func.value.id in CHART_MODULES):
+            charts.append(f"{node.func.value.id}.{node.func.attr}")
+    return PageWarmup(page_name(path), list(dict.fromkeys(datasets)), list(dict.fromkeys(charts)), str(path))
+
+
+def plan(priority=None):
+    """
+    Warm-up steps, highest priority first
+
+    Args:
+        priority (list, optional): Page names to warm first, e.g.
+            ['2_Beef', '12_Markets']; defaults to DASHBOARD_WARMUP_PRIORITY
+            (comma separated), or to the most used pages. Other pages
+            follow in sidebar order.
+
+    Returns:
+        list: PageWarmup steps
+    """
+    if priority is None:
+        priority = [name.strip() for name in os.environ.get(PRIORITY_ENV, '').split(',') if name.strip()]
+        priority = priority or usage.ranked_pages()
+    available = set(list_datasets())
+    steps = [scan_page(path, available) for path in page_scripts()]
+    rank = {name: position for position, name in enumerate(priority)}
+    # sorted() is stable, so unranked pages keep their sidebar order
+    return sorted(steps, key=lambda step: rank.get(step.page, len(rank)))
+
+
+def _sample_frame():
+    return pd.DataFrame({
+        'x': pd.date_range('2024-01-01', periods=6, freq='MS'),
+        'y': [1.0, 2.0, 3.0, 2.0, 1.0, 2.0],
+        'group': ['a', 'b'] * 3
+    })
+
+
+def _sample_trace(trace, frame):
+    """Keyword arguments of a sample trace, None for trace types not drawn from x/y."""
+    if hasattr(trace, 'open'):
+        # Candlestick, Ohlc
+        return {'x': frame['x'], 'open': frame['y'], 'high': frame['y'] + 1,
+                'low': frame['y'] - 1, 'close': frame['y']}
+    if hasattr(trace, 'z'):
+        # Heatmap, Contour
+        return {'x': frame['x'], 'y': frame['group'].unique(), 'z': [frame['y'].tolist()] * 2}
+    if hasattr(trace, 'x') and hasattr(trace, 'y'):
+        return {'x': frame['x'], 'y': frame['y']}
+    return None
+
+
+def warm_chart(chart):
+    """
+    Build and serialize a small figure of one chart type
+
+    Trace types drawn from neither x/y, OHLC nor z data (e.g. go.Pie) are
+    skipped.
+
+    Args:
+        chart (str): 'px.<function>' or 'go.<class>', as found by scan_page
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import plotly.io
+
+    module, _, attr = chart.partition('.')
+    frame = _sample_frame()
+    if module == 'px':
+        figure = getattr(px, attr)(frame, x='x', y='y', color='group')
+    elif attr == 'Figure':
+        figure = go.Figure()
+    else:
+        trace = getattr(go, attr)
+        arguments = _sample_trace(trace, frame)
+        if arguments is None:
+            return
+        figure = go.Figure(trace(**arguments))
+    figure.update_layout(title=chart, hovermode='x unified')
+    plotly.io.to_json(figure, validate=False)
+
+
+def prebuild_page(path, timeout=PAGE_TIMEOUT):
+    """
+    Run a page headlessly so its @cached loaders are built
+
+    Runs in a worker process (see core.snapshot.run_page); the results
+    reach the server through the artifact disk tier.
+
+    Args:
+        path (str): Page script
+        timeout (float): Seconds allowed for the page to run
+
+    Returns:
+        list: Error messages of the run
+    """
+    from core.snapshot import run_page
+
+    _, _, errors = run_page(path, timeout)
+    return errors
+
+
+def _page_pool():
+    """Worker process for prebuild_page, or None when pages are not prebuilt."""
+    if os.environ.get(PAGES_ENV, '1').lower() in ('0', 'false', 'no') or get_cache().disk is None:
+        return None
+    # Spawned rather than forked: the server process runs threads. AppTest
+    # replaces __main__ with the page, so each page gets a fresh worker.
+    return ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'),
+                               max_tasks_per_child=1)
+
+
+_state = {'status': 'idle', 'started': None, 'finished': None, 'pages': [], 'errors': []}
+_state_lock = threading.Lock()
+_thread = None
+
+
+def _update(**changes):
+    with _state_lock:
+        _state.update(changes)
+
+
+def _add_error(page, error):
+    with _state_lock:
+        _state['errors'].append({'page': page, 'error': repr(error)})
+
+
+def is_ready():
+    """Whether warm-up has finished."""
+    return _state['status'] == 'ready'
+
+
+def status():
+    """Snapshot of the warm-up progress."""
+    with _state_lock:
+        return {**_state, 'pages': list(_state['pages']), 'errors': list(_state['errors'])}
+
+
+def run_warmup(priority=None):
+    """
+    Warm up every page in priority order
+
+    Failures are logged and reported in status() but never raised: a page
+    with a missing dataset must not keep the server out of rotation.
+
+    Args:
+        priority (list, optional): Pages to warm first, see plan()
+
+    Returns:
+        dict: Final status
+    """
+    _update(status='running', started=time.time(), finished=None, pages=[], errors=[])
+    warmed_charts = set()
+    try:
+        steps = plan(priority)
+    except Exception as error:
+        logger.exception("Warm-up planning failed")
+        steps = []
+        _add_error(None, error)
+
+    pool = _page_pool()
+    for step in steps:
+        with metrics.timed('warmup_page', step.page, datasets=len(step.datasets)):
+            try:
+                load_datasets(step.datasets)
+            except Exception as error:
+                logger.warning("Warm-up of %s datasets failed: %r", step.page, error)
+                _add_error(step.page, error)
+            for chart in step.charts:
+                if chart in warmed_charts:
+                    continue
+                warmed_charts.add(chart)
+                try:
+                    warm_chart(chart)
+                except Exception as error:
+                    logger.warning("Warm-up of %s chart %s failed: %r", step.page, chart, error)
+                    _add_error(step.page, error)
+            if pool is not None and step.path:
+                try:
+                    for message in pool.submit(prebuild_page, step.path).result():
+                        _add_error(step.page, RuntimeError(message))
+                except Exception as error:
+                    logger.warning("Warm-up run of %s failed: %r", step.page, error)
+                    _add_error(step.page, error)
+        with _state_lock:
+            _state['pages'].append(step.page)
+    if pool is not None:
+        pool.shutdown()
+
+    _update(status='ready', finished=time.time())
+    logger.info("Warm-up finished in %.1fs", _state['finished'] - _state['started'])
+    return status()
+
+
+def start_background_warmup(priority=None, ready_port=None):
+    """
+    Start warm-up in a daemon thread, once per process
+
+    Also starts the artifact refresh watcher of core.cache.
+
+    Args:
+        priority (list, optional): Pages to warm first, see plan()
+        ready_port (int, optional): Also serve /ready on this port,
+            defaults to DASHBOARD_READY_PORT when set
+
+    Returns:
+        threading.Thread: The warm-up thread
+    """
+    global _thread
+    with _state_lock:
+        if _thread is not None:
+            return _thread
+        _thread = threading.Thread(target=run_warmup, args=(priority,), name='dashboard-warmup', daemon=True)
+
+    ready_port = ready_port or os.environ.get(READY_PORT_ENV)
+    if ready_port:
+        serve_readiness(int(ready_port))
+    _thread.start()
+    start_refresh_watcher()
+    return _thread
+
+
+def start_from_env():
+    """Start the background warm-up if DASHBOARD_WARMUP is set."""
+    if os.environ.get(WARMUP_ENV, '').lower() in ('1', 'true', 'yes'):
+        return start_background_warmup()
+    return None
+
+
+class _ReadinessHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip('/') == '/ready':
+            code = 200 if is_ready() else 503
+            body = b'ready\n' if code == 200 else b'warming up\n'
+            content_type = 'text/plain'
+        elif self.path.rstrip('/') == '/status':
+            code = 200
+            body = json.dumps(status()).encode('utf-8')
+            content_type = 'application/json'
+        else:
+            code, body, content_type = 404, b'not found\n', 'text/plain'
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/usage':
+            self.send_response(404)
+            self.end_headers()
+            return
+        length = min(int(self.headers.get('Content-Length') or 0), 4096)
+        usage.record_beacon(self.rfile.read(length))
+        self.send_response(204)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def serve_readiness(port=DEFAULT_READY_PORT, host='0.0.0.0'):
+    """
+    Serve GET /ready, GET /status and POST /usage from a daemon thread
+
+    Args:
+        port (int): Port to listen on
+        host (str): Interface to bind
+
+    Returns:
+        ThreadingHTTPServer: The running server
+    """
+    server = ThreadingHTTPServer((host, port), _ReadinessHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='dashboard-readiness', daemon=True).start()
+    return server
+
+
+def check_pages(timeout=60):
+    """
+    Run every page headlessly and collect exceptions
+
+    Uses streamlit's AppTest, so it must not run inside a live server.
+
+    Args:
+        timeout (float): Seconds allowed per page
+
+    Returns:
+        dict: Error messages keyed by page name, empty when all pages render
+    """
+    from streamlit.testing.v1 import AppTest
+
+    failures = {}
+    for path in page_scripts():
+        with metrics.timed('warmup_check', page_name(path)):
+            app = AppTest.from_file(str(path), default_timeout=timeout).run()
+        if app.exception:
+            failures[page_name(path)] = [exception.message for exception in app.exception]
+    return failures
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Warm up the dashboard caches")
+    parser.add_argument('--priority', help="Comma separated pages to warm first, e.g. 2_Beef,12_Markets")
+    parser.add_argument('--check', action='store_true', help="Also run every page headlessly")
+    parser.add_argument('--serve', action='store_true',
+                        help="Warm up in the background and run the Streamlit server in this process")
+    parser.add_argument('--ready-port', type=int, default=None, help="Port of the /ready endpoint")
+    args, streamlit_args = parser.parse_known_args()
+    priority = args.priority.split(',') if args.priority else None
+
+    if args.serve:
+        from streamlit.web import cli as stcli
+
+        start_background_warmup(priority, args.ready_port or os.environ.get(READY_PORT_ENV) or DEFAULT_READY_PORT)
+        sys.argv = ['streamlit', 'run', str(HOME_PAGE)] + streamlit_args
+        sys.exit(stcli.main())
+
+    result = run_warmup(priority)
+    for entry in metrics.recent('warmup_page'):
+        print(f"{entry['name']:<24} {entry['datasets']:>3} datasets  {entry['seconds']:.2f}s")
+    for error in result['errors']:
+        print(f"ERROR {error['page']}: {error['error']}")
+
+    failures = check_pages() if args.check else {}
+    for page, messages in failures.items():
+        print(f"FAILED {page}: {'; '.join(messages)}")
+    sys.exit(1 if result['errors'] or failures else 0)
@@ -1,8 +1,15 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-from pathlib import Path
+import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from core import markets
+from core.pyramid import build_pyramid
+from core.storage import load_datasets
+from core.cache import cached
+from core.render import plotly_chart, zoom_chart
+from core.usage import track_page
 
 # Set page config
 st.set_page_config(
@@ -10,6 +17,7 @@ st.set_page_config(
     page_icon="🌾",
     layout="wide"
 )
+track_page(__file__)
 
 # Title and description
 st.title("🌾 Agribusiness")
@@ -17,222 +25,131 @@ st.markdown("""
 This page shows agribusiness data including commodity prices, funds, and supply & demand.
 """)
 
+# Commodity price charts: title and unit
+COMMODITIES = {
+    "CORN": ('Corn Price', 'Price (US cents/bushel)'),
+    "SOY": ('Soybean Price', 'Price (US cents/bushel)'),
+    "COTTON": ('Cotton Price', 'Price (US cents/pound)'),
+    "WHEAT": ('Wheat Price', 'Price (US cents/bushel)'),
+    "SUGAR": ('Sugar Price', 'Price (US cents/pound)'),
+    "COFFEE": ('Coffee Price', 'Price (US cents/pound)'),
+    "OIL": ('Oil Price', 'Price (US dollars/barrel)')
+}
+
+# CFTC contracts with net long positions of funds
+NET_LONG = {
+    "CORN": "Corn",
+    "SOY": "Soybean",
+    "COTTON": "Cotton",
+    "SUGAR": "Sugar",
+    "WHEAT": "Wheat"
+}
+
 # Load the data
-@st.cache_data
-def load_commodity_data(commodity_code):
-    file_path = Path(f"datasets/US_{commodity_code}_PRICE.csv")
-    df = pd.read_csv(file_path)
-    df['DATE'] = pd.to_datetime(df['DATE'])
-    
-    # Filter last 2 years
-    two_years_ago = datetime.now() - timedelta(days=2*365)
-    df = df[df['DATE'] >= two_years_ago]
-    
-    return df
+# Prices are kept as resolution pyramids, so charts only receive the visible window
+@cached(tab="Prices")
+def load_commodity_pyramids(commodity_codes):
+    datasets = load_datasets([f"US_{code}_PRICE" for code in commodity_codes])
+    pyramids = {}
+    for code in commodity_codes:
+        df = datasets[f"US_{code}_PRICE"]
+        df['DATE'] = pd.to_datetime(df['DATE'])
+        pyramids[code] = build_pyramid(df.set_index('DATE')[f"US_{code}_PRICE"])
+    return pyramids
 
-@st.cache_data
-def load_net_long_data(commodity_code):
-    file_path = Path(f"datasets/US_{commodity_code}_NET_LONG.csv")
-    df = pd.read_csv(file_path)
-    df['DATE'] = pd.to_datetime(df['DATE'])
-    
-    # Filter last 2 years
-    two_years_ago = datetime.now() - timedelta(days=2*365)
-    df = df[df['DATE'] >= two_years_ago]
-    
-    return df
+# Stack every contract's net long positions into one matrix and compute all statistics on it
+@cached(tab="Funds")
+def load_positioning(commodity_codes):
+    datasets = load_datasets([f"US_{code}_NET_LONG" for code in commodity_codes])
+    positions = markets.positioning_matrix({
+        code: pd.Series(datasets[f"US_{code}_NET_LONG"][f"US_{code}_NET_LONG"].to_numpy(),
+                        index=pd.to_datetime(datasets[f"US_{code}_NET_LONG"]['DATE']))
+        for code in commodity_codes
+    })
+    return positions, markets.positioning_stats(positions)
 
 # Create tabs for different sections
 tab1, tab2, tab3 = st.tabs(["Prices", "Funds", "S&D"])
 
 # Prices Tab
 with tab1:
-    # Load data for each commodity
-    corn_df = load_commodity_data("CORN")
-    soy_df = load_commodity_data("SOY")
-    cotton_df = load_commodity_data("COTTON")
-    wheat_df = load_commodity_data("WHEAT")
-    sugar_df = load_commodity_data("SUGAR")
-    coffee_df = load_commodity_data("COFFEE")
-    oil_df = load_commodity_data("OIL")
-    
-    # Row 1
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        fig_corn = px.line(corn_df, 
-                          x='DATE', 
-                          y='US_CORN_PRICE',
-                          title='Corn Price',
-                          labels={'US_CORN_PRICE': 'Price (US cents/bushel)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_corn, use_container_width=True)
+    pyramids = load_commodity_pyramids(tuple(COMMODITIES))
     
-    with col2:
-        fig_soy = px.line(soy_df, 
-                         x='DATE', 
-                         y='US_SOY_PRICE',
-                         title='Soybean Price',
-                         labels={'US_SOY_PRICE': 'Price (US cents/bushel)', 
-                                'DATE': 'Date'})
-        st.plotly_chart(fig_soy, use_container_width=True)
-    
-    # Row 2
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        fig_cotton = px.line(cotton_df, 
-                            x='DATE', 
-                            y='US_COTTON_PRICE',
-                            title='Cotton Price',
-                            labels={'US_COTTON_PRICE': 'Price (US cents/pound)', 
-                                   'DATE': 'Date'})
-        st.plotly_chart(fig_cotton, use_container_width=True)
-    
-    with col2:
-        fig_wheat = px.line(wheat_df, 
-                           x='DATE', 
-                           y='US_WHEAT_PRICE',
-                           title='Wheat Price',
-                           labels={'US_WHEAT_PRICE': 'Price (US cents/bushel)', 
-                                  'DATE': 'Date'})
-        st.plotly_chart(fig_wheat, use_container_width=True)
-    
-    # Row 3
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        fig_sugar = px.line(sugar_df, 
-                           x='DATE', 
-                           y='US_SUGAR_PRICE',
-                           title='Sugar Price',
-                           labels={'US_SUGAR_PRICE': 'Price (US cents/pound)', 
-                                  'DATE': 'Date'})
-        st.plotly_chart(fig_sugar, use_container_width=True)
-    
-    with col2:
-        fig_coffee = px.line(coffee_df, 
-                            x='DATE', 
-                            y='US_COFFEE_PRICE',
-                            title='Coffee Price',
-                            labels={'US_COFFEE_PRICE': 'Price (US cents/pound)', 
-                                   'DATE': 'Date'})
-        st.plotly_chart(fig_coffee, use_container_width=True)
-    
-    # Row 4
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        fig_oil = px.line(oil_df, 
-                         x='DATE', 
-                         y='US_OIL_PRICE',
-                         title='Oil Price',
-                         labels={'US_OIL_PRICE': 'Price (US dollars/barrel)', 
-                                'DATE': 'Date'})
-        st.plotly_chart(fig_oil, use_container_width=True)
+    # Open on the last 2 years; zooming out loads the full history
+    two_years_ago = datetime.now() - timedelta(days=2*365)
+    initial_range = (two_years_ago, datetime.now())
+    
+    # Two charts per row
+    codes = list(COMMODITIES)
+    for row in range(0, len(codes), 2):
+        for col, code in zip(st.columns(2), codes[row:row + 2]):
+            title, unit = COMMODITIES[code]
+            with col:
+                zoom_chart(pyramids[code],
+                           key=f"zoom_{code}",
+                           title=title,
+                           y_title=unit,
+                           initial_range=initial_range)
 
 # Funds Tab
 with tab2:
-    # Load data for each commodity's net long positions
-    corn_long_df = load_net_long_data("CORN")
-    soy_long_df = load_net_long_data("SOY")
-    cotton_long_df = load_net_long_data("COTTON")
-    sugar_long_df = load_net_long_data("SUGAR")
-    wheat_long_df = load_net_long_data("WHEAT")
-    
-    # Row 1
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        # Create a color array based on whether values are positive or negative
-        colors = ['red' if val < 0 else 'green' for val in corn_long_df['US_CORN_NET_LONG']]
-        
-        fig_corn_long = px.bar(corn_long_df, 
-                              x='DATE', 
-                              y='US_CORN_NET_LONG',
-                              title='Corn Net Long Positions',
-                              labels={'US_CORN_NET_LONG': 'Net Long (contracts)', 
-                                     'DATE': 'Date'},
-                              color_discrete_sequence=['green'])
-        
-        # Update the bar colors
-        fig_corn_long.update_traces(marker_color=colors)
-        
-        st.plotly_chart(fig_corn_long, use_container_width=True)
-    
-    with col2:
-        # Create a color array based on whether values are positive or negative
-        colors = ['red' if val < 0 else 'green' for val in soy_long_df['US_SOY_NET_LONG']]
-        
-        fig_soy_long = px.bar(soy_long_df, 
-                             x='DATE', 
-                             y='US_SOY_NET_LONG',
-                             title='Soybean Net Long Positions',
-                             labels={'US_SOY_NET_LONG': 'Net Long (contracts)', 
-                                    'DATE': 'Date'},
-                             color_discrete_sequence=['green'])
-        
-        # Update the bar colors
-        fig_soy_long.update_traces(marker_color=colors)
-        
-        st.plotly_chart(fig_soy_long, use_container_width=True)
-    
-    # Row 2
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        # Create a color array based on whether values are positive or negative
-        colors = ['red' if val < 0 else 'green' for val in cotton_long_df['US_COTTON_NET_LONG']]
-        
-        fig_cotton_long = px.bar(cotton_long_df, 
-                                x='DATE', 
-                                y='US_COTTON_NET_LONG',
-                                title='Cotton Net Long Positions',
-                                labels={'US_COTTON_NET_LONG': 'Net Long (contracts)', 
-                                       'DATE': 'Date'},
-                                color_discrete_sequence=['green'])
-        
-        # Update the bar colors
-        fig_cotton_long.update_traces(marker_color=colors)
-        
-        st.plotly_chart(fig_cotton_long, use_container_width=True)
-    
-    with col2:
-        # Create a color array based on whether values are positive or negative
-        colors = ['red' if val < 0 else 'green' for val in sugar_long_df['US_SUGAR_NET_LONG']]
-        
-        fig_sugar_long = px.bar(sugar_long_df, 
-                               x='DATE', 
-                               y='US_SUGAR_NET_LONG',
-                               title='Sugar Net Long Positions',
-                               labels={'US_SUGAR_NET_LONG': 'Net Long (contracts)', 
-                                      'DATE': 'Date'},
-                               color_discrete_sequence=['green'])
-        
-        # Update the bar colors
-        fig_sugar_long.update_traces(marker_color=colors)
-        
-        st.plotly_chart(fig_sugar_long, use_container_width=True)
-    
-    # Row 3
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        # Create a color array based on whether values are positive or negative
-        colors = ['red' if val < 0 else 'green' for val in wheat_long_df['US_WHEAT_NET_LONG']]
-        
-        fig_wheat_long = px.bar(wheat_long_df, 
-                               x='DATE', 
-                               y='US_WHEAT_NET_LONG',
-                               title='Wheat Net Long Positions',
-                               labels={'US_WHEAT_NET_LONG': 'Net Long (contracts)', 
+    positions, positioning = load_positioning(tuple(NET_LONG))
+    summary = positioning['summary']
+
+    # Ranking of the latest report, most crowded long first
+    st.subheader("Positioning vs. Last 3 Years")
+    st.caption("Percentile rank and z-score of the latest net long position within the last 156 weekly reports.")
+    table = pd.DataFrame({
+        'Contract': [NET_LONG[code] for code in summary.index],
+        'Report': summary['Report'].dt.date,
+        'Net Long (contracts)': summary['Net Long'].round(0),
+        'Weekly Change': summary['Change'].round(0),
+        'Percentile': summary['Percentile'].round(1),
+        'Z-Score': summary['Z-Score'].round(2)
+    })
+    st.dataframe(table, hide_index=True, use_container_width=True)
+
+    # Percentile of every contract over the last year of reports
+    recent = positioning['percentile'].iloc[-52:][summary.index]
+    fig_heatmap = go.Figure(go.Heatmap(
+        z=recent.to_numpy().T,
+        x=recent.index,
+        y=[NET_LONG[code] for code in recent.columns],
+        colorscale='RdYlGn',
+        zmin=0,
+        zmax=100,
+        colorbar=dict(title='Percentile')
+    ))
+    fig_heatmap.update_layout(
+        title='Net Long Percentile (3-Year Window) - Last 52 Reports',
+        xaxis_title='Report Date',
+        height=400
+    )
+    plotly_chart(fig_heatmap, use_container_width=True)
+
+    # Net long positions over the last 2 years, two charts per row
+    two_years_ago = datetime.now() - timedelta(days=2*365)
+    recent_positions = positions[positions.index >= two_years_ago]
+    codes = list(NET_LONG)
+    for row in range(0, len(codes), 2):
+        for col, code in zip(st.columns(2), codes[row:row + 2]):
+            column = f"US_{code}_NET_LONG"
+            values = recent_positions[code].dropna()
+            long_df = pd.DataFrame({'DATE': values.index, column: values.to_numpy()})
+
+            fig_long = px.bar(long_df,
+                              x='DATE',
+                              y=column,
+                              title=f'{NET_LONG[code]} Net Long Positions',
+                              labels={column: 'Net Long (contracts)',
                                       'DATE': 'Date'},
-                               color_discrete_sequence=['green'])
-        
-        # Update the bar colors
-        fig_wheat_long.update_traces(marker_color=colors)
-        
-        st.plotly_chart(fig_wheat_long, use_container_width=True)
+                              color_discrete_sequence=['green'])
+
+            # Red bars for net short weeks
+            fig_long.update_traces(marker_color=np.where(long_df[column] < 0, 'red', 'green'))
+
+            with col:
+                plotly_chart(fig_long, use_container_width=True)
 
 # S&D Tab
 with tab3:
@@ -2,6 +2,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from pathlib import Path
+from core.usage import track_page
 
 # Set page config
 st.set_page_config(
@@ -9,6 +10,7 @@ st.set_page_config(
     page_icon="📊",
     layout="wide"
 )
+track_page(__file__)
 
 # Title and description
 st.title("📊 Macro")
@@ -1,8 +1,14 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from pathlib import Path
+import plotly.graph_objects as go
 from datetime import datetime, timedelta
+from core import markets, ticks
+from core.controls import fragment
+from core.pyramid import build_pyramid
+from core.storage import load_datasets
+from core.cache import cached
+from core.render import plotly_chart, zoom_chart
+from core.usage import track_page
 
 # Set page config
 st.set_page_config(
@@ -10,6 +16,7 @@ st.set_page_config(
     page_icon="📈",
     layout="wide"
 )
+track_page(__file__)
 
 # Title and description
 st.title("📈 Markets")
@@ -17,164 +24,193 @@ st.markdown("""
 This page shows market data including stock prices and short positions.
 """)
 
-# Load the data
-@st.cache_data
-def load_stock_data(stock_code):
-    file_path = Path(f"datasets/BR_{stock_code}_PRICE.csv")
-    df = pd.read_csv(file_path)
-    df['DATE'] = pd.to_datetime(df['DATE'])
-    
-    # Filter last 2 years
-    two_years_ago = datetime.now() - timedelta(days=2*365)
-    df = df[df['DATE'] >= two_years_ago]
-    
-    return df
+# Stock names shown in the chart titles
+STOCKS = {
+    "ABEV3": "Ambev",
+    "BEEF3": "Minerva",
+    "BRFS3": "BRF",
+    "CAML3": "Camil",
+    "JBSS3": "JBS",
+    "MDIA3": "M. Dias Branco",
+    "MRFG3": "Marfrig",
+    "RAIZ4": "Raízen",
+    "SLCE3": "SLC Agrícola",
+    "SMTO3": "São Martinho",
+    "SOJA3": "Boa Safra",
+    "TTEN3": "Tereos"
+}
+
+# Start of the all-tickers chart
+HISTORY_START = '2000-01-01'
+
+# Commodity prices the tickers' betas are measured against
+FACTORS = {
+    "Corn": "US_CORN_PRICE",
+    "Soybean": "US_SOY_PRICE",
+    "Sugar": "US_SUGAR_PRICE",
+    "Cattle": "BR_CATTLE_PRICE"
+}
+
+# Live bar intervals, in seconds
+LIVE_INTERVALS = {"1 min": 60, "5 min": 300, "15 min": 900}
+LIVE_REFRESH_SECONDS = 2
+
+# Load the data as resolution pyramids, so charts only receive the visible window
+@cached(tab="Prices")
+def load_stock_pyramids(stock_codes):
+    datasets = load_datasets([f"BR_{code}_PRICE" for code in stock_codes])
+    pyramids = {}
+    for code in stock_codes:
+        df = datasets[f"BR_{code}_PRICE"]
+        df['DATE'] = pd.to_datetime(df['DATE'])
+        pyramids[code] = build_pyramid(df.set_index('DATE')[f"BR_{code}_PRICE"])
+    return pyramids
 
-# Create tabs for different sections
-tab1, tab2 = st.tabs(["Prices", "Short"])
+# Align every ticker and factor on the B3 calendar once, then compute all statistics on the matrix
+@cached(tab="Analytics")
+def load_market_stats(stock_codes):
+    datasets = load_datasets([f"BR_{code}_PRICE" for code in stock_codes] + list(FACTORS.values()))
+
+    def series(name):
+        df = datasets[name]
+        return pd.Series(df[name].to_numpy(), index=pd.to_datetime(df['DATE']))
+
+    prices = markets.price_matrix({code: series(f"BR_{code}_PRICE") for code in stock_codes})
+    factors = markets.price_matrix({label: series(name) for label, name in FACTORS.items()}, prices.index)
+    return markets.market_stats(prices, factors)
+
+def line_chart(frame, title, y_title, percent=True):
+    fig = go.Figure()
+    for code in frame.columns:
+        fig.add_trace(go.Scatter(x=frame.index, y=frame[code] * (100 if percent else 1), mode='lines', name=code))
+    fig.update_layout(
+        title=title,
+        xaxis_title='Date',
+        yaxis_title=y_title,
+        hovermode='x unified',
+        height=450
+    )
+    return fig
+
+# Live intraday bars, redrawn from the shared tick buffers without rerunning the page
+@fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_charts(feed):
+    label = st.radio("Bars", list(LIVE_INTERVALS), horizontal=True, key="live_interval",
+                     label_visibility='collapsed')
+    interval = LIVE_INTERVALS[label]
+    available = [code for code in STOCKS if code in feed.store.tickers()]
+    if not available:
+        st.info("Waiting for the first ticks from the price feed...")
+        return
+    if not feed.connected:
+        st.warning("The price feed is disconnected; showing the last ticks received.")
+
+    for row in range(0, len(available), 2):
+        for col, code in zip(st.columns(2), available[row:row + 2]):
+            bars = feed.store.bars(code, interval)
+            bars.index = bars.index.tz_convert('America/Sao_Paulo')
+            fig = go.Figure(go.Candlestick(x=bars.index, open=bars['open'], high=bars['high'],
+                                           low=bars['low'], close=bars['close'], name=code))
+            fig.update_layout(
+                title=f"{STOCKS[code]} ({code}) - {label} Bars, Last {bars['close'].iloc[-1]:.2f}",
+                yaxis_title='Price (BRL)',
+                xaxis_rangeslider_visible=False,
+                height=350,
+                margin=dict(t=50, b=20)
+            )
+            with col:
+                plotly_chart(fig, use_container_width=True)
+
+# Create tabs for different sections; the Live tab needs a price feed (DASHBOARD_TICK_FEED)
+feed = ticks.get_feed()
+if feed is not None:
+    tab1, tab2, tab3, tab4 = st.tabs(["Prices", "Analytics", "Short", "Live"])
+else:
+    tab1, tab2, tab3 = st.tabs(["Prices", "Analytics", "Short"])
 
 # Prices Tab
 with tab1:
-    # Load data for each stock
-    abev_df = load_stock_data("ABEV3")
-    beef_df = load_stock_data("BEEF3")
-    brfs_df = load_stock_data("BRFS3")
-    caml_df = load_stock_data("CAML3")
-    jbss_df = load_stock_data("JBSS3")
-    mdia_df = load_stock_data("MDIA3")
-    mfrg_df = load_stock_data("MRFG3")
-    raiz_df = load_stock_data("RAIZ4")
-    slce_df = load_stock_data("SLCE3")
-    smto_df = load_stock_data("SMTO3")
-    soja_df = load_stock_data("SOJA3")
-    tten_df = load_stock_data("TTEN3")
-    
-    # Row 1
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        fig_abev = px.line(abev_df, 
-                          x='DATE', 
-                          y='BR_ABEV3_PRICE',
-                          title='Ambev (ABEV3) Stock Price',
-                          labels={'BR_ABEV3_PRICE': 'Price (BRL)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_abev, use_container_width=True)
-    
-    with col2:
-        fig_beef = px.line(beef_df, 
-                          x='DATE', 
-                          y='BR_BEEF3_PRICE',
-                          title='Minerva (BEEF3) Stock Price',
-                          labels={'BR_BEEF3_PRICE': 'Price (BRL)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_beef, use_container_width=True)
-    
-    # Row 2
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        fig_brfs = px.line(brfs_df, 
-                          x='DATE', 
-                          y='BR_BRFS3_PRICE',
-                          title='BRF (BRFS3) Stock Price',
-                          labels={'BR_BRFS3_PRICE': 'Price (BRL)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_brfs, use_container_width=True)
-    
-    with col2:
-        fig_caml = px.line(caml_df, 
-                          x='DATE', 
-                          y='BR_CAML3_PRICE',
-                          title='Camil (CAML3) Stock Price',
-                          labels={'BR_CAML3_PRICE': 'Price (BRL)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_caml, use_container_width=True)
-    
-    # Row 3
-    col1, col2 = st.columns(2)
+    pyramids = load_stock_pyramids(tuple(STOCKS))
     
-    with col1:
-        fig_jbss = px.line(jbss_df, 
-                          x='DATE', 
-                          y='BR_JBSS3_PRICE',
-                          title='JBS (JBSS3) Stock Price',
-                          labels={'BR_JBSS3_PRICE': 'Price (BRL)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_jbss, use_container_width=True)
-    
-    with col2:
-        fig_mdia = px.line(mdia_df, 
-                          x='DATE', 
-                          y='BR_MDIA3_PRICE',
-                          title='M. Dias Branco (MDIA3) Stock Price',
-                          labels={'BR_MDIA3_PRICE': 'Price (BRL)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_mdia, use_container_width=True)
-    
-    # Row 4
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        fig_mfrg = px.line(mfrg_df, 
-                          x='DATE', 
-                          y='BR_MRFG3_PRICE',
-                          title='Marfrig (MRFG3) Stock Price',
-                          labels={'BR_MRFG3_PRICE': 'Price (BRL)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_mfrg, use_container_width=True)
-    
-    with col2:
-        fig_raiz = px.line(raiz_df, 
-                          x='DATE', 
-                          y='BR_RAIZ4_PRICE',
-                          title='Raízen (RAIZ4) Stock Price',
-                          labels={'BR_RAIZ4_PRICE': 'Price (BRL)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_raiz, use_container_width=True)
-    
-    # Row 5
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        fig_slce = px.line(slce_df, 
-                          x='DATE', 
-                          y='BR_SLCE3_PRICE',
-                          title='SLC Agrícola (SLCE3) Stock Price',
-                          labels={'BR_SLCE3_PRICE': 'Price (BRL)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_slce, use_container_width=True)
-    
-    with col2:
-        fig_smto = px.line(smto_df, 
-                          x='DATE', 
-                          y='BR_SMTO3_PRICE',
-                          title='São Martinho (SMTO3) Stock Price',
-                          labels={'BR_SMTO3_PRICE': 'Price (BRL)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_smto, use_container_width=True)
-    
-    # Row 6
+    # Open on the last 2 years; zooming out loads the full history
+    two_years_ago = datetime.now() - timedelta(days=2*365)
+    initial_range = (two_years_ago, datetime.now())
+    
+    # Two charts per row
+    codes = list(STOCKS)
+    for row in range(0, len(codes), 2):
+        for col, code in zip(st.columns(2), codes[row:row + 2]):
+            with col:
+                zoom_chart(pyramids[code],
+                           key=f"zoom_{code}",
+                           title=f"{STOCKS[code]} ({code}) Stock Price",
+                           y_title='Price (BRL)',
+                           initial_range=initial_range)
+    
+    # Full daily history of every ticker
+    zoom_chart(pyramids,
+               key="zoom_all_tickers",
+               title='All Tickers - Daily Stock Prices since 2000',
+               y_title='Price (BRL)',
+               initial_range=(HISTORY_START, datetime.now()),
+               height=550,
+               max_points=6000)
+
+# Analytics Tab
+with tab2:
+    stats = load_market_stats(tuple(STOCKS))
+    window = datetime.now() - timedelta(days=3*365)
+
+    # Latest values of every ticker, percentages rounded for display
+    summary = stats['summary']
+    table = pd.DataFrame({
+        'Ticker': summary.index,
+        'Company': [STOCKS[code] for code in summary.index],
+        'Price (BRL)': summary['Price'].round(2),
+        '3M Return (%)': (summary['Return'] * 100).round(1),
+        '3M Volatility (%)': (summary['Volatility'] * 100).round(1),
+        'Drawdown (%)': (summary['Drawdown'] * 100).round(1),
+        'Max Drawdown (%)': (summary['Max Drawdown'] * 100).round(1),
+        **{f'1Y Beta {factor}': summary[f'Beta {factor}'].round(2) for factor in FACTORS}
+    })
+    st.subheader("Latest Statistics")
+    st.caption("Daily prices aligned on the B3 trading calendar. Returns and volatility over 63 trading days, "
+               "betas to commodity prices over 252 trading days.")
+    st.dataframe(table, hide_index=True, use_container_width=True)
+
     col1, col2 = st.columns(2)
-    
     with col1:
-        fig_soja = px.line(soja_df, 
-                          x='DATE', 
-                          y='BR_SOJA3_PRICE',
-                          title='Boa Safra (SOJA3) Stock Price',
-                          labels={'BR_SOJA3_PRICE': 'Price (BRL)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_soja, use_container_width=True)
-    
+        volatility = stats['volatility'][stats['volatility'].index >= window]
+        plotly_chart(line_chart(volatility, '3M Realized Volatility (Annualized) - Last 3 Years', 'Volatility (%)'),
+                     use_container_width=True)
     with col2:
-        fig_tten = px.line(tten_df, 
-                          x='DATE', 
-                          y='BR_TTEN3_PRICE',
-                          title='Tereos (TTEN3) Stock Price',
-                          labels={'BR_TTEN3_PRICE': 'Price (BRL)', 
-                                 'DATE': 'Date'})
-        st.plotly_chart(fig_tten, use_container_width=True)
+        drawdown = stats['drawdown'][stats['drawdown'].index >= window]
+        plotly_chart(line_chart(drawdown, 'Drawdown from Running High - Last 3 Years', 'Drawdown (%)'),
+                     use_container_width=True)
+
+    # Latest betas, tickers x factors
+    betas = summary[[f'Beta {factor}' for factor in FACTORS]]
+    fig_beta = go.Figure(go.Heatmap(
+        z=betas.to_numpy(),
+        x=list(FACTORS),
+        y=list(betas.index),
+        colorscale='RdBu',
+        zmid=0,
+        text=betas.round(2).to_numpy(),
+        texttemplate='%{text}',
+        colorbar=dict(title='Beta')
+    ))
+    fig_beta.update_layout(
+        title='1Y Beta of Daily Returns to Commodity Prices',
+        height=500
+    )
+    plotly_chart(fig_beta, use_container_width=True)
 
 # Short Tab
-with tab2:
-    st.info("Short position data will be added soon.") 
\ No newline at end of file
+with tab3:
+    st.info("Short position data will be added soon.") 
+
+# Live Tab
+if feed is not None:
+    with tab4:
+        live_charts(feed)
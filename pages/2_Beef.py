@@ -2,8 +2,15 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from pathlib import Path
 from datetime import datetime
+from core.agcalendar import month_abbr, quarter_label, quarter_to_date
+from core.storage import load_datasets
+from core.cache import cached
+from core.controls import DAILY_SMOOTHING, chart_controls, fragment, recent_years, since, smooth, window_title
+from core.panel import PanelColumn, load_panel
+from core.render import plotly_chart
+from core.seasonal import seasonal_dataset, seasonal_figure
+from core.usage import track_page
 
 # Set page config
 st.set_page_config(
@@ -11,6 +18,7 @@ st.set_page_config(
     page_icon="🥩",
     layout="wide"
 )
+track_page(__file__)
 
 # Title and description
 st.title("🥩 Beef")
@@ -19,49 +27,38 @@ This page shows beef prices and cattle prices across different countries.
 """)
 
 # Load the data
-@st.cache_data
+@cached
 def load_data():
-    beef_price_path = Path("datasets/BR_BEEF_PRICES.csv")
-    cattle_price_path = Path("datasets/BR_CATTLE_PRICE.csv")
-    cattle_herd_path = Path("datasets/BR_CATTLE_HERD.csv")
-    ar_food_path = Path("datasets/AR_FOOD.csv")
-    au_cattle_path = Path("datasets/AU_CATTLE_PRICE.csv")
-    cattle_cycle_path = Path("datasets/BR_CATTLE_CYCLE.csv")
-    slaughter_path = Path("datasets/BR_SLAUGHTER_CATTLE_MONTHLY.csv")
-    
-    beef_df = pd.read_csv(beef_price_path)
-    cattle_df = pd.read_csv(cattle_price_path)
-    cattle_herd_df = pd.read_csv(cattle_herd_path)
-    ar_food_df = pd.read_csv(ar_food_path)
-    au_cattle_df = pd.read_csv(au_cattle_path)
-    cattle_cycle_df = pd.read_csv(cattle_cycle_path)
-    slaughter_df = pd.read_csv(slaughter_path)
+    datasets = load_datasets([
+        "BR_CATTLE_PRICE", "BR_CATTLE_HERD",
+        "AU_CATTLE_PRICE", "BR_CATTLE_CYCLE", "BR_SLAUGHTER_CATTLE_MONTHLY"
+    ])
+    cattle_df = datasets["BR_CATTLE_PRICE"]
+    cattle_herd_df = datasets["BR_CATTLE_HERD"]
+    au_cattle_df = datasets["AU_CATTLE_PRICE"]
+    cattle_cycle_df = datasets["BR_CATTLE_CYCLE"]
+    slaughter_df = datasets["BR_SLAUGHTER_CATTLE_MONTHLY"]
     
     # Convert date columns to datetime
-    beef_df['DATE'] = pd.to_datetime(beef_df['DATE'])
     cattle_df['DATE'] = pd.to_datetime(cattle_df['DATE'])
     cattle_herd_df['Date'] = pd.to_datetime(cattle_herd_df['Date'])
-    ar_food_df['Date'] = pd.to_datetime(ar_food_df['Date'])
     au_cattle_df['DATE'] = pd.to_datetime(au_cattle_df['DATE'])
     slaughter_df['Date'] = pd.to_datetime(slaughter_df['Date'])
     
     # Extract month and year for filtering and coloring
-    ar_food_df['Month'] = ar_food_df['Date'].dt.strftime('%b')
-    ar_food_df['Year'] = ar_food_df['Date'].dt.year
-    
-    au_cattle_df['Month'] = au_cattle_df['DATE'].dt.strftime('%b')
+    au_cattle_df['Month'] = month_abbr(au_cattle_df['DATE'])
     au_cattle_df['Year'] = au_cattle_df['DATE'].dt.year
     
     # Calculate the ratio between beef prices and cattle prices
     # Convert cattle price from R$/@ (15kg) to R$/kg
-    beef_df = beef_df.merge(cattle_df, on='DATE', how='inner')
+    beef_df = load_panel([PanelColumn("BR_BEEF_PRICES"), PanelColumn("BR_CATTLE_PRICE")],
+                         frequency='daily').dropna().reset_index()
     beef_df['CATTLE_PRICE_PER_KG'] = beef_df['BR_CATTLE_PRICE'] / 15
     beef_df['PRICE_RATIO'] = beef_df['BR_BEEF_PRICES'] / beef_df['CATTLE_PRICE_PER_KG']
     
     # Process cattle cycle data
     # Create a date column from Year and Quarter
-    cattle_cycle_df['Date'] = pd.to_datetime(cattle_cycle_df['Year'].astype(str) + '-' + 
-                                            (cattle_cycle_df['Quarter'] * 3).astype(str) + '-01')
+    cattle_cycle_df['Date'] = quarter_to_date(cattle_cycle_df['Year'], cattle_cycle_df['Quarter'], month_in_quarter=3)
     
     # Calculate LTM (Last Twelve Months) averages
     cattle_cycle_df = cattle_cycle_df.sort_values('Date')
@@ -81,16 +78,335 @@ def load_data():
     # Calculate quarterly beef to cattle ratio
     beef_df['Year'] = beef_df['DATE'].dt.year
     beef_df['Quarter'] = beef_df['DATE'].dt.quarter
-    beef_df['YearQuarter'] = beef_df['Year'].astype(str) + 'Q' + beef_df['Quarter'].astype(str)
+    beef_df['YearQuarter'] = quarter_label(beef_df['Year'], beef_df['Quarter'])
     
     # Calculate quarterly average ratio
-    quarterly_ratio = beef_df.groupby('YearQuarter')['PRICE_RATIO'].mean().reset_index()
-    quarterly_ratio['Year'] = quarterly_ratio['YearQuarter'].str[:4].astype(int)
-    quarterly_ratio['Quarter'] = quarterly_ratio['YearQuarter'].str[5:].astype(int)
+    quarterly_ratio = beef_df.groupby(['Year', 'Quarter'])['PRICE_RATIO'].mean().reset_index()
+    quarterly_ratio['YearQuarter'] = quarter_label(quarterly_ratio['Year'], quarterly_ratio['Quarter'])
+    
+    return beef_df, cattle_df, cattle_herd_df, au_cattle_df, cattle_cycle_df, slaughter_df, quarterly_ratio
+
+# Seasonal view of the Argentina slaughter, only needed by the Argentina tab
+@cached(tab="Argentina")
+def load_ar_slaughter():
+    return seasonal_dataset("AR_FOOD", 'Slaughter_heads', date_column='Date')
+
+beef_df, cattle_df, cattle_herd_df, au_cattle_df, cattle_cycle_df, slaughter_df, quarterly_ratio = load_data()
+
+# Units of the Brazilian cattle price, stored in R$/@ (15kg)
+CATTLE_UNITS = {'BRL/@': 1.0, 'BRL/kg': 1 / 15}
+
+# Each chart is a fragment: changing its controls reruns only the chart
+@fragment
+def beef_price_chart(beef_df):
+    controls = chart_controls('br_beef_price', window='3Y', smoothing=DAILY_SMOOTHING)
+    beef_data = beef_df.assign(BR_BEEF_PRICES=smooth(beef_df['BR_BEEF_PRICES'], controls.periods))
+    recent_beef_data = since(beef_data, 'DATE', controls.years)
+    
+    fig_beef = px.line(recent_beef_data, x='DATE', y='BR_BEEF_PRICES', 
+                       title=f'Beef Prices in Brazil - {window_title(controls.years)}',
+                       labels={'BR_BEEF_PRICES': 'Price (BRL/kg)', 'DATE': 'Date'})
+    plotly_chart(fig_beef, use_container_width=True)
+
+@fragment
+def price_ratio_chart(beef_df):
+    # Price ratio graph (Beef price / Cattle price)
+    controls = chart_controls('br_price_ratio', window='1Y', windows=('1Y', '3Y', '5Y', 'All'))
+    recent_ratio_data = since(beef_df, 'DATE', controls.years)
+    
+    fig_ratio = px.line(recent_ratio_data, x='DATE', y='PRICE_RATIO',
+                       title=f'Beef to Cattle Price Ratio (R$/kg) - {window_title(controls.years)}',
+                       labels={'PRICE_RATIO': 'Ratio (Beef/Cattle)', 'DATE': 'Date'})
+    plotly_chart(fig_ratio, use_container_width=True)
+
+@fragment
+def cattle_price_chart(cattle_df):
+    controls = chart_controls('br_cattle_price', window='3Y', smoothing=DAILY_SMOOTHING, units=CATTLE_UNITS)
+    cattle_data = cattle_df.assign(
+        BR_CATTLE_PRICE=smooth(cattle_df['BR_CATTLE_PRICE'], controls.periods) * controls.factor)
+    recent_cattle_data = since(cattle_data, 'DATE', controls.years)
+    
+    fig_cattle = px.line(recent_cattle_data, x='DATE', y='BR_CATTLE_PRICE', 
+                         title=f'Cattle Prices in Brazil - {window_title(controls.years)}',
+                         labels={'BR_CATTLE_PRICE': f'Price ({controls.unit})', 'DATE': 'Date'})
+    plotly_chart(fig_cattle, use_container_width=True)
+
+@fragment
+def quarterly_ratio_chart(quarterly_ratio):
+    controls = chart_controls('br_quarterly_ratio', window='5Y', windows=('3Y', '5Y', '10Y', 'All'))
+    current_year = datetime.now().year
+    recent_quarterly_ratio = quarterly_ratio
+    if controls.years is not None:
+        recent_quarterly_ratio = quarterly_ratio[quarterly_ratio['Year'] >= current_year - controls.years]
+    
+    # Calculate y-axis range with some padding
+    y_min = recent_quarterly_ratio['PRICE_RATIO'].min() * 0.95  # 5% padding below min
+    y_max = recent_quarterly_ratio['PRICE_RATIO'].max() * 1.05  # 5% padding above max
+    
+    # Create bar chart for quarterly ratio
+    fig_quarterly_ratio = px.bar(recent_quarterly_ratio, 
+                                x='YearQuarter', 
+                                y='PRICE_RATIO',
+                                title='Quarterly Beef to Cattle Ratio (R$/kg)',
+                                labels={'PRICE_RATIO': 'Ratio (Beef/Cattle)', 'YearQuarter': 'Quarter'})
+    
+    # Update layout with trimmed y-axis
+    fig_quarterly_ratio.update_layout(
+        xaxis=dict(
+            title='',
+            showline=True,
+            linewidth=1,
+            linecolor='black',
+            showgrid=False
+        ),
+        yaxis=dict(
+            title='',
+            showline=True,
+            linewidth=1,
+            linecolor='black',
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            range=[y_min, y_max]  # Set trimmed y-axis range
+        ),
+        plot_bgcolor='white'
+    )
+    
+    plotly_chart(fig_quarterly_ratio, use_container_width=True)
+
+@fragment
+def cycle_chart(cattle_cycle_df):
+    controls = chart_controls('br_cattle_cycle', window='All', windows=('5Y', '10Y', 'All'))
+    cycle_data = since(cattle_cycle_df, 'Date', controls.years)
+    
+    fig_cycle = go.Figure()
+    
+    # Add LTM Female Slaughtered line
+    fig_cycle.add_trace(
+        go.Scatter(
+            x=cycle_data['Date'],
+            y=cycle_data['LTM_Female_Slaughtered'] * 100,  # Convert to percentage
+            name='LTM Female Slaughtered % (LHS)',
+            line=dict(color='blue')
+        )
+    )
+    
+    # Add LTM Calf Cattle Ratio line on secondary y-axis
+    fig_cycle.add_trace(
+        go.Scatter(
+            x=cycle_data['Date'],
+            y=cycle_data['LTM_Calf_Cattle_Ratio'],
+            name='LTM Calf/Cattle Ratio (RHS)',
+            line=dict(color='red'),
+            yaxis='y2'
+        )
+    )
+    
+    # Update layout for dual y-axes with improved formatting
+    fig_cycle.update_layout(
+        title='Cattle Cycle Indicators - LTM Averages',
+        xaxis=dict(
+            title='',
+            showline=True,
+            linewidth=1,
+            linecolor='black',
+            showgrid=False
+        ),
+        yaxis=dict(
+            title='',
+            titlefont=dict(color='blue'),
+            showline=True,
+            linewidth=1,
+            linecolor='black',
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickformat='.1f'  # Format as percentage with 1 decimal place
+        ),
+        yaxis2=dict(
+            title='',
+            titlefont=dict(color='red'),
+            overlaying='y',
+            side='right',
+            showline=True,
+            linewidth=1,
+            linecolor='black',
+            showgrid=False,
+            tickformat='.3f'  # Format with 3 decimal places
+        ),
+        legend=dict(
+            orientation="h",
+            yanchor="top",
+            y=-0.2,
+            xanchor="center",
+            x=0.5
+        ),
+        plot_bgcolor='white',
+        margin=dict(b=80)  # Add bottom margin to accommodate the legend
+    )
+    
+    plotly_chart(fig_cycle, use_container_width=True)
+
+@fragment
+def herd_chart(cattle_herd_df):
+    controls = chart_controls('br_cattle_herd', window='All', windows=('5Y', '10Y', 'All'))
+    fig_herd = px.line(since(cattle_herd_df, 'Date', controls.years), x='Date', y='Cattle', 
+                       title='Cattle Herd in Brazil',
+                       labels={'Cattle': 'Number of Cattle', 'Date': 'Year'})
+    plotly_chart(fig_herd, use_container_width=True)
+
+@fragment
+def price_calf_ratio_chart(cattle_cycle_df):
+    controls = chart_controls('br_price_calf_ratio', window='All', windows=('5Y', '10Y', 'All'))
+    
+    # Calculate LTM average for Real_Cattle_Price
+    cattle_cycle_df = cattle_cycle_df.assign(
+        LTM_Real_Cattle_Price=cattle_cycle_df['Real_Cattle_Price'].rolling(window=4).mean())
+    cycle_data = since(cattle_cycle_df, 'Date', controls.years)
+    
+    # Create the dual y-axis chart
+    fig_price_ratio = go.Figure()
+    
+    # Add LTM Real Cattle Price line
+    fig_price_ratio.add_trace(
+        go.Scatter(
+            x=cycle_data['Date'],
+            y=cycle_data['LTM_Real_Cattle_Price'],
+            name='LTM Real Cattle Price (LHS)',
+            line=dict(color='blue')
+        )
+    )
+    
+    # Add LTM Calf Cattle Ratio line on secondary y-axis
+    fig_price_ratio.add_trace(
+        go.Scatter(
+            x=cycle_data['Date'],
+            y=cycle_data['LTM_Calf_Cattle_Ratio'],
+            name='LTM Calf/Cattle Ratio (RHS)',
+            line=dict(color='red'),
+            yaxis='y2'
+        )
+    )
+    
+    # Update layout for dual y-axes with improved formatting
+    fig_price_ratio.update_layout(
+        title='Cattle Price and Calf Ratio - LTM Averages',
+        xaxis=dict(
+            title='',
+            showline=True,
+            linewidth=1,
+            linecolor='black',
+            showgrid=False
+        ),
+        yaxis=dict(
+            title='',
+            titlefont=dict(color='blue'),
+            showline=True,
+            linewidth=1,
+            linecolor='black',
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickformat='.2f'  # Format with 2 decimal places
+        ),
+        yaxis2=dict(
+            title='',
+            titlefont=dict(color='red'),
+            overlaying='y',
+            side='right',
+            showline=True,
+            linewidth=1,
+            linecolor='black',
+            showgrid=False,
+            tickformat='.3f'  # Format with 3 decimal places
+        ),
+        legend=dict(
+            orientation="h",
+            yanchor="top",
+            y=-0.2,
+            xanchor="center",
+            x=0.5
+        ),
+        plot_bgcolor='white',
+        margin=dict(b=80)  # Add bottom margin to accommodate the legend
+    )
+    
+    plotly_chart(fig_price_ratio, use_container_width=True)
+
+@fragment
+def slaughter_growth_chart(slaughter_df):
+    # YoY growth of Kilograms
+    controls = chart_controls('br_slaughter_growth', window='5Y', windows=('3Y', '5Y', '10Y', 'All'))
+    current_year = datetime.now().year
+    recent_slaughter = slaughter_df
+    if controls.years is not None:
+        recent_slaughter = slaughter_df[slaughter_df['Year'] >= current_year - controls.years]
+    
+    # Create bar chart with conditional coloring
+    fig_yoy_growth = go.Figure()
     
-    return beef_df, cattle_df, cattle_herd_df, ar_food_df, au_cattle_df, cattle_cycle_df, slaughter_df, quarterly_ratio
+    # Add bars with conditional coloring
+    fig_yoy_growth.add_trace(
+        go.Bar(
+            x=recent_slaughter['Date'],
+            y=recent_slaughter['Kilograms_YoY_Growth'],
+            name='Kilograms YoY Growth',
+            marker_color=recent_slaughter['Kilograms_YoY_Growth'].apply(
+                lambda x: 'red' if x < 0 else 'blue'
+            )
+        )
+    )
+    
+    # Update layout
+    fig_yoy_growth.update_layout(
+        title='Cattle Slaughter - Kilograms YoY Growth',
+        xaxis=dict(
+            title='',
+            showline=True,
+            linewidth=1,
+            linecolor='black',
+            showgrid=False
+        ),
+        yaxis=dict(
+            title='',
+            showline=True,
+            linewidth=1,
+            linecolor='black',
+            showgrid=True,
+            gridwidth=1,
+            gridcolor='lightgray',
+            tickformat='.1f'  # Format as percentage with 1 decimal place
+        ),
+        plot_bgcolor='white'
+    )
+    
+    plotly_chart(fig_yoy_growth, use_container_width=True)
 
-beef_df, cattle_df, cattle_herd_df, ar_food_df, au_cattle_df, cattle_cycle_df, slaughter_df, quarterly_ratio = load_data()
+@fragment
+def ar_slaughter_chart():
+    # Seasonal chart, one line per year against the range of the 5 years before the latest
+    controls = chart_controls('ar_slaughter', window='3Y', windows=('3Y', '5Y', '10Y'))
+    view = load_ar_slaughter()
+    
+    fig_slaughter = seasonal_figure(view, 'Argentina Cattle Slaughter', 'Number of Heads', seasons=controls.years)
+    
+    plotly_chart(fig_slaughter, use_container_width=True)
+
+@fragment
+def au_cattle_price_chart(au_cattle_df):
+    controls = chart_controls('au_cattle_price', window='5Y', smoothing=DAILY_SMOOTHING)
+    au_cattle_data = au_cattle_df.assign(AU_CATTLE_PRICE=smooth(au_cattle_df['AU_CATTLE_PRICE'], controls.periods))
+    recent_au_cattle_data = recent_years(au_cattle_data, controls.years)
+    
+    # Create the Australian cattle price graph
+    fig_au_cattle = px.line(recent_au_cattle_data, 
+                           x='DATE', 
+                           y='AU_CATTLE_PRICE',
+                           title='Australian Cattle Prices',
+                           labels={'AU_CATTLE_PRICE': 'Price (AUD/kg)', 
+                                  'DATE': 'Date'})
+    
+    plotly_chart(fig_au_cattle, use_container_width=True)
 
 # Create tabs for different countries
 tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Brazil", "U.S.", "China", "Argentina", "Uruguay", "Australia"])
@@ -104,79 +420,15 @@ with tab1:
         # Create two columns for side-by-side graphs
         col1, col2 = st.columns(2)
         
-        # Beef price graph
+        # Beef price and price ratio graphs
         with col1:
-            # Filter for the last three years
-            current_date = datetime.now()
-            three_years_ago = current_date.replace(year=current_date.year - 3)
-            recent_beef_data = beef_df[beef_df['DATE'] >= three_years_ago]
-            
-            fig_beef = px.line(recent_beef_data, x='DATE', y='BR_BEEF_PRICES', 
-                               title='Beef Prices in Brazil - Last 3 Years',
-                               labels={'BR_BEEF_PRICES': 'Price (BRL/kg)', 'DATE': 'Date'})
-            st.plotly_chart(fig_beef, use_container_width=True)
-            
-            # Price ratio graph (Beef price / Cattle price)
-            # Filter for the last twelve months
-            current_date = datetime.now()
-            twelve_months_ago = current_date.replace(year=current_date.year - 1)
-            recent_ratio_data = beef_df[beef_df['DATE'] >= twelve_months_ago]
-            
-            fig_ratio = px.line(recent_ratio_data, x='DATE', y='PRICE_RATIO',
-                               title='Beef to Cattle Price Ratio (R$/kg) - Last 12 Months',
-                               labels={'PRICE_RATIO': 'Ratio (Beef/Cattle)', 'DATE': 'Date'})
-            st.plotly_chart(fig_ratio, use_container_width=True)
+            beef_price_chart(beef_df)
+            price_ratio_chart(beef_df)
         
-        # Cattle price graph
+        # Cattle price and quarterly ratio graphs
         with col2:
-            # Filter for the last three years
-            recent_cattle_data = cattle_df[cattle_df['DATE'] >= three_years_ago]
-            
-            fig_cattle = px.line(recent_cattle_data, x='DATE', y='BR_CATTLE_PRICE', 
-                                 title='Cattle Prices in Brazil - Last 3 Years',
-                                 labels={'BR_CATTLE_PRICE': 'Price (BRL/@)', 'DATE': 'Date'})
-            st.plotly_chart(fig_cattle, use_container_width=True)
-            
-            # Quarterly beef to cattle ratio
-            # Filter for the last five years
-            current_year = datetime.now().year
-            five_years_ago = current_year - 5
-            recent_quarterly_ratio = quarterly_ratio[quarterly_ratio['Year'] >= five_years_ago]
-            
-            # Calculate y-axis range with some padding
-            y_min = recent_quarterly_ratio['PRICE_RATIO'].min() * 0.95  # 5% padding below min
-            y_max = recent_quarterly_ratio['PRICE_RATIO'].max() * 1.05  # 5% padding above max
-            
-            # Create bar chart for quarterly ratio
-            fig_quarterly_ratio = px.bar(recent_quarterly_ratio, 
-                                        x='YearQuarter', 
-                                        y='PRICE_RATIO',
-                                        title='Quarterly Beef to Cattle Ratio (R$/kg)',
-                                        labels={'PRICE_RATIO': 'Ratio (Beef/Cattle)', 'YearQuarter': 'Quarter'})
-            
-            # Update layout with trimmed y-axis
-            fig_quarterly_ratio.update_layout(
-                xaxis=dict(
-                    title='',
-                    showline=True,
-                    linewidth=1,
-                    linecolor='black',
-                    showgrid=False
-                ),
-                yaxis=dict(
-                    title='',
-                    showline=True,
-                    linewidth=1,
-                    linecolor='black',
-                    showgrid=True,
-                    gridwidth=1,
-                    gridcolor='lightgray',
-                    range=[y_min, y_max]  # Set trimmed y-axis range
-                ),
-                plot_bgcolor='white'
-            )
-            
-            st.plotly_chart(fig_quarterly_ratio, use_container_width=True)
+            cattle_price_chart(cattle_df)
+            quarterly_ratio_chart(quarterly_ratio)
     
     # Export Market Section
     export_section = st.expander("Export Market", expanded=True)
@@ -189,199 +441,15 @@ with tab1:
         # Create two columns for side-by-side graphs
         col1, col2 = st.columns(2)
         
-        # Cattle cycle indicators graph
+        # Cattle cycle indicators and cattle herd graphs
         with col1:
-            fig_cycle = go.Figure()
-            
-            # Add LTM Female Slaughtered line
-            fig_cycle.add_trace(
-                go.Scatter(
-                    x=cattle_cycle_df['Date'],
-                    y=cattle_cycle_df['LTM_Female_Slaughtered'] * 100,  # Convert to percentage
-                    name='LTM Female Slaughtered % (LHS)',
-                    line=dict(color='blue')
-                )
-            )
-            
-            # Add LTM Calf Cattle Ratio line on secondary y-axis
-            fig_cycle.add_trace(
-                go.Scatter(
-                    x=cattle_cycle_df['Date'],
-                    y=cattle_cycle_df['LTM_Calf_Cattle_Ratio'],
-                    name='LTM Calf/Cattle Ratio (RHS)',
-                    line=dict(color='red'),
-                    yaxis='y2'
-                )
-            )
-            
-            # Update layout for dual y-axes with improved formatting
-            fig_cycle.update_layout(
-                title='Cattle Cycle Indicators - LTM Averages',
-                xaxis=dict(
-                    title='',
-                    showline=True,
-                    linewidth=1,
-                    linecolor='black',
-                    showgrid=False
-                ),
-                yaxis=dict(
-                    title='',
-                    titlefont=dict(color='blue'),
-                    showline=True,
-                    linewidth=1,
-                    linecolor='black',
-                    showgrid=True,
-                    gridwidth=1,
-                    gridcolor='lightgray',
-                    tickformat='.1f'  # Format as percentage with 1 decimal place
-                ),
-                yaxis2=dict(
-                    title='',
-                    titlefont=dict(color='red'),
-                    overlaying='y',
-                    side='right',
-                    showline=True,
-                    linewidth=1,
-                    linecolor='black',
-                    showgrid=False,
-                    tickformat='.3f'  # Format with 3 decimal places
-                ),
-                legend=dict(
-                    orientation="h",
-                    yanchor="top",
-                    y=-0.2,
-                    xanchor="center",
-                    x=0.5
-                ),
-                plot_bgcolor='white',
-                margin=dict(b=80)  # Add bottom margin to accommodate the legend
-            )
-            
-            st.plotly_chart(fig_cycle, use_container_width=True)
-            
-            # Cattle herd graph
-            fig_herd = px.line(cattle_herd_df, x='Date', y='Cattle', 
-                               title='Cattle Herd in Brazil',
-                               labels={'Cattle': 'Number of Cattle', 'Date': 'Year'})
-            st.plotly_chart(fig_herd, use_container_width=True)
+            cycle_chart(cattle_cycle_df)
+            herd_chart(cattle_herd_df)
         
-        # Cattle price and calf ratio LTM graph
+        # Cattle price and calf ratio LTM, and slaughter growth graphs
         with col2:
-            # Calculate LTM average for Real_Cattle_Price
-            cattle_cycle_df['LTM_Real_Cattle_Price'] = cattle_cycle_df['Real_Cattle_Price'].rolling(window=4).mean()
-            
-            # Create the dual y-axis chart
-            fig_price_ratio = go.Figure()
-            
-            # Add LTM Real Cattle Price line
-            fig_price_ratio.add_trace(
-                go.Scatter(
-                    x=cattle_cycle_df['Date'],
-                    y=cattle_cycle_df['LTM_Real_Cattle_Price'],
-                    name='LTM Real Cattle Price (LHS)',
-                    line=dict(color='blue')
-                )
-            )
-            
-            # Add LTM Calf Cattle Ratio line on secondary y-axis
-            fig_price_ratio.add_trace(
-                go.Scatter(
-                    x=cattle_cycle_df['Date'],
-                    y=cattle_cycle_df['LTM_Calf_Cattle_Ratio'],
-                    name='LTM Calf/Cattle Ratio (RHS)',
-                    line=dict(color='red'),
-                    yaxis='y2'
-                )
-            )
-            
-            # Update layout for dual y-axes with improved formatting
-            fig_price_ratio.update_layout(
-                title='Cattle Price and Calf Ratio - LTM Averages',
-                xaxis=dict(
-                    title='',
-                    showline=True,
-                    linewidth=1,
-                    linecolor='black',
-                    showgrid=False
-                ),
-                yaxis=dict(
-                    title='',
-                    titlefont=dict(color='blue'),
-                    showline=True,
-                    linewidth=1,
-                    linecolor='black',
-                    showgrid=True,
-                    gridwidth=1,
-                    gridcolor='lightgray',
-                    tickformat='.2f'  # Format with 2 decimal places
-                ),
-                yaxis2=dict(
-                    title='',
-                    titlefont=dict(color='red'),
-                    overlaying='y',
-                    side='right',
-                    showline=True,
-                    linewidth=1,
-                    linecolor='black',
-                    showgrid=False,
-                    tickformat='.3f'  # Format with 3 decimal places
-                ),
-                legend=dict(
-                    orientation="h",
-                    yanchor="top",
-                    y=-0.2,
-                    xanchor="center",
-                    x=0.5
-                ),
-                plot_bgcolor='white',
-                margin=dict(b=80)  # Add bottom margin to accommodate the legend
-            )
-            
-            st.plotly_chart(fig_price_ratio, use_container_width=True)
-            
-            # YoY growth of Kilograms
-            # Filter for recent data
-            recent_slaughter = slaughter_df[slaughter_df['Year'] >= current_year - 5]
-            
-            # Create bar chart with conditional coloring
-            fig_yoy_growth = go.Figure()
-            
-            # Add bars with conditional coloring
-            fig_yoy_growth.add_trace(
-                go.Bar(
-                    x=recent_slaughter['Date'],
-                    y=recent_slaughter['Kilograms_YoY_Growth'],
-                    name='Kilograms YoY Growth',
-                    marker_color=recent_slaughter['Kilograms_YoY_Growth'].apply(
-                        lambda x: 'red' if x < 0 else 'blue'
-                    )
-                )
-            )
-            
-            # Update layout
-            fig_yoy_growth.update_layout(
-                title='Cattle Slaughter - Kilograms YoY Growth',
-                xaxis=dict(
-                    title='',
-                    showline=True,
-                    linewidth=1,
-                    linecolor='black',
-                    showgrid=False
-                ),
-                yaxis=dict(
-                    title='',
-                    showline=True,
-                    linewidth=1,
-                    linecolor='black',
-                    showgrid=True,
-                    gridwidth=1,
-                    gridcolor='lightgray',
-                    tickformat='.1f'  # Format as percentage with 1 decimal place
-                ),
-                plot_bgcolor='white'
-            )
-            
-            st.plotly_chart(fig_yoy_growth, use_container_width=True)
+            price_calf_ratio_chart(cattle_cycle_df)
+            slaughter_growth_chart(slaughter_df)
 
 # U.S. Tab
 with tab2:
@@ -393,31 +461,7 @@ with tab3:
 
 # Argentina Tab
 with tab4:
-    # Get the current year
-    current_year = datetime.now().year
-    
-    # Filter for the last 3 years
-    recent_food_data = ar_food_df[ar_food_df['Year'] > current_year - 3]
-    
-    # Create the slaughter heads graph
-    fig_slaughter = px.line(recent_food_data, 
-                           x='Month', 
-                           y='Slaughter_heads',
-                           color='Year',
-                           title='Argentina Cattle Slaughter',
-                           labels={'Slaughter_heads': 'Number of Heads', 
-                                  'Month': 'Month',
-                                  'Year': 'Year'},
-                           markers=True)
-    
-    # Update layout to ensure proper display
-    fig_slaughter.update_layout(
-        xaxis={'categoryorder': 'array', 
-               'categoryarray': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                                'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']}
-    )
-    
-    st.plotly_chart(fig_slaughter, use_container_width=True)
+    ar_slaughter_chart()
 
 # Uruguay Tab
 with tab5:
@@ -425,18 +469,4 @@ with tab5:
 
 # Australia Tab
 with tab6:
-    # Get the current year
-    current_year = datetime.now().year
-    
-    # Filter for the last 5 years
-    recent_au_cattle_data = au_cattle_df[au_cattle_df['Year'] > current_year - 5]
-    
-    # Create the Australian cattle price graph
-    fig_au_cattle = px.line(recent_au_cattle_data, 
-                           x='DATE', 
-                           y='AU_CATTLE_PRICE',
-                           title='Australian Cattle Prices',
-                           labels={'AU_CATTLE_PRICE': 'Price (AUD/kg)', 
-                                  'DATE': 'Date'})
-    
-    st.plotly_chart(fig_au_cattle, use_container_width=True) 
\ No newline at end of file
+    au_cattle_price_chart(au_cattle_df)
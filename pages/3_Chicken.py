@@ -1,8 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from pathlib import Path
 from datetime import datetime, timedelta
+from core import analytics, jobs
+from core.agcalendar import week_to_date
+from core.storage import dataset_exists, read_dataset
+from core.cache import cached
+from core.schema import read_normalized
+from core.render import plotly_chart
+from core.usage import track_page
 
 # Set page config
 st.set_page_config(
@@ -10,25 +16,21 @@ st.set_page_config(
     page_icon="🍗",
     layout="wide"
 )
+track_page(__file__)
 
 # Title and description
 st.title("🍗 Chicken")
 st.markdown("""
-This page shows chicken prices across different countries.
+This page shows chicken prices across different countries, and the U.S. broiler supply chain.
 """)
 
 # Load the data
-@st.cache_data
+@cached
 def load_data():
-    chicken_price_path = Path("datasets/BR_CHICKEN_PRICE.csv")
-    broiler_costs_path = Path("datasets/BR_BROILER_COSTS_STATE.csv")
-    broiler_costs_breakdown_path = Path("datasets/BR_BROILER_COSTS_BREAKDOWN.csv")
-    eggs_path = Path("datasets/BR_EGGS.csv")
-    
-    chicken_df = pd.read_csv(chicken_price_path)
-    broiler_costs_df = pd.read_csv(broiler_costs_path)
-    broiler_costs_breakdown_df = pd.read_csv(broiler_costs_breakdown_path)
-    eggs_df = pd.read_csv(eggs_path)
+    chicken_df = read_dataset("BR_CHICKEN_PRICE")
+    broiler_costs_df = read_dataset("BR_BROILER_COSTS_STATE")
+    broiler_costs_breakdown_df = read_dataset("BR_BROILER_COSTS_BREAKDOWN")
+    eggs_df = read_dataset("BR_EGGS")
     
     # Convert date columns to datetime
     chicken_df['DATE'] = pd.to_datetime(chicken_df['DATE'])
@@ -42,6 +44,32 @@ def load_data():
     
     return chicken_df, broiler_costs_df, broiler_costs_breakdown_df, eggs_df
 
+@cached(tab="U.S.")
+def load_us_data():
+    # The analyses run in process on the NASS datasets, no CSV round trip
+    eggs_set_df = read_normalized("US_BROILER_EGG_SET_WEEKLY")
+    placements_df = read_normalized("US_CHICKEN_PLACEMENTS_WEEKLY")
+    hatching_eggs_df = read_normalized("US_BROILER_HATCHING_EGGS_MONTHLY")
+    herd_df = read_normalized("US_BROILER_BREEDER_HERD_MONTHLY")
+    slaughter_df = read_normalized("US_CHICKEN_SLAUGHTER_MONTHLY")
+    
+    hatchability_df = analytics.hatchability(eggs_set_df, placements_df)
+    hatchability_df['Date'] = week_to_date(hatchability_df['Year'], hatchability_df['Week'])
+    
+    return (
+        hatchability_df,
+        analytics.egg_break(hatching_eggs_df, eggs_set_df),
+        analytics.layer_yield(hatching_eggs_df, herd_df),
+        analytics.breeder_herd(herd_df),
+        analytics.weekly_yoy_growth(placements_df, 'Placements'),
+        analytics.slaughter(slaughter_df)
+    )
+
+US_DATASETS = ["US_BROILER_EGG_SET_WEEKLY", "US_CHICKEN_PLACEMENTS_WEEKLY", "US_BROILER_HATCHING_EGGS_MONTHLY",
+               "US_BROILER_BREEDER_HERD_MONTHLY", "US_CHICKEN_SLAUGHTER_MONTHLY"]
+
+# The U.S. analyses are computed in the background while the Brazil tab renders
+us_job = jobs.submit(load_us_data) if all(dataset_exists(name) for name in US_DATASETS) else None
 chicken_df, broiler_costs_df, broiler_costs_breakdown_df, eggs_df = load_data()
 
 # Create tabs for different countries
@@ -57,7 +85,7 @@ with tab1:
         fig_chicken = px.line(chicken_df, x='DATE', y='BR_CHICKEN_PRICE', 
                              title='Chicken Prices in Brazil',
                              labels={'BR_CHICKEN_PRICE': 'Price (BRL/kg)', 'DATE': 'Date'})
-        st.plotly_chart(fig_chicken, use_container_width=True)
+        plotly_chart(fig_chicken, use_container_width=True)
         
         # Ração costs in PR state
         racao_df = broiler_costs_breakdown_df[
@@ -68,13 +96,13 @@ with tab1:
         fig_racao = px.line(racao_df, x='Date', y='R$_kg',
                            title='Feed Costs in Paraná',
                            labels={'R$_kg': 'Cost (BRL/kg)', 'Date': 'Date'})
-        st.plotly_chart(fig_racao, use_container_width=True)
+        plotly_chart(fig_racao, use_container_width=True)
         
         # Meat Layers graph
         fig_meat_layers = px.line(eggs_df, x='Date', y='MeatLayers',
                                  title='Meat Layers in Brazil (Last 5 Years)',
                                  labels={'MeatLayers': 'Number of Layers', 'Date': 'Date'})
-        st.plotly_chart(fig_meat_layers, use_container_width=True)
+        plotly_chart(fig_meat_layers, use_container_width=True)
 
     # Broiler costs by state graph
     with col2:
@@ -88,7 +116,7 @@ with tab1:
                              color='State',
                              title='Broiler Costs by State in Brazil',
                              labels={'R$_kg': 'Cost (BRL/kg)', 'Date': 'Date', 'State': 'State'})
-        st.plotly_chart(fig_broiler, use_container_width=True)
+        plotly_chart(fig_broiler, use_container_width=True)
         
         # Genética costs in PR state
         genetica_df = broiler_costs_breakdown_df[
@@ -99,17 +127,55 @@ with tab1:
         fig_genetica = px.line(genetica_df, x='Date', y='R$_kg',
                               title='Genetics Costs in Paraná',
                               labels={'R$_kg': 'Cost (BRL/kg)', 'Date': 'Date'})
-        st.plotly_chart(fig_genetica, use_container_width=True)
+        plotly_chart(fig_genetica, use_container_width=True)
         
         # Meat Eggs Produced graph
         fig_meat_eggs = px.line(eggs_df, x='Date', y='MeatEggsProduced',
                                title='Meat Eggs Produced in Brazil (Last 5 Years)',
                                labels={'MeatEggsProduced': 'Eggs Produced', 'Date': 'Date'})
-        st.plotly_chart(fig_meat_eggs, use_container_width=True)
+        plotly_chart(fig_meat_eggs, use_container_width=True)
 
 # U.S. Tab
 with tab2:
-    st.info("U.S. chicken price data will be added soon.")
+    if us_job is None:
+        st.info("U.S. chicken price data will be added soon.")
+    else:
+        hatchability_df, egg_break_df, yield_df, herd_df, placements_df, slaughter_df = jobs.result(
+            us_job, "Computing the U.S. broiler analyses...")
+    
+        col1, col2 = st.columns(2)
+    
+        with col1:
+            fig_hatchability = px.line(hatchability_df, x='Date', y='Hatchability LTM (%)',
+                                       title='Hatchability in the U.S. (52-Week Average)',
+                                       labels={'Hatchability LTM (%)': 'Hatchability (%)', 'Date': 'Date'})
+            plotly_chart(fig_hatchability, use_container_width=True)
+        
+            fig_yield = px.line(yield_df, x='Date', y='Yield_LTM',
+                                title='Broiler Breeder Layer Yield in the U.S. (12-Month Average)',
+                                labels={'Yield_LTM': 'Hatching Eggs per 1000 Layers', 'Date': 'Date'})
+            plotly_chart(fig_yield, use_container_width=True)
+        
+            fig_placements = px.line(placements_df, x='Date', y='YoY_Growth_12_Period_Avg',
+                                     title='Chick Placements in the U.S. - YoY Growth (12-Week Average)',
+                                     labels={'YoY_Growth_12_Period_Avg': 'YoY Growth (%)', 'Date': 'Date'})
+            plotly_chart(fig_placements, use_container_width=True)
+    
+        with col2:
+            fig_egg_break = px.line(egg_break_df, x='Date', y='Rolling_15M_Break_Ratio',
+                                    title='Hatching Egg Break Ratio in the U.S. (15-Month Average)',
+                                    labels={'Rolling_15M_Break_Ratio': 'Eggs Not Set (%)', 'Date': 'Date'})
+            plotly_chart(fig_egg_break, use_container_width=True)
+        
+            fig_herd = px.line(herd_df, x='Date', y=['Layer_Herd', 'Layer_Herd_LTM'],
+                               title='Broiler Breeder Layer Herd in the U.S.',
+                               labels={'value': 'Layers', 'Date': 'Date', 'variable': 'Series'})
+            plotly_chart(fig_herd, use_container_width=True)
+        
+            fig_slaughter = px.line(slaughter_df, x='Date', y='Weight_LTM_Avg',
+                                    title='Average Slaughter Weight in the U.S. (12-Month Average)',
+                                    labels={'Weight_LTM_Avg': 'Average Weight', 'Date': 'Date'})
+            plotly_chart(fig_slaughter, use_container_width=True)
 
 # China Tab
 with tab3:
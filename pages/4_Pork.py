@@ -1,8 +1,10 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from pathlib import Path
 import datetime
+from core.storage import read_dataset
+from core.render import plotly_chart
+from core.usage import track_page
 
 # Set page config
 st.set_page_config(
@@ -10,6 +12,7 @@ st.set_page_config(
     page_icon="🥓",
     layout="wide"
 )
+track_page(__file__)
 
 # Title and description
 st.title("🥓 Pork")
@@ -24,7 +27,7 @@ tab1, tab2, tab3, tab4 = st.tabs(["Brazil", "U.S.", "China", "EU"])
 with tab1:
     # Load the data
     try:
-        df_br = pd.read_csv("datasets/BR_PORK_DOMESTIC_PRICE.csv")
+        df_br = read_dataset("BR_PORK_DOMESTIC_PRICE")
         
         # Convert date column to datetime
         df_br['DATE'] = pd.to_datetime(df_br['DATE'])
@@ -43,7 +46,7 @@ with tab1:
         )
         
         # Display the chart
-        st.plotly_chart(fig, use_container_width=True)
+        plotly_chart(fig, use_container_width=True)
         
     except Exception as e:
         st.error(f"Error loading Brazil pork data: {e}")
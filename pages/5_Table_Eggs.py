@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from pathlib import Path
 from datetime import datetime, timedelta
+from core.storage import read_dataset
+from core.cache import cached
+from core.render import plotly_chart
+from core.usage import track_page
 
 # Set page config
 st.set_page_config(
@@ -10,6 +13,7 @@ st.set_page_config(
     page_icon="🥚",
     layout="wide"
 )
+track_page(__file__)
 
 # Title and description
 st.title("🥚 Table Eggs")
@@ -18,10 +22,9 @@ This page shows table egg prices and production across different countries.
 """)
 
 # Load the data
-@st.cache_data
+@cached
 def load_data():
-    eggs_path = Path("datasets/BR_EGGS.csv")
-    eggs_df = pd.read_csv(eggs_path)
+    eggs_df = read_dataset("BR_EGGS")
     
     # Convert date column to datetime
     eggs_df['Date'] = pd.to_datetime(eggs_df['Date'])
@@ -47,14 +50,14 @@ with tab1:
         fig_table_layers = px.line(eggs_df, x='Date', y='TableLayers',
                                   title='Table Layers in Brazil (Last 5 Years)',
                                   labels={'TableLayers': 'Number of Layers', 'Date': 'Date'})
-        st.plotly_chart(fig_table_layers, use_container_width=True)
+        plotly_chart(fig_table_layers, use_container_width=True)
     
     # Table Eggs Produced graph
     with col2:
         fig_table_eggs = px.line(eggs_df, x='Date', y='TableEggsProduced',
                                 title='Table Eggs Produced in Brazil (Last 5 Years)',
                                 labels={'TableEggsProduced': 'Eggs Produced', 'Date': 'Date'})
-        st.plotly_chart(fig_table_eggs, use_container_width=True)
+        plotly_chart(fig_table_eggs, use_container_width=True)
 
 # U.S. Tab
 with tab2:
@@ -3,6 +3,7 @@ import pandas as pd
 import plotly.express as px
 from pathlib import Path
 from datetime import datetime, timedelta
+from core.usage import track_page
 
 # Set page config
 st.set_page_config(
@@ -10,6 +11,7 @@ st.set_page_config(
     page_icon="🍪",
     layout="wide"
 )
+track_page(__file__)
 
 # Title and description
 st.title("🍪 Cookies & Pasta")
@@ -1,8 +1,11 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from pathlib import Path
 import datetime
+from core.storage import read_dataset
+from core.cache import cached
+from core.render import plotly_chart
+from core.usage import track_page
 
 # Set page config
 st.set_page_config(
@@ -10,6 +13,7 @@ st.set_page_config(
     page_icon="🛢️",
     layout="wide"
 )
+track_page(__file__)
 
 # Title and description
 st.title("🛢️ Biodiesel")
@@ -18,16 +22,14 @@ This page shows biodiesel prices and production in Brazil.
 """)
 
 # Load the data
-@st.cache_data
+@cached
 def load_data():
     # Load price data
-    biodiesel_price_path = Path("datasets/BR_BIODIESEL_PRICE.csv")
-    biodiesel_df = pd.read_csv(biodiesel_price_path)
+    biodiesel_df = read_dataset("BR_BIODIESEL_PRICE")
     biodiesel_df['DATE'] = pd.to_datetime(biodiesel_df['DATE'])
     
     # Load diesel price data
-    diesel_price_path = Path("datasets/BR_DIESEL_PRICE.csv")
-    diesel_df = pd.read_csv(diesel_price_path)
+    diesel_df = read_dataset("BR_DIESEL_PRICE")
     diesel_df['DATE'] = pd.to_datetime(diesel_df['DATE'])
     
     # Filter for last three years
@@ -35,8 +37,7 @@ def load_data():
     diesel_df = diesel_df[diesel_df['DATE'].dt.year >= current_year - 2]
     
     # Load production data
-    production_path = Path("datasets/BR_BIODIESEL_PRODUCTION.csv")
-    production_df = pd.read_csv(production_path)
+    production_df = read_dataset("BR_BIODIESEL_PRODUCTION")
     production_df['Date'] = pd.to_datetime(production_df['Date'])
     
     # Calculate total production by date
@@ -62,7 +63,7 @@ with tab1:
                                title='Biodiesel Prices in Brazil',
                                labels={'BR_BIODIESEL_PRICE': 'Price (BRL/L)', 
                                       'DATE': 'Date'})
-        st.plotly_chart(fig_biodiesel, use_container_width=True)
+        plotly_chart(fig_biodiesel, use_container_width=True)
     
     # Diesel price graph in second column
     with col2:
@@ -72,7 +73,7 @@ with tab1:
                             title='Diesel Prices in Brazil',
                             labels={'BR_DIESEL_PRICE': 'Price (BRL/L)', 
                                    'DATE': 'Date'})
-        st.plotly_chart(fig_diesel, use_container_width=True)
+        plotly_chart(fig_diesel, use_container_width=True)
 
 # Production Tab
 with tab2:
@@ -87,7 +88,7 @@ with tab2:
                                title='Total Biodiesel Production in Brazil',
                                labels={'Production': 'Production (m³)',
                                       'Date': 'Date'})
-        st.plotly_chart(fig_production, use_container_width=True)
+        plotly_chart(fig_production, use_container_width=True)
 
 # Crushing Tab
 with tab3:
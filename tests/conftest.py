@@ -0,0 +1,45 @@
+"""
+Shared fixtures
+
+Tests never read the repository datasets or the usage statistics of this
+machine: the storage backend is pointed at a temporary directory, usage
+recording is off and each test gets its own usage database.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+os.environ['DASHBOARD_USAGE'] = '0'
+os.environ['DASHBOARD_DISK_CACHE_MB'] = '0'
+
+from core import storage  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def usage_database(tmp_path, monkeypatch):
+    """Empty usage database of the test."""
+    path = tmp_path / 'usage.sqlite'
+    monkeypatch.setenv('DASHBOARD_USAGE_DB', str(path))
+    return path
+
+
+@pytest.fixture
+def backend(tmp_path):
+    """Empty local backend in a temporary directory, configured for the test."""
+    previous = storage._backend
+    configured = storage.configure(storage.LocalBackend(tmp_path / 'datasets'))
+    yield configured
+    # None builds the backend from the environment again
+    storage.configure(previous)
+
+
+@pytest.fixture
+def write_dataset(backend):
+    """Write a dataset from a dict of columns, returning the frame written."""
+    def write(name, columns):
+        df = pd.DataFrame(columns)
+        backend.write_frame(name, df)
+        return df
+    return write
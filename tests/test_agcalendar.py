@@ -0,0 +1,70 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from core.agcalendar import (b3_holidays, b3_trading_days, easter, month_abbr, month_number, month_to_date,
+                             nass_week_to_date, season_month, season_year, week_to_date)
+
+
+def test_month_number_reads_labels_in_any_case():
+    months = month_number(pd.Series(['JAN', 'Feb', 'march', 'Dez', 12]))
+
+    assert months.tolist()[:3] == [1, 2, 3]
+    assert pd.isna(months[3])
+    assert months[4] == 12
+
+
+def test_month_abbr_matches_strftime():
+    dates = pd.Series(pd.date_range('2024-01-15', periods=12, freq='MS'))
+
+    assert month_abbr(dates).tolist() == dates.dt.strftime('%b').tolist()
+
+
+def test_month_to_date_marks_unparsed_months():
+    dates = month_to_date(pd.Series([2024, 2024, 2025]), ['JAN', 'XYZ', 'Dec'])
+
+    assert dates[0] == pd.Timestamp('2024-01-01')
+    assert pd.isna(dates[1])
+    assert dates[2] == pd.Timestamp('2025-12-01')
+
+
+def test_week_to_date_matches_strptime():
+    years = np.repeat(np.arange(2000, 2030), 54)
+    weeks = np.tile(np.arange(0, 54), 30)
+
+    dates = week_to_date(years, weeks)
+    expected = [datetime.strptime(f"{year}{week}0", '%Y%W%w') for year, week in zip(years, weeks)]
+
+    assert dates.tolist() == [pd.Timestamp(date) for date in expected]
+
+
+def test_nass_week_to_date_reads_reference_periods():
+    dates = nass_week_to_date(pd.Series([2024, 2024]), pd.Series(['WEEK #01', 'YEAR']))
+
+    assert dates[0] == pd.Timestamp(datetime.strptime('202410', '%Y%W%w'))
+    assert pd.isna(dates[1])
+
+
+def test_season_year_and_month():
+    dates = pd.Series(pd.to_datetime(['2024-03-31', '2024-04-01', '2025-03-01']))
+
+    assert season_year(dates, start_month=4).tolist() == [2023, 2024, 2024]
+    assert season_month(dates, start_month=4).tolist() == [12, 1, 12]
+
+
+def test_easter():
+    assert easter([2019, 2024, 2025]).tolist() == [np.datetime64('2019-04-21'), np.datetime64('2024-03-31'),
+                                                   np.datetime64('2025-04-20')]
+
+
+def test_b3_calendar_skips_holidays_and_weekends():
+    holidays = b3_holidays(2024, 2024)
+    days = b3_trading_days('2024-03-25', '2024-04-05')
+
+    # Good Friday and Carnival
+    assert pd.Timestamp('2024-03-29') in holidays
+    assert pd.Timestamp('2024-02-12') in holidays
+    assert pd.Timestamp('2024-03-29') not in days
+    assert all(day.weekday() < 5 for day in days)
+    assert len(days) == 9
@@ -0,0 +1,149 @@
+import os
+import runpy
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from core import cache as cache_module
+from core.cache import ArtifactCache, DiskCache, _function_key
+from core.storage import read_dataset
+
+
+@pytest.fixture(autouse=True)
+def check_versions_on_every_request(monkeypatch):
+    monkeypatch.setattr(cache_module, 'VERSION_TTL_SECONDS', 0)
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def loader(calls):
+    def load_total(name):
+        calls.append(name)
+        return read_dataset(name)['VALUE'].sum()
+    return load_total
+
+
+def touch(backend, name, write_dataset, values):
+    write_dataset(name, {'VALUE': values})
+    # Sub-second rewrites keep the size, so move the mtime explicitly
+    os.utime(backend.path(name), ns=(len(values), time.time_ns()))
+
+
+def test_entry_is_reused_until_its_dataset_changes(backend, write_dataset, loader, calls):
+    write_dataset('A', {'VALUE': [1.0, 2.0]})
+    artifacts = ArtifactCache(1 << 20)
+
+    assert artifacts.get_or_compute(loader, 'page', ('A',)) == 3.0
+    assert artifacts.get_or_compute(loader, 'page', ('A',)) == 3.0
+    assert calls == ['A']
+
+    touch(backend, 'A', write_dataset, [5.0])
+
+    assert artifacts.get_or_compute(loader, 'page', ('A',)) == 5.0
+    assert calls == ['A', 'A']
+
+
+def test_callers_get_copies(backend, write_dataset):
+    write_dataset('A', {'VALUE': [1.0]})
+    artifacts = ArtifactCache(1 << 20)
+
+    first = artifacts.get_or_compute(read_dataset, 'page', ('A',))
+    first['VALUE'] = 99.0
+
+    assert artifacts.get_or_compute(read_dataset, 'page', ('A',))['VALUE'].tolist() == [1.0]
+
+
+def test_disk_tier_serves_a_new_process(backend, write_dataset, loader, calls, tmp_path):
+    write_dataset('A', {'VALUE': [1.0, 2.0]})
+    disk = DiskCache(tmp_path / 'artifacts', 1 << 20)
+    ArtifactCache(1 << 20, disk).get_or_compute(loader, 'page', ('A',))
+
+    # A restarted process starts with an empty memory tier
+    assert ArtifactCache(1 << 20, disk).get_or_compute(loader, 'page', ('A',)) == 3.0
+    assert calls == ['A']
+
+    touch(backend, 'A', write_dataset, [5.0])
+
+    assert ArtifactCache(1 << 20, disk).get_or_compute(loader, 'page', ('A',)) == 5.0
+    assert calls == ['A', 'A']
+
+
+def test_concurrent_requests_compute_once(backend):
+    started, release, calls = threading.Event(), threading.Event(), []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 42
+
+    artifacts = ArtifactCache(1 << 20)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(artifacts.get_or_compute(slow, 'page')))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started.wait(5)
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [42] * 4
+    assert calls == [1]
+
+
+def test_nested_loader_passes_its_datasets_on(backend, write_dataset, loader, calls):
+    write_dataset('A', {'VALUE': [1.0]})
+    artifacts = ArtifactCache(1 << 20)
+
+    def outer():
+        return artifacts.get_or_compute(loader, 'page', ('A',)) + 1
+
+    assert artifacts.get_or_compute(outer, 'page') == 2.0
+    # The inner entry is current, but the outer one must still be rebuilt
+    touch(backend, 'A', write_dataset, [10.0])
+
+    assert artifacts.get_or_compute(outer, 'page') == 11.0
+
+
+def test_prewarm_recomputes_stale_entries(backend, write_dataset, loader, calls):
+    write_dataset('A', {'VALUE': [1.0]})
+    write_dataset('B', {'VALUE': [2.0]})
+    artifacts = ArtifactCache(1 << 20)
+    artifacts.get_or_compute(loader, 'page', ('A',))
+    artifacts.get_or_compute(loader, 'page', ('B',))
+
+    touch(backend, 'A', write_dataset, [3.0])
+
+    assert artifacts.prewarm() == [f"{loader.__qualname__}('A',)"]
+    assert calls == ['A', 'B', 'A']
+
+
+def test_eviction_keeps_the_cache_within_its_size():
+    frame = pd.DataFrame({'VALUE': range(1000)})
+    artifacts = ArtifactCache(int(frame.memory_usage(index=True, deep=True).sum() * 2.5))
+    for offset in range(5):
+        artifacts.get_or_compute(lambda offset: frame + offset, 'page', (offset,))
+
+    assert len(artifacts) == 2
+    assert artifacts.size <= artifacts.max_bytes
+
+
+def test_function_key_follows_the_defining_file(tmp_path):
+    script = tmp_path / 'page.py'
+    script.write_text("def load():\n    return 1\n")
+    before = _function_key(runpy.run_path(str(script))['load'], 'page')
+
+    # The loader is unchanged, but code it may call is not
+    script.write_text("def load():\n    return 1\n\n\nHELPER = 2\n")
+    after = _function_key(runpy.run_path(str(script))['load'], 'page')
+
+    assert before != after
+    assert before.split(':')[:3] == after.split(':')[:3]
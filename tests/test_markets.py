@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from core.markets import (TRADING_DAYS, drawdowns, price_matrix, report_week, rolling_beta, rolling_percentile,
+                          rolling_volatility, rolling_zscore)
+
+
+def random_returns(rows=300, columns=3, seed=0):
+    returns = np.random.default_rng(seed).normal(0, 0.01, (rows, columns))
+    returns[0] = np.nan
+    return returns
+
+
+def test_rolling_volatility_matches_pandas():
+    returns = random_returns()
+    returns[50, 1] = np.nan
+
+    volatility = rolling_volatility(returns, window=20, min_periods=15)
+    expected = pd.DataFrame(returns).rolling(20, min_periods=15).std() * np.sqrt(TRADING_DAYS)
+
+    np.testing.assert_allclose(volatility, expected.to_numpy(), rtol=1e-6)
+
+
+def test_rolling_beta_recovers_a_known_beta():
+    factor = random_returns(columns=1, seed=1)
+    noise = random_returns(columns=1, seed=2) * 0.1
+    returns = np.hstack([1.5 * factor + noise, -0.5 * factor + noise])
+
+    beta = rolling_beta(returns, factor, window=120)
+
+    np.testing.assert_allclose(beta[-1, :, 0], [1.5, -0.5], atol=0.05)
+    assert np.isnan(beta[10]).all()
+
+
+def test_rolling_zscore_and_percentile_match_pandas():
+    values = np.random.default_rng(3).normal(size=(200, 2))
+    frame = pd.DataFrame(values)
+
+    zscores = rolling_zscore(values, window=52)
+    rolling = frame.rolling(52, min_periods=26)
+    expected = ((frame - rolling.mean()) / rolling.std()).to_numpy()
+    percentiles = rolling_percentile(values, window=52)
+    expected_rank = rolling.apply(lambda window: (window <= window[-1]).mean() * 100, raw=True).to_numpy()
+
+    np.testing.assert_allclose(zscores, expected, rtol=1e-6)
+    np.testing.assert_allclose(percentiles, expected_rank)
+
+
+def test_drawdowns_from_the_running_high():
+    prices = np.array([[10.0], [12.0], [9.0], [np.nan], [13.0]])
+
+    np.testing.assert_allclose(drawdowns(prices)[:, 0], [0.0, 0.0, -0.25, np.nan, 0.0])
+
+
+def test_price_matrix_carries_prices_over_holidays_only_inside_each_series():
+    calendar = pd.bdate_range('2024-07-01', '2024-07-10')
+    series = {
+        # No price on 4 July, a U.S. holiday
+        'LE': pd.Series([1.0, 2.0, 3.0, 4.0], index=pd.to_datetime(['2024-07-02', '2024-07-03', '2024-07-05',
+                                                                    '2024-07-08'])),
+        'JBSS3': pd.Series(5.0, index=calendar),
+    }
+
+    matrix = price_matrix(series, calendar)
+
+    # Not before the first price nor after the last one
+    assert np.isnan(matrix['LE'].iloc[0])
+    assert matrix['LE'].iloc[1:6].tolist() == [1.0, 2.0, 2.0, 3.0, 4.0]
+    assert matrix['LE'].iloc[-2:].isna().all()
+    assert (matrix['JBSS3'] == 5.0).all()
+
+
+def test_report_week_is_the_last_tuesday():
+    # Tuesday, a Friday release delayed by a holiday, and the next Monday
+    dates = pd.DatetimeIndex(['2024-06-18', '2024-06-21 15:30', '2024-06-24'])
+
+    assert report_week(dates).tolist() == [pd.Timestamp('2024-06-18')] * 3
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.analytics import monthly_eggs_set
+from core.panel import weekly_to_monthly
+
+
+def weeks(start, end):
+    """Wednesday week-ending dates covering start to end."""
+    return pd.date_range(start, end, freq='W-WED')
+
+
+def daily_spread(dates, values):
+    """Monthly totals by spreading each week evenly over the 7 days it ends."""
+    days = pd.DatetimeIndex(np.concatenate([pd.date_range(end=date, periods=7) for date in dates]))
+    daily = pd.Series(np.repeat(np.asarray(values, dtype=float) / 7, 7), index=days)
+    return daily.groupby(daily.index.to_period('M')).sum()
+
+
+def test_week_straddling_month_end_is_split_by_days():
+    dates = weeks('2025-03-05', '2025-05-07')
+    values = np.where(dates == pd.Timestamp('2025-04-02'), 7.0, 0.0)
+
+    totals = weekly_to_monthly(dates, values)
+
+    # The week of 27 March - 2 April: 5 days in March, 2 in April
+    assert totals[pd.Timestamp('2025-03-01')] == pytest.approx(5.0)
+    assert totals[pd.Timestamp('2025-04-01')] == pytest.approx(2.0)
+
+
+def test_month_totals_equal_the_daily_spread():
+    dates = weeks('2024-01-03', '2024-12-25')
+    values = np.random.default_rng(0).uniform(100, 200, len(dates))
+
+    totals = weekly_to_monthly(dates, values)
+    expected = daily_spread(dates, values)
+
+    assert len(totals) > 0
+    for month, total in totals.items():
+        assert total == pytest.approx(expected[month.to_period('M')])
+
+
+def test_edge_months_are_dropped():
+    # Starts on Wednesday 10 January, ends on Wednesday 15 May
+    dates = weeks('2024-01-10', '2024-05-15')
+
+    totals = weekly_to_monthly(dates, np.ones(len(dates)))
+
+    assert list(totals.index) == list(pd.date_range('2024-02-01', '2024-04-01', freq='MS'))
+
+
+def test_nan_week_drops_its_months():
+    dates = weeks('2024-01-03', '2024-06-26')
+    values = np.ones(len(dates))
+    # The week of 26 April - 2 May spans two months
+    values[dates == pd.Timestamp('2024-05-01')] = np.nan
+
+    totals = weekly_to_monthly(dates, values)
+
+    assert pd.Timestamp('2024-04-01') not in totals.index
+    assert pd.Timestamp('2024-05-01') not in totals.index
+    assert pd.Timestamp('2024-03-01') in totals.index
+
+
+def test_missing_week_drops_its_month():
+    dates = weeks('2024-01-03', '2024-06-26')
+    dates = dates[dates != pd.Timestamp('2024-03-13')]
+
+    totals = weekly_to_monthly(dates, np.ones(len(dates)))
+
+    assert pd.Timestamp('2024-03-01') not in totals.index
+    assert pd.Timestamp('2024-02-01') in totals.index
+
+
+def test_monthly_eggs_set_labels_months_like_nass():
+    dates = weeks('2023-12-27', '2024-04-03')
+    eggs_set = pd.DataFrame({'Date': dates, 'Eggs Set': np.full(len(dates), 7.0)})
+
+    monthly = monthly_eggs_set(eggs_set)
+
+    assert list(monthly.columns) == ['Eggs Set', 'Date', 'Year', 'Month']
+    assert list(monthly['Month']) == ['JAN', 'FEB', 'MAR']
+    assert list(monthly['Year']) == [2024, 2024, 2024]
+    # One unit per day
+    assert list(monthly['Eggs Set']) == pytest.approx([31.0, 29.0, 31.0])
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from core.pyramid import build_pyramid, pyramid_extent, window
+
+
+def daily_series(years=10):
+    dates = pd.bdate_range('2010-01-01', periods=years * 261)
+    return pd.Series(np.random.default_rng(0).normal(0, 1, len(dates)).cumsum(), index=dates)
+
+
+def test_levels_keep_min_max_last_of_each_bucket():
+    series = daily_series()
+    pyramid = build_pyramid(series)
+    monthly = pyramid['monthly']
+    january = series['2010-01']
+
+    assert list(pyramid) == ['daily', 'weekly', 'monthly', 'quarterly', 'yearly']
+    assert monthly.index[0] == january.index[-1]
+    assert monthly.iloc[0].tolist() == [january.min(), january.max(), january.iloc[-1]]
+    assert pyramid_extent(pyramid) == (series.index[0], series.index[-1])
+
+
+def test_window_picks_the_finest_level_that_fits():
+    pyramid = build_pyramid(daily_series())
+
+    assert window(pyramid, max_points=1500)[0] == 'weekly'
+    name, visible = window(pyramid, '2015-01-03', '2015-03-29', max_points=1500)
+
+    assert name == 'daily'
+    # Widened by one point per side so lines reach the edges
+    assert visible.index[0] < pd.Timestamp('2015-01-03') < visible.index[1]
+    assert visible.index[-2] < pd.Timestamp('2015-03-29') < visible.index[-1]
+
+
+def test_window_thins_the_coarsest_level_when_nothing_fits():
+    name, visible = window(build_pyramid(daily_series()), max_points=4)
+
+    assert name == 'yearly'
+    assert len(visible) <= 4
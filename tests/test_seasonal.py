@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.seasonal import pivot, season_periods, seasonal
+
+
+def monthly_series(start='2018-01-01', periods=84):
+    dates = pd.date_range(start, periods=periods, freq='MS')
+    return pd.Series(np.arange(periods, dtype=float), index=dates)
+
+
+def test_pivot_matches_groupby():
+    dates = pd.date_range('2020-01-01', '2023-12-31', freq='D')
+    series = pd.Series(np.random.default_rng(0).normal(size=len(dates)), index=dates)
+
+    table = pivot(series, 'M', how='mean')
+    expected = series.groupby([series.index.year, series.index.month]).mean().unstack()
+
+    np.testing.assert_allclose(table.to_numpy(), expected.to_numpy())
+    assert list(table.columns[:2]) == ['Jan', 'Feb']
+
+
+def test_season_starting_in_april():
+    dates = pd.to_datetime(['2024-03-31', '2024-04-01', '2024-04-08', '2025-01-15'])
+
+    years, months = season_periods(dates, 'M', start_month=4)
+    _, weeks = season_periods(dates, 'W', start_month=4)
+
+    assert years.tolist() == [2023, 2024, 2024, 2024]
+    assert months.tolist() == [12, 1, 1, 10]
+    assert weeks[1:3].tolist() == [1, 2]
+
+
+def test_pivot_last_and_sum():
+    series = pd.Series([1.0, 2.0, 3.0], index=pd.to_datetime(['2024-01-05', '2024-01-20', '2024-02-01']))
+
+    assert pivot(series, how='last').loc[2024, ['Jan', 'Feb']].tolist() == [2.0, 3.0]
+    assert pivot(series, how='sum').loc[2024, ['Jan', 'Feb']].tolist() == [3.0, 3.0]
+    with pytest.raises(ValueError):
+        pivot(series, how='median')
+
+
+def test_seasonal_bands_and_delta():
+    view = seasonal(monthly_series(), band_years=3)
+
+    assert view.current == 2024
+    assert view.band_seasons == [2021, 2022, 2023]
+    # January of 2021, 2022 and 2023
+    assert view.bands.loc['Jan'].tolist() == [36.0, 60.0, 48.0]
+    assert view.delta.loc['Jan', 'Change'] == 12.0
+    assert view.season_label(2024) == '2024'
+
+
+def test_seasonal_of_an_empty_series():
+    view = seasonal(pd.Series(dtype=float, index=pd.DatetimeIndex([])))
+
+    assert view.current is None
+    assert view.table.empty
@@ -0,0 +1,145 @@
+import os
+
+import pandas as pd
+import pytest
+
+from core import storage
+from core.storage import (DatasetNotFoundError, FrameCache, LocalBackend, S3Backend, copy_datasets,
+                          dataset_exists, load_datasets, make_backend, read_dataset, recording_reads)
+
+FRAME = pd.DataFrame({'DATE': ['2024-01-01', '2024-02-01'], 'VALUE': [1.5, 2.5]})
+
+
+def test_local_backend_round_trip(tmp_path):
+    backend = LocalBackend(tmp_path)
+    backend.write_frame('BR_TEST', FRAME)
+
+    assert backend.list_datasets() == ['BR_TEST']
+    assert backend.exists('BR_TEST') and not backend.exists('OTHER')
+    pd.testing.assert_frame_equal(backend.read_frame('BR_TEST'), FRAME)
+    with pytest.raises(DatasetNotFoundError):
+        backend.version('OTHER')
+
+
+def test_version_changes_with_the_file_but_content_hash_does_not(tmp_path):
+    backend = LocalBackend(tmp_path)
+    backend.write_frame('BR_TEST', FRAME)
+    version, content = backend.version('BR_TEST'), backend.content_hash('BR_TEST')
+
+    backend.write_frame('BR_TEST', FRAME)
+    os.utime(backend.path('BR_TEST'), ns=(1, 1))
+
+    assert backend.version('BR_TEST') != version
+    assert backend.content_hash('BR_TEST') == content
+
+
+def test_make_backend_from_root():
+    assert isinstance(make_backend('s3://bucket/prefix', client=object()), S3Backend)
+    assert isinstance(make_backend('datasets', kind='local'), LocalBackend)
+    with pytest.raises(ValueError):
+        make_backend('datasets', kind='ftp')
+
+
+def test_read_dataset_rereads_changed_datasets(backend, write_dataset):
+    write_dataset('BR_TEST', {'VALUE': [1.0]})
+    first = read_dataset('BR_TEST')
+    # Callers get copies
+    first['VALUE'] = 99.0
+
+    assert read_dataset('BR_TEST')['VALUE'].tolist() == [1.0]
+
+    write_dataset('BR_TEST', {'VALUE': [2.0, 3.0]})
+    os.utime(backend.path('BR_TEST'), ns=(1, 1))
+
+    assert read_dataset('BR_TEST')['VALUE'].tolist() == [2.0, 3.0]
+
+
+def test_recording_reads_sees_worker_threads_and_missing_datasets(backend, write_dataset):
+    write_dataset('A', {'VALUE': [1.0]})
+    write_dataset('B', {'VALUE': [2.0]})
+
+    with recording_reads() as reads:
+        frames = load_datasets(['A', 'B'])
+        dataset_exists('MISSING')
+
+    assert list(frames) == ['A', 'B']
+    assert reads == {'A': backend.version('A'), 'B': backend.version('B'), 'MISSING': None}
+
+
+def test_frame_cache_evicts_least_recently_used():
+    frame = pd.DataFrame({'VALUE': range(100)})
+    nbytes = int(frame.memory_usage(index=True, deep=True).sum())
+    cache = FrameCache(nbytes * 2)
+    cache.put('a', 1, frame)
+    cache.put('b', 1, frame)
+    cache.get('a', 1)
+    cache.put('c', 1, frame)
+
+    assert cache.get('a', 1) is not None
+    assert cache.get('b', 1) is None
+    # Another version is a miss
+    assert cache.get('a', 2) is None
+
+
+def test_copy_to_mmap_types_dates(tmp_path):
+    pytest.importorskip('pyarrow')
+    source = LocalBackend(tmp_path / 'csv')
+    source.write_frame('BR_TEST', FRAME)
+    target = make_backend(tmp_path / 'arrow', kind='mmap')
+
+    copy_datasets(source, target)
+    df = target.read_frame('BR_TEST')
+
+    assert pd.api.types.is_datetime64_any_dtype(df['DATE'])
+    assert df['VALUE'].tolist() == [1.5, 2.5]
+
+
+@pytest.fixture
+def s3_server(monkeypatch):
+    """Local S3-compatible server standing in for MinIO."""
+    server_module = pytest.importorskip('moto.server')
+    pytest.importorskip('boto3')
+    for name, value in [('AWS_ACCESS_KEY_ID', 'test'), ('AWS_SECRET_ACCESS_KEY', 'test'),
+                        ('AWS_DEFAULT_REGION', 'us-east-1')]:
+        monkeypatch.setenv(name, value)
+    server = server_module.ThreadedMotoServer(ip_address='127.0.0.1', port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    yield f"http://{host}:{port}"
+    server.stop()
+
+
+def test_s3_backend_against_local_server(s3_server, tmp_path):
+    import boto3
+
+    boto3.client('s3', endpoint_url=s3_server).create_bucket(Bucket='datasets')
+    backend = make_backend('s3://datasets/prod', endpoint_url=s3_server, cache_dir=tmp_path)
+
+    backend.write_frame('BR_TEST', FRAME)
+    version = backend.version('BR_TEST')
+
+    assert backend.list_datasets() == ['BR_TEST']
+    assert backend.exists('BR_TEST') and not backend.exists('OTHER')
+    pd.testing.assert_frame_equal(backend.read_frame('BR_TEST'), FRAME)
+    with pytest.raises(DatasetNotFoundError):
+        backend.read_frame('OTHER')
+
+    # A new version replaces the cached copy of the old one
+    backend.write_frame('BR_TEST', FRAME.iloc[:1])
+
+    assert backend.version('BR_TEST') != version
+    assert len(backend.read_frame('BR_TEST')) == 1
+    assert [path.name for path in backend.cache_dir.iterdir()] == [f"BR_TEST.{backend.version('BR_TEST')}.csv"]
+
+
+def test_s3_backend_through_read_dataset(s3_server, tmp_path):
+    import boto3
+
+    boto3.client('s3', endpoint_url=s3_server).create_bucket(Bucket='datasets')
+    backend = storage.configure(make_backend('s3://datasets', endpoint_url=s3_server, cache_dir=tmp_path))
+    try:
+        backend.write_frame('BR_TEST', FRAME)
+
+        assert read_dataset('BR_TEST')['VALUE'].tolist() == [1.5, 2.5]
+    finally:
+        storage.configure(None)
@@ -0,0 +1,114 @@
+import json
+import socket
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from core.ticks import BarBuilder, Feed, TickRing, TickStore
+
+NS = 1_000_000_000
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.02)
+    return True
+
+
+def test_ring_keeps_the_last_ticks_oldest_first():
+    ring = TickRing(3)
+    for second in range(5):
+        ring.append(second * NS, float(second), 1.0)
+
+    frame = ring.frame()
+
+    assert len(ring) == 3
+    assert frame['price'].tolist() == [2.0, 3.0, 4.0]
+    assert frame.index[0] == pd.Timestamp(2, unit='s', tz='UTC')
+
+
+def test_bars_open_high_low_close_volume():
+    builder = BarBuilder(60)
+    for second, price in [(0, 10.0), (10, 12.0), (20, 9.0), (59, 11.0), (60, 11.5), (30, 99.0)]:
+        builder.update(second * NS, price, 100.0)
+
+    bars = builder.frame()
+
+    assert bars[['open', 'high', 'low', 'close']].values.tolist() == [[10.0, 12.0, 9.0, 11.0],
+                                                                      [11.5, 11.5, 11.5, 11.5]]
+    # The late tick at 0:30 is not revised into the closed bar
+    assert bars['volume'].tolist() == [400.0, 100.0]
+
+
+def test_store_ignores_malformed_messages():
+    store = TickStore(10)
+    store.add_message('{"ticker": "JBSS3", "time": 1718889600.25, "price": 31.42, "size": 300}')
+    store.add_message('{"ticker": "JBSS3", "time": "2024-06-20T13:20:01Z", "price": 31.5}')
+    store.add_message('not json')
+    store.add_message('{"ticker": "JBSS3"}')
+    store.add_message('��')
+
+    assert store.tickers() == ['JBSS3']
+    assert store.ticks('JBSS3')['price'].tolist() == [31.42, 31.5]
+    assert store.bars('JBSS3', 60)['volume'].sum() == 300.0
+    assert store.ticks('OTHER').empty
+
+
+@pytest.fixture
+def tcp_feed():
+    """Local TCP server sending the given payload to each connection."""
+    server = socket.create_server(('127.0.0.1', 0))
+    payloads = []
+
+    def serve():
+        while True:
+            try:
+                connection, _ = server.accept()
+            except OSError:
+                return
+            with connection:
+                connection.sendall(payloads[0])
+                time.sleep(0.2)
+
+    threading.Thread(target=serve, daemon=True).start()
+    yield f"tcp://127.0.0.1:{server.getsockname()[1]}", payloads
+    server.close()
+
+
+def test_feed_survives_undecodable_bytes(tcp_feed):
+    url, payloads = tcp_feed
+    tick = json.dumps({'ticker': 'BEEF3', 'time': time.time(), 'price': 12.5})
+    payloads.append(b'\xff\xfe\n' + tick.encode('utf-8') + b'\n')
+    store = TickStore(10)
+
+    feed = Feed(url, store).start()
+    try:
+        assert wait_for(lambda: len(store.ticks('BEEF3')) > 0)
+        # Still running, and reconnecting after the server hangs up
+        assert wait_for(lambda: len(store.ticks('BEEF3')) > 1)
+        assert feed._thread.is_alive()
+    finally:
+        feed.stop()
+
+
+def test_feed_is_not_connected_until_a_connection_opens():
+    # Nothing listens on port 1
+    feed = Feed('tcp://127.0.0.1:1', TickStore(10)).start()
+    try:
+        time.sleep(0.3)
+        assert not feed.connected
+        assert feed._thread.is_alive()
+    finally:
+        feed.stop()
+
+
+def test_feed_with_unsupported_scheme_stops():
+    feed = Feed('http://localhost:9001', TickStore(10)).start()
+
+    assert wait_for(lambda: not feed._thread.is_alive())
+    assert not feed.connected
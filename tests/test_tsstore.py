@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core.tsstore import SeriesNotFoundError, TimeSeriesStore, import_datasets, infer_frequency
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TimeSeriesStore(tmp_path / 'series.db')
+
+
+def test_write_and_query_aligned_series(store):
+    monthly = pd.Series([1.0, np.nan, 3.0], index=pd.date_range('2024-01-01', periods=3, freq='MS'))
+    weekly = pd.Series([10.0, 11.0], index=pd.to_datetime(['2024-01-15', '2024-02-15']))
+    store.write_series('MONTHLY', monthly, unit='t')
+    store.write_series('WEEKLY', weekly)
+
+    outer = store.query(['MONTHLY', 'WEEKLY'])
+    filled = store.query(['MONTHLY', 'WEEKLY'], end='2024-02-29', ffill=True, how='inner')
+
+    assert list(outer.columns) == ['MONTHLY', 'WEEKLY']
+    assert len(outer) == 4
+    # NaN values are not stored
+    assert store.catalog().loc['MONTHLY', 'rows'] == 2
+    assert filled.index.tolist() == [pd.Timestamp('2024-01-15'), pd.Timestamp('2024-02-15')]
+    assert filled['MONTHLY'].tolist() == [1.0, 1.0]
+    with pytest.raises(SeriesNotFoundError):
+        store.query(['OTHER'])
+
+
+def test_import_skips_unchanged_datasets(store, write_dataset):
+    write_dataset('BR_TEST_PRICE', {'Date': ['2024-01-01', '2024-01-02'], 'BR_TEST_PRICE': [1.0, 2.0]})
+    write_dataset('BR_TEST_STATE', {'Date': ['2024-01-01'] * 2, 'State': ['PR', 'SC'], 'Cost': [1.0, 2.0]})
+    write_dataset('NOT_SERIES', {'Name': ['a']})
+
+    first = import_datasets(store)
+    second = import_datasets(store)
+
+    assert first == {'BR_TEST_PRICE': 'imported 1 series', 'BR_TEST_STATE': 'imported 2 series',
+                     'NOT_SERIES': 'skipped: not a time series'}
+    assert second['BR_TEST_PRICE'] == 'unchanged'
+    assert store.read_series('BR_TEST_STATE/SC/Cost').tolist() == [2.0]
+
+
+def test_infer_frequency():
+    assert infer_frequency(pd.bdate_range('2024-01-01', periods=30)) == 'daily'
+    assert infer_frequency(pd.date_range('2024-01-01', periods=10, freq='W')) == 'weekly'
+    assert infer_frequency(pd.date_range('2020-01-01', periods=10, freq='MS')) == 'monthly'
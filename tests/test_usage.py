@@ -0,0 +1,57 @@
+import json
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from core import usage
+
+
+@pytest.fixture
+def recording(monkeypatch):
+    monkeypatch.setenv('DASHBOARD_USAGE', '1')
+    yield
+    usage.flush()
+
+
+def test_scores_sum_page_tab_and_chart_counts(recording):
+    for _ in range(3):
+        usage.record('page', 'pages/2_Beef.py')
+    usage.record('tab', '2_Beef', 'Prices')
+    usage.record('page', '3_Chicken')
+    usage.record('unknown', '3_Chicken')
+
+    assert usage.page_scores() == {'2_Beef': 4.0, '3_Chicken': 1.0}
+    assert usage.tab_scores() == {('2_Beef', 'Prices'): 1.0}
+    assert usage.ranked_pages() == ['2_Beef', '3_Chicken']
+
+
+def test_older_counts_weigh_less(recording, usage_database):
+    usage.record('page', '2_Beef')
+    usage.flush()
+    old = (date.today() - timedelta(days=usage.HALF_LIFE_DAYS)).isoformat()
+    with sqlite3.connect(usage_database) as connection:
+        connection.execute("INSERT INTO usage VALUES (?, 'page', '3_Chicken', '', 2)", (old,))
+    connection.close()
+
+    assert usage.page_scores() == {'2_Beef': 1.0, '3_Chicken': pytest.approx(1.0)}
+
+
+def test_nothing_is_recorded_when_disabled(usage_database):
+    usage.record('page', '2_Beef')
+    usage.flush()
+
+    assert usage.page_scores() == {}
+
+
+def test_beacon_reports_are_validated_and_bucketed(recording):
+    usage.record_beacon(json.dumps({'kind': 'window', 'page': '2_Beef', 'item': 'Prices|400'}))
+    usage.record_beacon(json.dumps({'kind': 'page', 'page': 'Not_A_Page'}))
+    usage.record_beacon(b'not json')
+
+    assert usage.scores('window') == {('2_Beef', 'Prices|3Y'): 1.0}
+    assert usage.page_scores() == {}
+
+
+def test_window_bucket():
+    assert [usage.window_bucket(days) for days in (30, 365, 1000, 1500, 9000)] == ['3M', '1Y', '3Y', '5Y', 'MAX']
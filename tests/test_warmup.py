@@ -0,0 +1,55 @@
+import pytest
+
+from core import warmup
+from core.warmup import page_name, page_scripts, plan, scan_page, warm_chart
+
+
+@pytest.mark.parametrize('chart', ['px.line', 'px.bar', 'go.Figure', 'go.Scatter', 'go.Bar', 'go.Candlestick',
+                                   'go.Ohlc', 'go.Heatmap', 'go.Pie'])
+def test_every_chart_type_warms(chart):
+    warm_chart(chart)
+
+
+def test_warm_chart_covers_the_chart_types_of_the_pages():
+    charts = {chart for path in page_scripts() for chart in scan_page(path, set()).charts}
+
+    assert 'go.Candlestick' in charts
+    for chart in charts:
+        warm_chart(chart)
+
+
+def test_scan_page_finds_datasets_through_fstrings(tmp_path):
+    page = tmp_path / '2_Test.py'
+    page.write_text(
+        "import plotly.express as px\n"
+        "for code in ['CATTLE', 'HOG']:\n"
+        "    df = read_dataset(f'BR_{code}_PRICE')\n"
+        "read_dataset('US_EGGS')\n"
+        "px.line(df)\n"
+    )
+
+    step = scan_page(page, {'BR_CATTLE_PRICE', 'BR_HOG_PRICE', 'US_EGGS', 'UNUSED'})
+
+    assert step.page == '2_Test'
+    assert sorted(step.datasets) == ['BR_CATTLE_PRICE', 'BR_HOG_PRICE', 'US_EGGS']
+    assert step.charts == ['px.line']
+
+
+def test_plan_puts_priority_pages_first(backend):
+    steps = plan(['12_Markets', '2_Beef'])
+    pages = [page_name(path) for path in page_scripts()]
+
+    assert [step.page for step in steps[:2]] == ['12_Markets', '2_Beef']
+    # The others keep their sidebar order
+    assert [step.page for step in steps[2:]] == [page for page in pages if page not in ('12_Markets', '2_Beef')]
+
+
+def test_warmup_reports_failures_without_raising(backend, monkeypatch):
+    monkeypatch.setenv(warmup.PAGES_ENV, '0')
+    monkeypatch.setattr(warmup, 'plan', lambda priority=None: [warmup.PageWarmup('2_Beef', ['MISSING'])])
+
+    result = warmup.run_warmup()
+
+    assert result['status'] == 'ready'
+    assert result['pages'] == ['2_Beef']
+    assert [error['page'] for error in result['errors']] == ['2_Beef']
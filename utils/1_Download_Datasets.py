@@ -1,6 +1,10 @@
+import os
+import sys
 import streamlit as st
 import pandas as pd
-from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.storage import list_datasets, read_dataset
 
 # Set page config
 st.set_page_config(
@@ -15,9 +19,8 @@ st.markdown("""
 Download any dataset from the table below by clicking the download button next to it.
 """)
 
-# Get all CSV files from the datasets directory
-datasets_dir = Path("datasets")
-csv_files = list(datasets_dir.glob("*.csv"))
+# Get all datasets from the configured storage
+dataset_names = list_datasets()
 
 # Create a table with dataset information
 st.write("### Available Datasets")
@@ -30,22 +33,23 @@ with col2:
     st.write("**Download**")
 
 # Create rows for each dataset
-for csv_file in sorted(csv_files):
+for dataset_name in dataset_names:
+    file_name = f"{dataset_name}.csv"
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        st.write(csv_file.name)
+        st.write(file_name)
     
     with col2:
-        # Read the CSV file
-        df = pd.read_csv(csv_file)
+        # Read the dataset
+        df = read_dataset(dataset_name)
         csv = df.to_csv(index=False)
         
         # Create download button
         st.download_button(
             label="📥 Download",
             data=csv,
-            file_name=csv_file.name,
+            file_name=file_name,
             mime="text/csv",
-            key=f"download_{csv_file.name}"
+            key=f"download_{file_name}"
         ) 
\ No newline at end of file